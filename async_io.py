@@ -0,0 +1,248 @@
+"""
+async_io.py
+
+This module is an asyncio-driven I/O engine for sources on high-latency network shares (SMB/NFS). There every
+os.scandir, os.stat and read or write waits on a network round trip, so doing them one after another leaves the link
+idle most of the time. The engine keeps thousands of these operations in flight instead: they are awaited from an
+event loop and run on a bounded thread pool sized for I/O latency rather than for the number of cores.
+
+- AsyncIOEngine.walk reads the directories of a tree concurrently and stats all files of a directory at once before
+  yielding its walker.Directory listing, so the cleanup passes find every stat result already cached.
+- AsyncIOEngine.copy_file copies a file in chunks with os.pread/os.pwrite at their offsets. Several chunks of the same
+  file and of different files are in flight at once, limited by a shared in-flight byte budget, so the network pipe
+  stays full without the buffers growing beyond the budget. The chunks are written to a temporary ".<name>.partial"
+  file that is renamed over the destination once all of its bytes are there.
+- walk_tree() is the drop-in replacement for walker.walk used by the cleanup scripts: with io_concurrency set it runs
+  the asynchronous walk in a background thread and yields the listings as they are ready.
+
+Listings come in the order their directories finish reading, not in strict top-down order. Passes only change the
+files of the directory they are given, so the order does not change their result.
+
+Usage:
+    for directory in walk_tree(dir_path, io_concurrency=256):
+        ...
+
+    engine = AsyncIOEngine(concurrency=256, inflight_bytes=64 * 1024 * 1024)
+    asyncio.run(engine.copy_file(source_path, destination_path))
+    engine.close()
+
+Dependencies:
+    - os
+    - queue
+    - shutil
+    - asyncio
+    - itertools
+    - threading
+    - concurrent.futures
+    - walker
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import queue
+import shutil
+import asyncio
+import itertools
+import threading
+import concurrent.futures
+
+from walker import Directory, walk
+
+DEFAULT_CONCURRENCY = 256
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_INFLIGHT_BYTES = 64 * 1024 * 1024
+
+# Sentinel put on the listing queue when the background walk has finished.
+_DONE = object()
+
+
+class ByteBudget:
+    """
+    Limits the number of bytes held in buffers by all copies together. Requests larger than the budget are
+    clamped to it, so a single large chunk can never wait forever.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.available = limit
+        self.condition = asyncio.Condition()
+
+    async def acquire(self, size):
+        size = min(size, self.limit)
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.available >= size)
+            self.available -= size
+        return size
+
+    async def release(self, size):
+        async with self.condition:
+            self.available += size
+            self.condition.notify_all()
+
+
+class AsyncIOEngine:
+    """
+    Runs blocking filesystem calls from asyncio on a thread pool of concurrency threads.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, chunk_size=DEFAULT_CHUNK_SIZE,
+                 inflight_bytes=DEFAULT_INFLIGHT_BYTES):
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.inflight_bytes = inflight_bytes
+        self.executor = concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix='io')
+        self.budget = None
+        self.created_directories = set()
+        self.temp_numbers = itertools.count()
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def makedirs(self, path):
+        """
+        Create path and its parents, once per engine.
+        """
+        if path not in self.created_directories:
+            await self.run(lambda: os.makedirs(path, exist_ok=True))
+            self.created_directories.add(path)
+
+    async def walk(self, dir_path, plan=None, onerror=None):
+        """
+        Yield a walker.Directory listing for dir_path and each of its subdirectories, with the stat result of every
+        file already fetched. Directories are read concurrently. Errors are passed to onerror, or printed.
+        """
+
+        async def scan(path):
+            directory = await self.run(Directory.scan, path, plan)
+            entries = list(directory.files.values())
+            results = await asyncio.gather(*(self.run(entry.stat) for entry in entries), return_exceptions=True)
+            for entry, result in zip(entries, results):
+                if isinstance(result, OSError):
+                    # The file is gone or unreadable; leave it out like os.walk would.
+                    del directory.files[entry.name]
+            return directory
+
+        pending = {asyncio.ensure_future(scan(dir_path))}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    directory = task.result()
+                except OSError as e:
+                    if onerror is not None:
+                        onerror(e)
+                    else:
+                        print(f"Failed to read directory {e.filename}: {e}")
+                    continue
+                pending.update(asyncio.ensure_future(scan(directory.join(name)))
+                               for name in directory.subdirectories)
+                yield directory
+
+    async def copy_file(self, source_path, destination_path):
+        """
+        Copy source_path to destination_path with its metadata, like shutil.copy2, keeping several chunks in flight.
+        The copy goes to a temporary file beside destination_path, which is removed if the copy fails, so an existing
+        destination that is a hard link of the source is never truncated.
+        """
+        if self.budget is None:
+            self.budget = ByteBudget(self.inflight_bytes)
+        directory, filename = os.path.split(os.path.abspath(destination_path))
+        temp_path = os.path.join(directory, f".{filename}.partial.{os.getpid()}.{next(self.temp_numbers)}")
+        source_fd = await self.run(os.open, source_path, os.O_RDONLY)
+        try:
+            destination_fd = await self.run(os.open, temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            try:
+                size = (await self.run(os.fstat, source_fd)).st_size
+                await self._copy_chunks(source_fd, destination_fd, size)
+                copied = (await self.run(os.fstat, destination_fd)).st_size
+                if copied != size:
+                    raise OSError(f"Copied {copied} of {size} bytes of {source_path}")
+            finally:
+                await self.run(os.close, destination_fd)
+            await self.run(shutil.copystat, source_path, temp_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        finally:
+            await self.run(os.close, source_fd)
+        await self.run(os.replace, temp_path, destination_path)
+
+    async def _copy_chunks(self, source_fd, destination_fd, size):
+        async def copy_chunk(offset, length):
+            end = offset + length
+            try:
+                # pread may return fewer bytes than asked for, notably on network filesystems; read on until the end of
+                # the chunk or of the file.
+                while offset < end:
+                    data = await self.run(os.pread, source_fd, end - offset, offset)
+                    if not data:
+                        break
+                    while data:
+                        written = await self.run(os.pwrite, destination_fd, data, offset)
+                        data = data[written:]
+                        offset += written
+            finally:
+                await self.budget.release(length)
+
+        tasks = []
+        try:
+            offset = 0
+            while offset < size:
+                length = await self.budget.acquire(min(self.chunk_size, size - offset))
+                tasks.append(asyncio.ensure_future(copy_chunk(offset, length)))
+                offset += length
+                # Surface a failed chunk before reading the rest of the file.
+                if tasks[0].done():
+                    tasks.pop(0).result()
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def walk_tree(dir_path, plan=None, io_concurrency=0):
+    """
+    Yield the walker.Directory listings of dir_path like walker.walk. If io_concurrency is non-zero, the tree is
+    read by an AsyncIOEngine with that many concurrent operations in a background thread.
+    """
+    if not io_concurrency:
+        yield from walk(dir_path, plan)
+        return
+
+    directories = queue.Queue(maxsize=io_concurrency)
+    errors = []
+
+    async def produce():
+        engine = AsyncIOEngine(io_concurrency)
+        try:
+            async for directory in engine.walk(dir_path, plan):
+                # Wait for room in the queue on a thread of its own, so a slow consumer never holds an I/O thread.
+                await asyncio.to_thread(directories.put, directory)
+        finally:
+            engine.close()
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            directories.put(_DONE)
+
+    threading.Thread(target=run, name='async-walker', daemon=True).start()
+    while True:
+        directory = directories.get()
+        if directory is _DONE:
+            break
+        yield directory
+    if errors:
+        raise errors[0]
@@ -0,0 +1,251 @@
+"""
+corpus.py
+
+This script generates a synthetic media corpus for the benchmarks, locally and reproducibly: the same options and seed
+always produce the same files. It writes:
+
+- small JPEG photos, most with an EXIF DateTimeOriginal tag and some without (--undated-ratio),
+- minimal MP4 and MOV videos: an ftyp atom, a moov/mvhd atom holding the creation time and an mdat atom,
+- NEF-like TIFF raw files with an EXIF date and an embedded JPEG preview in a SubIFD,
+- siblings for the cleanup scripts (--sibling-ratio): a JPEG next to some NEF files, a HEIC next to some JPEG photos
+  and a "-converted.mp4" next to some videos,
+- copies of some files in other directories (--duplicate-ratio), for the duplicate detection.
+
+Files are spread over a tree of --width directories per level and --depth levels: depth 0 puts every file in the
+root directory, a small width with a large depth gives a deep tree and a large width with depth 1 a wide one. Every
+file gets unique filler bytes (--photo-kb, --video-kb, --raw-kb), so only the duplicates have identical content.
+
+Usage:
+    python benchmarks/corpus.py <output_dir> [--photos N] [--videos N] [--nefs N] [--undated-ratio R]
+                                [--sibling-ratio R] [--duplicate-ratio R] [--depth N] [--width N]
+                                [--photo-kb N] [--video-kb N] [--raw-kb N] [--seed N]
+
+Arguments:
+    output_dir (str): Directory to create the corpus in. It must not exist yet.
+
+Dependencies:
+    - PIL (Python Imaging Library)
+    - io
+    - os
+    - sys
+    - random
+    - shutil
+    - struct
+    - argparse
+    - datetime
+    - tiff_ifd
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import io
+import os
+import sys
+import random
+import shutil
+import struct
+import argparse
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tiff_ifd import (TAG_DATE_TIME_ORIGINAL, TAG_EXIF_IFD, TAG_IMAGE_WIDTH, TAG_JPEG_INTERCHANGE_FORMAT,
+                      TAG_JPEG_INTERCHANGE_FORMAT_LENGTH, TAG_NEW_SUBFILE_TYPE, TAG_SUB_IFDS)
+
+QUICKTIME_EPOCH_OFFSET = 2082844800
+EXIF_DATE_FORMAT = '%Y:%m:%d %H:%M:%S'
+FIRST_DATE = datetime(2005, 1, 1)
+DATE_RANGE_SECONDS = 20 * 365 * 24 * 3600
+MAX_COMMENT_SIZE = 65533
+TIFF_LONG = 4
+TIFF_ASCII = 2
+
+DEFAULT_PHOTOS = 1000
+DEFAULT_VIDEOS = 100
+DEFAULT_NEFS = 100
+
+
+def jpeg_template(width=16, height=16):
+    """
+    Return the bytes of a small valid JPEG image without metadata.
+    """
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (120, 80, 40)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def ifd(entries, next_offset=0):
+    """
+    Pack a little-endian TIFF IFD from (tag, type, count, value) entries, where value is an inline 4-byte value.
+    """
+    data = struct.pack('<H', len(entries))
+    for tag, value_type, count, value in sorted(entries):
+        data += struct.pack('<HHII', tag, value_type, count, value)
+    return data + struct.pack('<I', next_offset)
+
+
+def exif_tiff(capture_date):
+    """
+    Return a little-endian TIFF structure with IFD0 -> EXIF IFD -> DateTimeOriginal.
+    """
+    exif_offset = 8 + 2 + 12 + 4
+    date_offset = exif_offset + 2 + 12 + 4
+    date = capture_date.strftime(EXIF_DATE_FORMAT).encode() + b'\x00'
+    return (b'II*\x00' + struct.pack('<I', 8) +
+            ifd([(TAG_EXIF_IFD, TIFF_LONG, 1, exif_offset)]) +
+            ifd([(TAG_DATE_TIME_ORIGINAL, TIFF_ASCII, len(date), date_offset)]) + date)
+
+
+def segment(marker, payload):
+    return struct.pack('>BBH', 0xFF, marker, len(payload) + 2) + payload
+
+
+def make_jpeg(template, capture_date, filler):
+    """
+    Return JPEG bytes with an EXIF date (unless capture_date is None) and the filler in COM segments.
+    """
+    data = template[:2]
+    if capture_date is not None:
+        data += segment(0xE1, b'Exif\x00\x00' + exif_tiff(capture_date))
+    for start in range(0, len(filler), MAX_COMMENT_SIZE):
+        data += segment(0xFE, filler[start:start + MAX_COMMENT_SIZE])
+    return data + template[2:]
+
+
+def make_quicktime(brand, capture_date, filler):
+    """
+    Return the bytes of a minimal QuickTime/MP4 file: ftyp, moov/mvhd with the creation time, and mdat.
+    """
+    def atom(atom_type, payload):
+        return struct.pack('>I4s', len(payload) + 8, atom_type) + payload
+
+    creation_time = int(capture_date.timestamp()) + QUICKTIME_EPOCH_OFFSET
+    mvhd = struct.pack('>B3xIIII', 0, creation_time, creation_time, 1000, 1000) + bytes(80)
+    return atom(b'ftyp', brand + struct.pack('>I', 0) + brand) + atom(b'moov', atom(b'mvhd', mvhd)) + atom(b'mdat', filler)
+
+
+def make_nef(preview, capture_date, filler, raw_width=4000):
+    """
+    Return the bytes of a NEF-like TIFF file: IFD0 with an EXIF IFD holding the capture date and a SubIFD holding
+    the JPEG preview, followed by filler standing in for the raw data.
+    """
+    date = capture_date.strftime(EXIF_DATE_FORMAT).encode() + b'\x00'
+    ifd0_offset = 8
+    exif_offset = ifd0_offset + 2 + 4 * 12 + 4
+    preview_ifd_offset = exif_offset + 2 + 12 + 4
+    date_offset = preview_ifd_offset + 2 + 3 * 12 + 4
+    preview_offset = date_offset + len(date)
+    return (b'II*\x00' + struct.pack('<I', ifd0_offset) +
+            ifd([(TAG_NEW_SUBFILE_TYPE, TIFF_LONG, 1, 0), (TAG_IMAGE_WIDTH, TIFF_LONG, 1, raw_width),
+                 (TAG_SUB_IFDS, TIFF_LONG, 1, preview_ifd_offset), (TAG_EXIF_IFD, TIFF_LONG, 1, exif_offset)]) +
+            ifd([(TAG_DATE_TIME_ORIGINAL, TIFF_ASCII, len(date), date_offset)]) +
+            ifd([(TAG_NEW_SUBFILE_TYPE, TIFF_LONG, 1, 1), (TAG_JPEG_INTERCHANGE_FORMAT, TIFF_LONG, 1, preview_offset),
+                 (TAG_JPEG_INTERCHANGE_FORMAT_LENGTH, TIFF_LONG, 1, len(preview))]) +
+            date + preview + filler)
+
+
+def generate_corpus(output_dir, photos=DEFAULT_PHOTOS, videos=DEFAULT_VIDEOS, nefs=DEFAULT_NEFS, undated_ratio=0.2,
+                    sibling_ratio=0.1, duplicate_ratio=0.05, depth=2, width=8, photo_kb=16, video_kb=256, raw_kb=256,
+                    seed=0):
+    """
+    Generate the corpus in output_dir and return (file_count, total_bytes).
+    """
+    rng = random.Random(seed)
+    template = jpeg_template()
+    preview = jpeg_template(64, 48)
+    directories = []
+    for leaf in range(width ** depth):
+        parts = []
+        for _ in range(depth):
+            leaf, digit = divmod(leaf, width)
+            parts.append(f"dir_{digit:03d}")
+        directories.append(os.path.join(output_dir, *parts))
+    written = []
+
+    def write(name, data):
+        directory = directories[rng.randrange(len(directories))]
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        written.append(path)
+        return path
+
+    def random_date():
+        return FIRST_DATE + timedelta(seconds=rng.randrange(DATE_RANGE_SECONDS))
+
+    def filler(kilobytes):
+        return rng.randbytes(kilobytes * 1024)
+
+    os.makedirs(output_dir)
+    for number in range(photos):
+        capture_date = None if rng.random() < undated_ratio else random_date()
+        path = write(f"IMG_{number:06d}.jpg", make_jpeg(template, capture_date, filler(photo_kb)))
+        if rng.random() < sibling_ratio:
+            # HEIC version of the photo, smaller or larger than the JPEG.
+            sibling = os.path.splitext(path)[0] + '.heic'
+            with open(sibling, 'wb') as f:
+                f.write(filler(rng.choice((photo_kb // 2, photo_kb * 2))))
+            written.append(sibling)
+
+    for number in range(videos):
+        extension, brand = rng.choice((('.mp4', b'isom'), ('.mov', b'qt  ')))
+        path = write(f"VID_{number:06d}{extension}", make_quicktime(brand, random_date(), filler(video_kb)))
+        if rng.random() < sibling_ratio:
+            sibling = os.path.splitext(path)[0] + '-converted.mp4'
+            with open(sibling, 'wb') as f:
+                f.write(make_quicktime(b'isom', random_date(), filler(video_kb // 2)))
+            written.append(sibling)
+
+    for number in range(nefs):
+        path = write(f"DSC_{number:06d}.NEF", make_nef(preview, random_date(), filler(raw_kb)))
+        if rng.random() < sibling_ratio:
+            sibling = os.path.splitext(path)[0] + '.JPG'
+            with open(sibling, 'wb') as f:
+                f.write(make_jpeg(template, random_date(), filler(photo_kb)))
+            written.append(sibling)
+
+    for path in rng.sample(written, int(len(written) * duplicate_ratio)):
+        directory = directories[rng.randrange(len(directories))]
+        os.makedirs(directory, exist_ok=True)
+        duplicate = os.path.join(directory, f"copy_{os.path.basename(path)}")
+        if not os.path.exists(duplicate):
+            shutil.copyfile(path, duplicate)
+            written.append(duplicate)
+
+    return len(written), sum(os.path.getsize(path) for path in written)
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument('--photos', type=int, default=DEFAULT_PHOTOS, help='Number of JPEG photos')
+    parser.add_argument('--videos', type=int, default=DEFAULT_VIDEOS, help='Number of MP4/MOV videos')
+    parser.add_argument('--nefs', type=int, default=DEFAULT_NEFS, help='Number of NEF-like raw files')
+    parser.add_argument('--undated-ratio', type=float, default=0.2, help='Fraction of photos without EXIF date')
+    parser.add_argument('--sibling-ratio', type=float, default=0.1,
+                        help='Fraction of files with a HEIC, converted video or JPEG sibling')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.05, help='Fraction of files copied elsewhere')
+    parser.add_argument('--depth', type=int, default=2, help='Number of directory levels')
+    parser.add_argument('--width', type=int, default=8, help='Number of directories per level')
+    parser.add_argument('--photo-kb', type=int, default=16, help='Filler size of each photo in KB')
+    parser.add_argument('--video-kb', type=int, default=256, help='Filler size of each video in KB')
+    parser.add_argument('--raw-kb', type=int, default=256, help='Filler size of each raw file in KB')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+
+
+def corpus_options(args):
+    return dict(photos=args.photos, videos=args.videos, nefs=args.nefs, undated_ratio=args.undated_ratio,
+                sibling_ratio=args.sibling_ratio, duplicate_ratio=args.duplicate_ratio, depth=args.depth,
+                width=args.width, photo_kb=args.photo_kb, video_kb=args.video_kb, raw_kb=args.raw_kb, seed=args.seed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic media corpus for the benchmarks.')
+    parser.add_argument('output_dir', help='Directory to create the corpus in')
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    file_count, total_bytes = generate_corpus(args.output_dir, **corpus_options(args))
+    print(f"Generated {file_count} files ({total_bytes / (1024 * 1024):.1f} MB) in {args.output_dir}")
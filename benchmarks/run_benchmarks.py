@@ -0,0 +1,164 @@
+"""
+run_benchmarks.py
+
+This script times the organizer and the cleanup scripts on a synthetic corpus (see corpus.py), so a change can be
+measured before it reaches a real library. Every run works on a fresh copy of the corpus, because most scripts change
+the tree they work on, and runs the script as a child process with its output discarded. For each benchmark it
+reports the best wall time over --repeat runs, the corpus files/s and MB/s at that time, and the peak resident set
+size of the child process (from os.wait4), which catches memory regressions as well as slowdowns.
+
+Copying the corpus is not timed. The page cache is not dropped between runs, so the numbers are for a warm cache; use
+--repeat to smooth out noise. The capture date cache (see date_cache.py), on the other hand, starts empty in every
+run: the organizer benchmarks keep it in the run folder, which also leaves the cache of the user untouched.
+
+Benchmarks:
+    organizer_single_thread: organizer_single_thread.py --date-cache <run folder>
+    organizer_threads: organizer.py --no-index --date-cache <run folder>
+    organizer_processes: organizer.py --no-index --processes <number of CPUs> --date-cache <run folder>
+    nef_jpg_deleter, heif_organizer, converted_video_organizer, video_extension_changer, created_date_updater,
+    maintenance: the cleanup scripts, each on its own.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--benchmarks NAME [NAME ...]] [--repeat N] [--corpus DIR] [--json FILE]
+                                        [corpus options, see corpus.py]
+
+Options:
+    --benchmarks: Names of the benchmarks to run. Defaults to all of them.
+    --repeat: Number of runs per benchmark. Defaults to 3.
+    --corpus: Use this existing corpus instead of generating one.
+    --json: Also write the results to this file as JSON.
+
+Dependencies:
+    - os
+    - sys
+    - json
+    - time
+    - shutil
+    - argparse
+    - tempfile
+    - subprocess
+    - corpus
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from corpus import add_corpus_arguments, corpus_options, generate_corpus
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmark name -> arguments of the script, relative to the repository. "{source}" is replaced by the corpus copy
+# and "{date_cache}" by a capture date cache in the run folder.
+BENCHMARKS = {
+    'organizer_single_thread': ['organizer_single_thread.py', '{source}', '--date-cache', '{date_cache}'],
+    'organizer_threads': ['organizer.py', '{source}', '--no-index', '--date-cache', '{date_cache}'],
+    'organizer_processes': ['organizer.py', '{source}', '--no-index', '--processes', str(os.cpu_count() or 1),
+                            '--date-cache', '{date_cache}'],
+    'nef_jpg_deleter': ['nef_jpg_deleter.py', '{source}'],
+    'heif_organizer': ['heif_organizer.py', '{source}'],
+    'converted_video_organizer': ['converted_video_organizer.py', '{source}'],
+    'video_extension_changer': ['video_extension_changer.py', '{source}'],
+    'created_date_updater': ['created_date_updater.py', '{source}'],
+    'maintenance': ['maintenance.py', '{source}'],
+}
+
+
+def corpus_size(corpus_dir):
+    file_count = 0
+    total_bytes = 0
+    for root, dirs, files in os.walk(corpus_dir):
+        for file in files:
+            file_count += 1
+            total_bytes += os.path.getsize(os.path.join(root, file))
+    return file_count, total_bytes
+
+
+def run_once(arguments, source, date_cache):
+    """
+    Run one benchmark on source and return (seconds, peak_rss_bytes).
+    """
+    command = [sys.executable] + [argument.format(source=source, date_cache=date_cache) for argument in arguments]
+    command[1] = os.path.join(REPOSITORY_DIR, command[1])
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = process.stderr.read()
+    process.stderr.close()
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with {process.returncode}: {stderr.decode(errors='replace')}")
+    # ru_maxrss is in kilobytes on Linux.
+    return seconds, usage.ru_maxrss * 1024
+
+
+def run_benchmarks(corpus_dir, names, repeat, work_dir):
+    """
+    Run the named benchmarks on copies of corpus_dir and return a list of result dicts.
+    """
+    file_count, total_bytes = corpus_size(corpus_dir)
+    print(f"Corpus: {file_count} files, {total_bytes / (1024 * 1024):.1f} MB")
+    results = []
+    for name in names:
+        times = []
+        peak_rss = 0
+        for run in range(repeat):
+            run_dir = os.path.join(work_dir, f"{name}_{run}")
+            source = os.path.join(run_dir, 'source')
+            shutil.copytree(corpus_dir, source)
+            try:
+                seconds, rss = run_once(BENCHMARKS[name], source, os.path.join(run_dir, 'capture_dates.sqlite'))
+            finally:
+                shutil.rmtree(run_dir)
+            times.append(seconds)
+            peak_rss = max(peak_rss, rss)
+        best = min(times)
+        result = {
+            'benchmark': name,
+            'files': file_count,
+            'bytes': total_bytes,
+            'best_seconds': round(best, 4),
+            'mean_seconds': round(sum(times) / len(times), 4),
+            'files_per_second': round(file_count / best, 1),
+            'mb_per_second': round(total_bytes / best / (1024 * 1024), 2),
+            'peak_rss_mb': round(peak_rss / (1024 * 1024), 1),
+        }
+        results.append(result)
+        print(f"{name:<28} {result['best_seconds']:>9.3f} s {result['files_per_second']:>10.1f} files/s "
+              f"{result['mb_per_second']:>8.2f} MB/s {result['peak_rss_mb']:>7.1f} MB RSS")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the organizer and the cleanup scripts.')
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help='Names of the benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs per benchmark')
+    parser.add_argument('--corpus', help='Use this existing corpus instead of generating one')
+    parser.add_argument('--json', help='Also write the results to this file as JSON')
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='organizer-benchmark-')
+    try:
+        corpus_dir = args.corpus
+        if corpus_dir is None:
+            corpus_dir = os.path.join(work_dir, 'corpus')
+            generate_corpus(corpus_dir, **corpus_options(args))
+        results = run_benchmarks(corpus_dir, args.benchmarks, args.repeat, work_dir)
+    finally:
+        shutil.rmtree(work_dir)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'corpus': corpus_options(args) if args.corpus is None else args.corpus,
+                       'results': results}, f, indent=2)
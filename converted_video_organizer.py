@@ -2,29 +2,43 @@
 converted_video_organizer.py
 
 This script organizes converted video files in a specified directory and its subdirectories. It checks for converted videos
-that have a corresponding original video file and performs the following actions:
+that have a corresponding original video file (matched case-insensitively from the directory listing) and performs the
+following actions:
 
 1. Checks if the converted file size is larger than the original file size. If it is, the converted file is removed.
 2. Sets the modified and created date of the converted file to that of the original file.
 3. Deletes the original file and renames the converted file to the original filename with mp4 as file extension.
 
 Usage:
-    python converted_video_organizer.py <dir_path>
+    python converted_video_organizer.py <dir_path> [--plan PLAN_FILE] [--io-concurrency N]
 
 Arguments:
     dir_path (str): Path to the directory containing the converted video files.
 
+Options:
+    --plan: Write the operations to this plan file instead of applying them (see planner.py).
+    --io-concurrency: Read directories and stat files with this many concurrent operations (see async_io.py). Use on
+                      network shares. Defaults to 0, a sequential walk.
+
 Dependencies:
     - os
-    - sys
+    - argparse
+    - async_io
+    - pairing
+    - planner
 
 Author: K H M BURHAN UDDIN
 Date: May 12, 2023
-Version: 1.0
+Version: 1.4
 """
 
 import os
-import sys
+import argparse
+from collections import Counter
+
+from async_io import walk_tree
+from pairing import find_converted_pairs
+from planner import Plan
 
 
 def get_converted_filename(original_filename):
@@ -32,46 +46,63 @@ def get_converted_filename(original_filename):
     return f"{base}-converted.mp4"
 
 
-def organize_converted_videos(dir_path):
-    file_pairs = []
-    total_original_size = 0
-    total_converted_size = 0
-    for root, dirs, files in os.walk(dir_path):
-        for filename in files:
-            original_path = os.path.join(root, filename)
-            if os.path.isfile(original_path) and not filename.endswith("-converted.mp4"):
-                converted_filename = get_converted_filename(filename)
-                converted_path = os.path.join(root, converted_filename)
-                if os.path.isfile(converted_path):
-                    original_size = os.path.getsize(original_path)
-                    converted_size = os.path.getsize(converted_path)
-
-                    if converted_size > original_size:
-                        print(f"Error: Converted file {converted_path} is larger than original file {original_path}. Removing converted file.")
-                        os.remove(converted_path)
-                    else:
-                         # set modified and created date of converted file to that of original file
-                        original_stat = os.stat(original_path)
-                        os.utime(converted_path, (original_stat.st_atime, original_stat.st_mtime))
-                        print(f"Converted file {converted_path} modified and created date updated to that of original file {original_path}")
-
-                        # Delete original file and rename converted file to original filename
-                        os.remove(original_path)
-                        new_path = os.path.splitext(original_path)[0] + ".mp4"
-                        os.rename(converted_path, new_path)
-                        print(f"Deleted {original_path} and renamed {converted_path} to {new_path}")
-
-                        file_pairs.append((original_path, converted_path, original_size, converted_size))
-
-    for original_path, converted_path, original_size, converted_size in file_pairs:
-        total_original_size += original_size
-        total_converted_size += converted_size
-        print(f"{original_path} ({human_readable_size(original_size)} -> {human_readable_size(converted_size)})")
-
-    print(f"Total Size: {human_readable_size(total_original_size)}")
-    print(f"Converted Size: {human_readable_size(total_converted_size)}")
-    print(f"Saved: {human_readable_size(total_original_size - total_converted_size)}")
-    
+def organize_converted_videos(dir_path, plan=None, io_concurrency=0):
+    totals = Counter()
+    for directory in walk_tree(dir_path, plan, io_concurrency):
+        totals.update(organize_converted_videos_in_directory(directory))
+    print_summary(totals)
+
+
+def organize_converted_videos_in_directory(directory):
+    """
+    Process the original/converted video pairs of one walker.Directory listing. Returns a Counter with the number of
+    'pairs' kept and their 'original_size' and 'converted_size'.
+    """
+    totals = Counter()
+    for filename, converted_filename in find_converted_pairs(directory.file_names()):
+        sizes = finalize_converted_video(directory, filename, converted_filename)
+        if sizes is not None:
+            original_size, converted_size = sizes
+            totals['pairs'] += 1
+            totals['original_size'] += original_size
+            totals['converted_size'] += converted_size
+            print(f"{directory.join(filename)} ({human_readable_size(original_size)} -> {human_readable_size(converted_size)})")
+    return totals
+
+
+def finalize_converted_video(directory, filename, converted_filename):
+    """
+    Keep the converted video only if it is not larger than the original. If it is kept, it gets the dates of the
+    original, the original is deleted and the converted video takes its name with mp4 as file extension.
+    Returns (original_size, converted_size) if the converted video was kept, otherwise None.
+    """
+    original_path = directory.join(filename)
+    converted_path = directory.join(converted_filename)
+    original_size = directory.size(filename)
+    converted_size = directory.size(converted_filename)
+
+    if converted_size > original_size:
+        print(f"Error: Converted file {converted_path} is larger than original file {original_path}. Removing converted file.")
+        directory.remove(converted_filename)
+        return None
+
+    # set modified and created date of converted file to that of original file
+    original_stat = directory.stat(filename)
+    directory.utime(converted_filename, (original_stat.st_atime, original_stat.st_mtime))
+    print(f"Converted file {converted_path} modified and created date updated to that of original file {original_path}")
+
+    # Delete original file and rename converted file to original filename
+    directory.remove(filename)
+    new_filename = os.path.splitext(filename)[0] + ".mp4"
+    directory.rename(converted_filename, new_filename)
+    print(f"Deleted {original_path} and renamed {converted_path} to {directory.join(new_filename)}")
+    return original_size, converted_size
+
+
+def print_summary(totals):
+    print(f"Total Size: {human_readable_size(totals['original_size'])}")
+    print(f"Converted Size: {human_readable_size(totals['converted_size'])}")
+    print(f"Saved: {human_readable_size(totals['original_size'] - totals['converted_size'])}")
 
 
 def human_readable_size(size, decimal_places=2):
@@ -83,8 +114,13 @@ def human_readable_size(size, decimal_places=2):
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print(f"Usage: python {sys.argv[0]} <dir_path>")
-        sys.exit(1)
-    dir_path = sys.argv[1]
-    organize_converted_videos(dir_path)
+    parser = argparse.ArgumentParser(description='Replace original videos by their smaller converted version.')
+    parser.add_argument('dir_path', help='Path to the directory containing the converted video files')
+    parser.add_argument('--plan', help='Write the operations to this plan file instead of applying them')
+    parser.add_argument('--io-concurrency', type=int, default=0,
+                        help='Read directories and stat files with this many concurrent operations')
+    args = parser.parse_args()
+    plan = Plan() if args.plan else None
+    organize_converted_videos(args.dir_path, plan, args.io_concurrency)
+    if plan is not None:
+        plan.save(args.plan)
@@ -1,38 +1,63 @@
-import os
-import sys
+import argparse
 import datetime
+from collections import Counter
 
-def update_created_date(path):
+from async_io import walk_tree
+from planner import Plan
+
+def update_created_date(path, plan=None, io_concurrency=0):
     """
     Recursively updates the "created" date of all .mp4 files to their "modified" date.
 
     Args:
         path (str): The root directory path.
+        plan (planner.Plan): If given, the updates are recorded in the plan instead of being applied.
+        io_concurrency (int): If non-zero, the tree is read with this many concurrent operations (see async_io.py).
 
     Returns:
         None
     """
-    for root, dirs, files in os.walk(path):
-        for file in files:
-            if file.endswith(".mp4"):
-                file_path = os.path.join(root, file)
-                modified_date = os.path.getmtime(file_path)
-                modified_datetime = datetime.datetime.fromtimestamp(modified_date)
-                accessed_date = os.path.getatime(file_path)
-                accessed_datetime = datetime.datetime.fromtimestamp(accessed_date)
-                created_date = os.path.getctime(file_path)
-                created_datetime = datetime.datetime.fromtimestamp(created_date)
-
-                # Skip files where the modified date is already the same as the created date
-                if modified_datetime == created_datetime:
-                    continue
-
-                # Update the created date to match the modified date
-                os.utime(file_path, (accessed_date, modified_date))
-                print(f"Updated created date of '{file}' to {modified_datetime}")
-
-if len(sys.argv) < 2:
-    print("Please provide the directory path as a command-line argument.")
-else:
-    root_directory = sys.argv[1]
-    update_created_date(root_directory)
+    for directory in walk_tree(path, plan, io_concurrency):
+        update_created_date_in_directory(directory)
+
+def update_created_date_in_directory(directory):
+    """
+    Updates the "created" date of the .mp4 files of one walker.Directory listing to their "modified" date.
+
+    Args:
+        directory (walker.Directory): The directory listing.
+
+    Returns:
+        Counter: The number of files 'updated'.
+    """
+    totals = Counter()
+    for file in directory.file_names():
+        if file.endswith(".mp4"):
+            file_stat = directory.stat(file)
+            modified_date = file_stat.st_mtime
+            modified_datetime = datetime.datetime.fromtimestamp(modified_date)
+            accessed_date = file_stat.st_atime
+            created_date = file_stat.st_ctime
+            created_datetime = datetime.datetime.fromtimestamp(created_date)
+
+            # Skip files where the modified date is already the same as the created date
+            if modified_datetime == created_datetime:
+                continue
+
+            # Update the created date to match the modified date
+            directory.utime(file, (accessed_date, modified_date))
+            totals['updated'] += 1
+            print(f"Updated created date of '{file}' to {modified_datetime}")
+    return totals
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Update the created date of .mp4 files to their modified date.')
+    parser.add_argument('root_directory', help='The root directory path')
+    parser.add_argument('--plan', help='Write the operations to this plan file instead of applying them')
+    parser.add_argument('--io-concurrency', type=int, default=0,
+                        help='Read directories and stat files with this many concurrent operations')
+    args = parser.parse_args()
+    plan = Plan() if args.plan else None
+    update_created_date(args.root_directory, plan, args.io_concurrency)
+    if plan is not None:
+        plan.save(args.plan)
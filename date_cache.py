@@ -0,0 +1,224 @@
+"""
+date_cache.py
+
+This module keeps a persistent cache of the capture dates of files, shared by every script that needs them. Entries
+are keyed on the identity and version of the file content, (device, inode, size, modification time), not on its path,
+so a date stays valid when the file is renamed, moved within the filesystem or seen through another folder, and
+becomes unreachable as soon as the file is modified. Each entry stores the capture date and where it came from (see
+date_extractor.py: "exif", "quicktime", "avi" or "filename"), or no date at all if the file has none, so files
+without a date are not opened again either. A lookup needs only the stat result the scripts already have, so on a
+repeat run resolving dates costs no file opens.
+
+The cache is a SQLite database, by default "photo-video-organizer/capture_dates.sqlite" in the user cache folder
+($XDG_CACHE_HOME or ~/.cache). Every lookup and record marks the entry as used by the current run. When the cache is
+closed with more than max_entries entries, the least recently used ones are evicted, which drops the entries of files
+that were modified or deleted since.
+
+Several scripts can use the cache at the same time. New records are written in batches, each in one short
+transaction, so the cache is never held locked between batches, and a script that cannot read or write the cache,
+because it is locked for too long or damaged, reads the dates from the files instead of failing.
+
+The ctime fallback of the organizer is not cached: it is read from the stat result for free.
+
+Usage:
+    cache = DateCache()
+    capture_date, source = cache.resolve(file_path, os.stat(file_path))
+    cache.close()
+
+Dependencies:
+    - os
+    - time
+    - sqlite3
+    - threading
+    - datetime
+    - date_extractor
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+from date_extractor import get_capture_date_and_source
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dates (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    capture_date TEXT,
+    source TEXT,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (device, inode, size, mtime_ns)
+);
+CREATE INDEX IF NOT EXISTS dates_last_used ON dates (last_used);
+"""
+
+DEFAULT_CACHE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')),
+                                  'photo-video-organizer', 'capture_dates.sqlite')
+DEFAULT_MAX_ENTRIES = 1000000
+# Seconds a write waits for another script to finish writing to the cache.
+BUSY_TIMEOUT = 10.0
+
+
+class DateCache:
+    """
+    Thread-safe cache of capture dates keyed by (device, inode, size, mtime_ns).
+
+    Records are kept in memory and written in one short transaction every `commit_every` records, so several scripts
+    can share the cache without holding it locked; records lost in a crash are simply extracted again. The cache is
+    only an optimization: any SQLite error, for example a cache locked by another script for longer than
+    BUSY_TIMEOUT, is reported once and treated as a cache miss, and after a failed write nothing more is written.
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, commit_every=1000):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.commit_every = commit_every
+        self.lock = threading.Lock()
+        # Key -> row of the records not written yet.
+        self.recorded = {}
+        self.used = []
+        self.hits = 0
+        self.misses = 0
+        self.warned = False
+        # Cleared when a write fails, so that later batches do not wait for the lock again.
+        self.writable = True
+        # All entries used by this run share one timestamp, which is enough to evict by run.
+        self.now = int(time.time())
+        self.conn = None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+            # Autocommit: reads take no lock, and writes open a transaction only for the time of a batch.
+            self.conn = sqlite3.connect(cache_path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                        check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            self._error(e)
+
+    @staticmethod
+    def key(stat_result):
+        return stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
+
+    def _error(self, error):
+        # Called with the lock held, or before the cache is shared.
+        if not self.warned:
+            self.warned = True
+            print(f"Date cache {self.cache_path} unavailable, reading dates from the files: {error}")
+        if self.conn is not None:
+            try:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+
+    def lookup(self, stat_result):
+        """
+        Return the cached (capture_date, source) of the file described by stat_result, or None if it is not cached.
+        A cached file without a date gives (None, None).
+        """
+        key = self.key(stat_result)
+        with self.lock:
+            row = self.recorded.get(key)
+            entry = row[4:6] if row is not None else self._select(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        capture_date, source = entry
+        return (datetime.fromisoformat(capture_date) if capture_date is not None else None), source
+
+    def _select(self, key):
+        if self.conn is None:
+            return None
+        try:
+            row = self.conn.execute(
+                "SELECT capture_date, source, last_used FROM dates "
+                "WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?", key).fetchone()
+        except sqlite3.Error as e:
+            self._error(e)
+            return None
+        if row is None:
+            return None
+        if row[2] != self.now:
+            self.used.append(key)
+            self._written()
+        return row[:2]
+
+    def record(self, stat_result, capture_date, source):
+        """
+        Cache the capture date and its source (both None if the file has no date) for the file described by stat_result.
+        """
+        key = self.key(stat_result)
+        row = key + (capture_date.isoformat() if capture_date is not None else None, source, self.now)
+        with self.lock:
+            self.recorded[key] = row
+            self._written()
+
+    def resolve(self, file_path, stat_result=None):
+        """
+        Return (capture_date, source) for file_path from the cache, extracting and caching it on a miss.
+        """
+        stat_result = stat_result if stat_result is not None else os.stat(file_path)
+        entry = self.lookup(stat_result)
+        if entry is None:
+            entry = get_capture_date_and_source(file_path)
+            self.record(stat_result, *entry)
+        return entry
+
+    def _written(self):
+        if len(self.recorded) + len(self.used) >= self.commit_every:
+            self._commit()
+
+    def _commit(self):
+        rows = list(self.recorded.values())
+        used = self.used
+        self.recorded = {}
+        self.used = []
+        if self.conn is None or not self.writable or not (rows or used):
+            return
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany("INSERT OR REPLACE INTO dates VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.executemany(
+                "UPDATE dates SET last_used = ? WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+                [(self.now,) + key for key in used])
+            self.conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self.writable = False
+            self._error(e)
+
+    def evict(self):
+        """
+        Delete the least recently used entries beyond max_entries. Returns the number of entries deleted.
+        """
+        with self.lock:
+            self._commit()
+            if self.conn is None or not self.writable:
+                return 0
+            try:
+                count, = self.conn.execute("SELECT COUNT(*) FROM dates").fetchone()
+                excess = count - self.max_entries
+                if excess <= 0:
+                    return 0
+                self.conn.execute(
+                    "DELETE FROM dates WHERE rowid IN (SELECT rowid FROM dates ORDER BY last_used LIMIT ?)", (excess,))
+            except sqlite3.Error as e:
+                self._error(e)
+                return 0
+            return excess
+
+    def close(self):
+        self.evict()
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,248 @@
+"""
+date_extractor.py
+
+This module extracts the capture date of photos and videos by reading only a small, bounded byte range of each file.
+It is shared by the organizer scripts and replaces parsing whole files with exifread.
+
+Supported formats:
+    - JPEG: the EXIF DateTimeOriginal tag from the first APP1 segment.
+    - TIFF based raw files (NEF): the EXIF DateTimeOriginal tag reached through the IFD0 -> EXIF IFD chain.
+    - MP4, MOV and 3GP: the creation_time of the moov/mvhd atom. Atoms are skipped by seeking over them, so the
+      media data is never read, even when the moov atom is stored at the end of the file.
+    - AVI: the IDIT chunk of the hdrl list.
+    - Any file without an embedded date: a date in the file name, such as "IMG_20210314_101500.jpg",
+      "VID-20210314-WA0001.mp4" or "2021-03-14 10.15.00.png".
+
+Formats are detected from the file signature, not from the extension. Each file costs a handful of small reads,
+typically a few kilobytes in total.
+
+get_capture_date_and_source also returns where the date came from ("exif", "quicktime", "avi" or "filename"), which
+date_cache.py stores with the date.
+
+Usage:
+    creation_date = get_capture_date(file_path)  # datetime or None
+    creation_date, source = get_capture_date_and_source(file_path)  # (None, None) if there is no date
+    results = get_capture_dates(file_paths)  # [(file_path, datetime or None, source or None), ...]
+    exif = find_jpeg_exif(f)  # (offset, length) of the EXIF TIFF structure of an open JPEG, or None
+
+Dependencies:
+    - os
+    - re
+    - struct
+    - datetime
+    - tiff_ifd
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.3
+"""
+
+import os
+import re
+import struct
+from datetime import datetime
+
+from tiff_ifd import TAG_DATE_TIME_ORIGINAL, TAG_EXIF_IFD, TiffReader
+
+EXIF_DATE_FORMAT = '%Y:%m:%d %H:%M:%S'
+IDIT_DATE_FORMAT = '%a %b %d %H:%M:%S %Y'
+
+# Seconds between the QuickTime epoch (1904-01-01) and the Unix epoch (1970-01-01).
+QUICKTIME_EPOCH_OFFSET = 2082844800
+
+MAX_JPEG_SEGMENTS = 32
+MAX_ATOMS = 256
+QUICKTIME_CONTAINERS = (b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot', b'uuid')
+
+# Where a capture date came from.
+SOURCE_EXIF = 'exif'
+SOURCE_QUICKTIME = 'quicktime'
+SOURCE_AVI = 'avi'
+SOURCE_FILENAME = 'filename'
+SOURCE_CTIME = 'ctime'
+
+# A date in a file name, optionally followed by a time and milliseconds, with or without separators between the parts.
+FILENAME_DATE_PATTERN = re.compile(
+    r'(?<!\d)(19[7-9]\d|20\d\d)[-_.]?(0[1-9]|1[0-2])[-_.]?(0[1-9]|[12]\d|3[01])'
+    r'(?:[-_. T]?([01]\d|2[0-3])[-_.:]?([0-5]\d)[-_.:]?([0-5]\d)(?:\d{3})?)?(?!\d)')
+
+
+def get_capture_date(file_path):
+    """
+    Return the capture date stored in the header or the name of file_path, or None if it has no capture date.
+    """
+    return get_capture_date_and_source(file_path)[0]
+
+
+def get_capture_date_and_source(file_path):
+    """
+    Return (capture_date, source) for file_path, where source is one of SOURCE_EXIF, SOURCE_QUICKTIME, SOURCE_AVI or
+    SOURCE_FILENAME. Returns (None, None) if neither the header nor the name of the file holds a date.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            signature = f.read(12)
+            capture_date = source = None
+            if signature[:2] == b'\xff\xd8':
+                capture_date, source = _jpeg_date(f), SOURCE_EXIF
+            elif signature[:4] in (b'II*\x00', b'MM\x00*'):
+                capture_date, source = _tiff_date(TiffReader.from_file(f)), SOURCE_EXIF
+            elif signature[4:8] in QUICKTIME_CONTAINERS:
+                capture_date, source = _quicktime_date(f), SOURCE_QUICKTIME
+            elif signature[:4] == b'RIFF' and signature[8:12] == b'AVI ':
+                capture_date, source = _avi_date(f), SOURCE_AVI
+            if capture_date is not None:
+                return capture_date, source
+    except (OSError, ValueError, OverflowError, struct.error):
+        pass
+    capture_date = date_from_filename(os.path.basename(file_path))
+    return (capture_date, SOURCE_FILENAME) if capture_date is not None else (None, None)
+
+
+def date_from_filename(filename):
+    """
+    Return the first valid date (and time, if present) found in filename, or None.
+    """
+    for match in FILENAME_DATE_PATTERN.finditer(filename):
+        try:
+            return datetime(*(int(part) for part in match.groups() if part is not None))
+        except ValueError:
+            continue
+    return None
+
+
+def get_capture_dates(file_paths):
+    """
+    Return a list of (file_path, capture_date, source) for a batch of files.
+
+    This is the unit of work submitted to a process pool: only the paths go to the worker and only the small
+    (path, date, source) results come back.
+    """
+    return [(file_path, *get_capture_date_and_source(file_path)) for file_path in file_paths]
+
+
+def find_date_time_original(tiff):
+    """
+    Return the DateTimeOriginal IfdEntry reached through the IFD0 -> EXIF IFD chain of tiff, or None.
+    """
+    ifd0, _ = tiff.read_ifd(tiff.ifd0_offset)
+    if TAG_EXIF_IFD not in ifd0:
+        return None
+    exif_offset, = tiff.values(ifd0[TAG_EXIF_IFD])
+    exif_ifd, _ = tiff.read_ifd(exif_offset)
+    return exif_ifd.get(TAG_DATE_TIME_ORIGINAL)
+
+
+def _tiff_date(tiff):
+    entry = find_date_time_original(tiff)
+    if entry is None:
+        return None
+    return datetime.strptime(tiff.ascii_value(entry)[:19], EXIF_DATE_FORMAT)
+
+
+def find_jpeg_exif(f):
+    """
+    Return (offset, length) of the TIFF structure in the EXIF APP1 segment of the open JPEG file f, or None if it has
+    no EXIF segment before the image data. Only the segment headers are read.
+    """
+    offset = 2
+    for _ in range(MAX_JPEG_SEGMENTS):
+        f.seek(offset)
+        header = f.read(4)
+        if len(header) != 4 or header[0] != 0xFF:
+            return None
+        marker = header[1]
+        length, = struct.unpack('>H', header[2:])
+        if marker in (0xDA, 0xD9):
+            # Start of scan or end of image: no EXIF segment before the image data.
+            return None
+        if marker == 0xE1 and f.read(6) == b'Exif\x00\x00':
+            return offset + 10, length - 8
+        offset += 2 + length
+    return None
+
+
+def _jpeg_date(f):
+    exif = find_jpeg_exif(f)
+    if exif is None:
+        return None
+    offset, length = exif
+    f.seek(offset)
+    return _tiff_date(TiffReader.from_bytes(f.read(length)))
+
+
+def _iter_atoms(f, start, end):
+    """
+    Yield (type, payload_offset, payload_end) for each atom between start and end, reading only the atom headers.
+    """
+    offset = start
+    for _ in range(MAX_ATOMS):
+        if end is not None and offset + 8 > end:
+            return
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) != 8:
+            return
+        size, atom_type = struct.unpack('>I4s', header)
+        payload_offset = offset + 8
+        if size == 1:
+            size, = struct.unpack('>Q', f.read(8))
+            payload_offset += 8
+        elif size == 0:
+            size = os.fstat(f.fileno()).st_size - offset
+        if size < payload_offset - offset:
+            return
+        yield atom_type, payload_offset, offset + size
+        offset += size
+
+
+def _quicktime_date(f):
+    for atom_type, payload_offset, payload_end in _iter_atoms(f, 0, None):
+        if atom_type != b'moov':
+            continue
+        for child_type, child_offset, _ in _iter_atoms(f, payload_offset, payload_end):
+            if child_type != b'mvhd':
+                continue
+            f.seek(child_offset)
+            header = f.read(4)
+            if len(header) < 4:
+                # Truncated atom: fall back to the file name.
+                return None
+            version = header[0]
+            if version == 1:
+                creation_time, = struct.unpack('>Q', f.read(8))
+            else:
+                creation_time, = struct.unpack('>I', f.read(4))
+            if creation_time == 0:
+                return None
+            return datetime.fromtimestamp(creation_time - QUICKTIME_EPOCH_OFFSET)
+        return None
+    return None
+
+
+def _avi_date(f):
+    offset = 12
+    for _ in range(MAX_ATOMS):
+        f.seek(offset)
+        header = f.read(12)
+        if len(header) < 8:
+            return None
+        chunk_id, size = struct.unpack('<4sI', header[:8])
+        if chunk_id == b'LIST' and header[8:12] == b'hdrl':
+            return _avi_hdrl_date(f, offset + 12, offset + 8 + size)
+        if chunk_id == b'LIST' and header[8:12] == b'movi':
+            return None
+        offset += 8 + size + (size & 1)
+    return None
+
+
+def _avi_hdrl_date(f, start, end):
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        chunk_id, size = struct.unpack('<4sI', f.read(8))
+        if chunk_id == b'IDIT':
+            value = f.read(min(size, 64)).split(b'\x00')[0].decode('ascii').strip()
+            return datetime.strptime(value, IDIT_DATE_FORMAT)
+        offset += 8 + size + (size & 1)
+    return None
@@ -3,10 +3,21 @@ date_updater.py
 
 This script updates the date taken and file creation and modification time for images and videos in a specified folder
 and its subfolders. It supports JPEG, PNG, GIF, BMP images, and MP4, AVI, MOV videos. The script utilizes the `piexif`
-library for images and the `os.utime` function for videos to modify the file metadata.
+library for images and the `os.utime` function for videos to modify the file metadata. When exiftool is installed, the
+date taken of videos is also written, in batches per folder, through a pool of long-running "exiftool -stay_open"
+processes (see exiftool.py).
+
+The date taken of a JPEG image is patched in place: when its DateTimeOriginal tag already holds a date of the standard
+length, the new date is written over the 20 bytes of the old one, so re-dating a folder writes a few bytes per image
+instead of rewriting every file. Other images get a new EXIF block with piexif, written to a temporary file that then
+replaces the image. Images are updated by a pool of threads, and the images and videos that could not be updated are
+listed at the end.
+
+The new date taken of each image is recorded in the shared date cache (see date_cache.py), so the organizer does not
+have to read it back from the file.
 
 Usage:
-    python date_updater.py <src_folder> <new_date> [--verbose]
+    python date_updater.py <src_folder> <new_date> [--verbose] [--workers N] [--no-date-cache] [--date-cache PATH]
 
 Arguments:
     src_folder (str): Source folder containing the images and videos.
@@ -14,72 +25,254 @@ Arguments:
 
 Options:
     --verbose: Print progress information.
+    --workers: Number of images updated at the same time. Defaults to 8.
+    --no-date-cache: Do not record the new dates in the date cache.
+    --date-cache: Path of the capture date cache.
 
 Dependencies:
     - os
+    - sys
+    - shutil
     - argparse
     - datetime
+    - concurrent.futures
     - piexif
-    - subprocess
+    - exiftool
+    - date_cache
+    - date_extractor
+    - tiff_ifd
 
 Author: K H M BURHAN UDDIN
 Date: May 12, 2023
-Version: 1.0
+Version: 1.3
 """
 
 import os
+import sys
+import shutil
+import struct
 import argparse
 import datetime
+import concurrent.futures
 import piexif
-import subprocess
+
+from date_cache import DEFAULT_CACHE_PATH, DateCache
+from date_extractor import EXIF_DATE_FORMAT, SOURCE_EXIF, find_date_time_original, find_jpeg_exif
+from exiftool import ExifToolError, ExifToolPool
+from tiff_ifd import TYPE_ASCII, TiffReader
 
 IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
 VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov')
+VIDEO_DATE_TAGS = ('DateTimeOriginal', 'CreateDate', 'ModifyDate')
+# Videos whose tags exiftool cannot write; only their file times are updated.
+READ_ONLY_VIDEO_EXTENSIONS = ('.avi',)
+DEFAULT_WORKERS = 8
 
-def update_date(file_path, new_date):
+def update_date(file_path, new_date, exiftool=None, date_cache=None):
     """
-    Update the date taken and file creation and modification time for the given file
+    Update the date taken and file creation and modification time for the given file.
+    The date taken of videos is only written when an exiftool session or pool is given.
+    The new date taken of images is recorded in date_cache, if given.
+    Returns a list of (file_path, error) for the files that could not be updated.
     """
     if os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS:
         try:
-            exif_dict = piexif.load(file_path)
-            exif_dict['Exif'][piexif.ExifIFD.DateTimeOriginal] = new_date.strftime('%Y:%m:%d %H:%M:%S')
-            exif_bytes = piexif.dump(exif_dict)
-            piexif.insert(exif_bytes, file_path)
-            os.utime(file_path, (new_date.timestamp(), new_date.timestamp()))
-            print(f"Updated date taken for image: {file_path}")
-        except:
+            update_image_date(file_path, new_date, date_cache)
+        except (OSError, ValueError, struct.error) as e:
             print(f"Failed to update date taken for image: {file_path}")
-            
+            return [(file_path, e)]
+        print(f"Updated date taken for image: {file_path}")
     elif os.path.splitext(file_path)[1].lower() in VIDEO_EXTENSIONS:
+        return update_video_dates([file_path], new_date, exiftool)
+    return []
+
+def update_image_date(file_path, new_date, date_cache=None):
+    """
+    Write new_date as the date taken of an image, in place if possible, and set its modification time to it.
+    Returns 'patched' or 'rewritten'. Raises OSError or ValueError if the image cannot be updated.
+    """
+    if patch_exif_date(file_path, new_date):
+        method = 'patched'
+    else:
+        rewrite_exif_date(file_path, new_date)
+        method = 'rewritten'
+    os.utime(file_path, (new_date.timestamp(), new_date.timestamp()))
+    if date_cache is not None:
+        date_cache.record(os.stat(file_path), new_date, SOURCE_EXIF)
+    return method
+
+def patch_exif_date(file_path, new_date):
+    """
+    Overwrite the DateTimeOriginal value of a JPEG image in place. Returns False, without writing anything, if the
+    image has no DateTimeOriginal tag holding a date of the standard length or its EXIF data is malformed.
+    """
+    value = new_date.strftime(EXIF_DATE_FORMAT).encode('ascii') + b'\x00'
+    with open(file_path, 'r+b') as f:
+        if f.read(2) != b'\xff\xd8':
+            return False
+        exif = find_jpeg_exif(f)
+        if exif is None:
+            return False
+        exif_offset, exif_length = exif
+        if exif_length < 8:
+            return False
+        f.seek(exif_offset)
+        try:
+            # Parsed from the segment alone, so an offset pointing outside of it is rejected rather than followed.
+            tiff = TiffReader.from_bytes(f.read(exif_length))
+            entry = find_date_time_original(tiff)
+            if entry is None or entry.type != TYPE_ASCII or entry.count != len(value):
+                return False
+            value_offset = tiff.value_offset(entry)
+        except (ValueError, struct.error):
+            return False
+        # The value must lie in the EXIF segment, or the write would corrupt the image.
+        if value_offset < 8 or value_offset + len(value) > exif_length:
+            return False
+        f.seek(exif_offset + value_offset)
+        f.write(value)
+    return True
+
+def rewrite_exif_date(file_path, new_date):
+    """
+    Rebuild the EXIF block of an image with piexif and replace the image with a rewritten copy.
+    """
+    exif_dict = piexif.load(file_path)
+    exif_dict['Exif'][piexif.ExifIFD.DateTimeOriginal] = new_date.strftime(EXIF_DATE_FORMAT)
+    exif_bytes = piexif.dump(exif_dict)
+    directory, filename = os.path.split(file_path)
+    temp_path = os.path.join(directory, f".{filename}.redating")
+    try:
+        piexif.insert(exif_bytes, file_path, temp_path)
+        shutil.copymode(file_path, temp_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, file_path)
+
+def write_video_date_tags(file_paths, new_date, exiftool):
+    """
+    Write new_date to the date taken tags of a batch of videos with a single exiftool command.
+    If the batch fails, the videos are retried one by one so only the failing ones are reported.
+    Returns a list of (file_path, error) for the videos whose tags could not be written.
+    """
+    tags = {tag: new_date.strftime(EXIF_DATE_FORMAT) for tag in VIDEO_DATE_TAGS}
+    try:
+        exiftool.write_tags(file_paths, tags)
+    except ExifToolError as e:
+        if len(file_paths) > 1:
+            failures = []
+            for file_path in file_paths:
+                failures.extend(write_video_date_tags([file_path], new_date, exiftool))
+            return failures
+        print(f"Failed to update date taken tags for video: {file_paths[0]}")
+        return [(file_paths[0], e)]
+    return []
+
+def update_video_dates(file_paths, new_date, exiftool=None):
+    """
+    Update the date taken and file creation and modification time for a batch of videos. The date taken tags are
+    written with exiftool, if given, except for formats it cannot write (AVI). The file times are updated even for
+    the videos whose tags could not be written.
+    Returns a list of (file_path, error) for the videos that could not be updated.
+    """
+    failures = []
+    if exiftool is not None:
+        tag_paths = [file_path for file_path in file_paths
+                     if os.path.splitext(file_path)[1].lower() not in READ_ONLY_VIDEO_EXTENSIONS]
+        if tag_paths:
+            failures = write_video_date_tags(tag_paths, new_date, exiftool)
+    failed_paths = {file_path for file_path, _ in failures}
+
+    for file_path in file_paths:
         try:
-            # cmd = ['exiftool', '-DateTimeOriginal=' + new_date.strftime('%Y:%m:%d %H:%M:%S'), file_path]
-            # subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
             os.utime(file_path, (new_date.timestamp(), new_date.timestamp()))
-            print(f"Updated date taken for video: {file_path}")
-        except:
+        except OSError as e:
             print(f"Failed to update date taken for video: {file_path}")
+            failures.append((file_path, e))
+            continue
+        if file_path not in failed_paths:
+            print(f"Updated date taken for video: {file_path}")
+    return failures
 
-def update_date_recursive(src_folder, new_date, verbose):
+def update_date_recursive(src_folder, new_date, verbose, date_cache_path=DEFAULT_CACHE_PATH, workers=DEFAULT_WORKERS):
     """
     Recursively update the date taken and file creation and modification time for all images and videos in the given folder
+    Returns a list of (file_path, error) for the files that could not be updated.
     """
-    for root, dirs, files in os.walk(src_folder):
-        for file_name in files:
-            file_path = os.path.join(root, file_name)
-            if os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS or os.path.splitext(file_path)[1].lower() in VIDEO_EXTENSIONS:
-                update_date(file_path, new_date)
-                if verbose:
-                    print(f"Processed file: {file_path}")
+    exiftool = ExifToolPool() if ExifToolPool.available() else None
+    date_cache = DateCache(date_cache_path) if date_cache_path is not None else None
+    failures = []
+    counts = {'patched': 0, 'rewritten': 0}
+
+    def finish(future, file_path):
+        try:
+            method = future.result()
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Failed to update date taken for image: {file_path}")
+            failures.append((file_path, e))
+            return
+        counts[method] += 1
+        print(f"Updated date taken for image: {file_path}")
         if verbose:
-            print(f"Processed folder: {root}")
+            print(f"Processed file: {file_path}")
+
+    try:
+        # Keep a bounded number of images in flight instead of one future per image.
+        in_flight = {}
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            for root, dirs, files in os.walk(src_folder):
+                video_paths = []
+                for file_name in files:
+                    file_path = os.path.join(root, file_name)
+                    if os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS:
+                        if len(in_flight) >= 2 * workers:
+                            done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                            for future in done:
+                                finish(future, in_flight.pop(future))
+                        in_flight[executor.submit(update_image_date, file_path, new_date, date_cache)] = file_path
+                    elif os.path.splitext(file_path)[1].lower() in VIDEO_EXTENSIONS:
+                        video_paths.append(file_path)
+                if video_paths:
+                    failures.extend(update_video_dates(video_paths, new_date, exiftool))
+                    if verbose:
+                        for file_path in video_paths:
+                            print(f"Processed file: {file_path}")
+                if verbose:
+                    print(f"Processed folder: {root}")
+            for future in concurrent.futures.as_completed(in_flight):
+                finish(future, in_flight[future])
+    finally:
+        if exiftool is not None:
+            exiftool.close()
+        if date_cache is not None:
+            date_cache.close()
+
+    print(f"Patched {counts['patched']} images in place, rewrote {counts['rewritten']} images")
+    print_failure_report(failures)
+    return failures
+
+def print_failure_report(failures):
+    if not failures:
+        return
+    print(f"{len(failures)} file(s) failed:")
+    for file_path, error in failures:
+        print(f"  {file_path}: {error}")
                 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Update the date taken and file creation and modification time for all images and videos in a folder.')
     parser.add_argument('src_folder', type=str, help='Source folder containing the images and videos')
     parser.add_argument('new_date', type=str, help='New date to set in the format yyyy-mm-dd')
     parser.add_argument('--verbose', action='store_true', help='Print progress information')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Number of images updated at the same time')
+    parser.add_argument('--no-date-cache', action='store_true', help='Do not record the new dates in the date cache')
+    parser.add_argument('--date-cache', default=DEFAULT_CACHE_PATH, help='Path of the capture date cache')
     args = parser.parse_args()
 
     new_date = datetime.datetime.strptime(args.new_date, '%Y-%m-%d')
-    update_date_recursive(args.src_folder, new_date, args.verbose)
\ No newline at end of file
+    failures = update_date_recursive(args.src_folder, new_date, args.verbose,
+                                     None if args.no_date_cache else args.date_cache, args.workers)
+    if failures:
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+dedup.py
+
+This script finds files with identical content in a folder and its subfolders without hashing every file end to end.
+Candidates are narrowed down in three steps:
+
+1. Files are grouped by size. A file with a unique size cannot have a duplicate and is never opened.
+2. Within each size group, only the first and last 64 KB of every file are hashed.
+3. Files that still collide are hashed in full with a streaming hash.
+
+It is also used by organizer.py (--dedup) to skip, hardlink or report duplicates before they are copied.
+
+Usage:
+    python dedup.py <dir_path> [--action {report,hardlink}] [--workers N]
+
+Arguments:
+    dir_path (str): Path to the directory to search for duplicates.
+
+Options:
+    --action: "report" (default) prints the duplicate groups. "hardlink" replaces every duplicate with a hard link
+              to the first file of its group.
+    --workers: Number of threads used for hashing.
+
+Dependencies:
+    - os
+    - argparse
+    - hashlib
+    - concurrent.futures
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import argparse
+import hashlib
+import concurrent.futures
+from collections import defaultdict
+
+PARTIAL_HASH_BYTES = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKERS = 8
+
+
+def partial_hash(file_path, size):
+    """
+    Hash the first and last PARTIAL_HASH_BYTES of a file. For files up to twice that size this covers every byte.
+    """
+    digest = hashlib.blake2b()
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        if size > 2 * PARTIAL_HASH_BYTES:
+            f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+    return digest.hexdigest()
+
+
+def full_hash(file_path):
+    digest = hashlib.blake2b()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _regroup(groups, key_function, workers):
+    """
+    Split each group of (file_path, size) by key_function(file_path, size), computed in a thread pool.
+    Files that cannot be read are dropped. Only sub-groups with more than one file are returned.
+    """
+    def keyed(item):
+        try:
+            return item, key_function(*item)
+        except OSError as e:
+            print(f"Failed to hash {item[0]}: {e}")
+            return item, None
+
+    regrouped = defaultdict(list)
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        for (file_path, size), key in executor.map(keyed, (item for group in groups for item in group)):
+            if key is not None:
+                regrouped[size, key].append((file_path, size))
+    return [group for group in regrouped.values() if len(group) > 1]
+
+
+def find_duplicates(files, workers=DEFAULT_WORKERS):
+    """
+    Find files with identical content among files, an iterable of (file_path, size).
+
+    Returns a list of duplicate groups. Each group is a sorted list of at least two paths; the first path is the
+    one to keep. Empty files are ignored.
+    """
+    by_size = defaultdict(list)
+    for file_path, size in files:
+        if size > 0:
+            by_size[size].append((file_path, size))
+    groups = [group for group in by_size.values() if len(group) > 1]
+
+    groups = _regroup(groups, partial_hash, workers)
+    fully_covered = [group for group in groups if group[0][1] <= 2 * PARTIAL_HASH_BYTES]
+    partially_covered = [group for group in groups if group[0][1] > 2 * PARTIAL_HASH_BYTES]
+    groups = fully_covered + _regroup(partially_covered, lambda file_path, size: full_hash(file_path), workers)
+
+    return sorted(sorted(file_path for file_path, _ in group) for group in groups)
+
+
+def scan_sizes(dir_path):
+    """
+    Yield (file_path, size) for every regular file under dir_path. Folders and files that cannot be read are reported
+    and skipped.
+    """
+    pending = [dir_path]
+    while pending:
+        directory_path = pending.pop()
+        try:
+            with os.scandir(directory_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat(follow_symlinks=False).st_size
+                    except OSError as e:
+                        print(f"Failed to stat {entry.path}: {e}")
+        except OSError as e:
+            print(f"Failed to read directory {directory_path}: {e}")
+
+
+def hardlink_duplicates(groups):
+    """
+    Replace every duplicate with a hard link to the first file of its group and return the number of bytes freed.
+    """
+    space_saved = 0
+    for keep_path, *duplicate_paths in groups:
+        keep_stat = os.stat(keep_path)
+        for duplicate_path in duplicate_paths:
+            duplicate_stat = os.stat(duplicate_path)
+            if duplicate_stat.st_ino == keep_stat.st_ino or duplicate_stat.st_dev != keep_stat.st_dev:
+                continue
+            temp_path = f"{duplicate_path}.dedup"
+            os.link(keep_path, temp_path)
+            os.replace(temp_path, duplicate_path)
+            space_saved += duplicate_stat.st_size
+            print(f"Linked {duplicate_path} to {keep_path}")
+    return space_saved
+
+
+def print_duplicate_report(groups):
+    total_size = 0
+    for keep_path, *duplicate_paths in groups:
+        size = os.path.getsize(keep_path)
+        total_size += size * len(duplicate_paths)
+        print(f"{keep_path} ({human_readable_size(size)})")
+        for duplicate_path in duplicate_paths:
+            print(f"    = {duplicate_path}")
+    print(f"Duplicate Groups: {len(groups)}")
+    print(f"Duplicate Files: {sum(len(group) - 1 for group in groups)}")
+    print(f"Duplicate Size: {human_readable_size(total_size)}")
+
+
+def human_readable_size(size, decimal_places=2):
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024.0:
+            break
+        size /= 1024.0
+    return f"{size:.{decimal_places}f} {unit}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find files with identical content.')
+    parser.add_argument('dir_path', help='Path to the directory to search for duplicates')
+    parser.add_argument('--action', choices=['report', 'hardlink'], default='report',
+                        help='What to do with the duplicates')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of hashing threads')
+    args = parser.parse_args()
+
+    duplicate_groups = find_duplicates(scan_sizes(args.dir_path), args.workers)
+    if args.action == 'hardlink':
+        print(f"Total Space Saved: {human_readable_size(hardlink_duplicates(duplicate_groups))}")
+    else:
+        print_duplicate_report(duplicate_groups)
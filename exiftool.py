@@ -0,0 +1,220 @@
+"""
+exiftool.py
+
+This module runs exiftool as long-lived "-stay_open" processes, so metadata can be read and written for many files
+without paying the Perl start-up cost of a new exiftool process per file. ExifTool is a single session; ExifToolPool
+hands out a small number of sessions to concurrent callers. Both offer batched commands that read or write the tags
+of many files at once.
+
+Usage:
+    with ExifToolPool(size=4) as exiftool:
+        exiftool.copy_tags(jpg_path, heic_path)
+        exiftool.write_tags(video_paths, {'CreateDate': '2023:05:12 00:00:00'})
+        tags = exiftool.read_tags(file_paths, ['DateTimeOriginal'])
+
+Dependencies:
+    - os
+    - json
+    - queue
+    - shutil
+    - selectors
+    - subprocess
+    - threading
+    - contextlib
+    - exiftool (command-line tool)
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.1
+"""
+
+import os
+import json
+import queue
+import shutil
+import selectors
+import subprocess
+import threading
+from contextlib import contextmanager
+
+DEFAULT_POOL_SIZE = min(4, os.cpu_count() or 1)
+
+
+class ExifToolError(Exception):
+    pass
+
+
+class ExifTool:
+    """
+    A single exiftool process started with "-stay_open True -@ -". Commands are sent on stdin and their output is read
+    up to the "{ready}" marker exiftool prints after each command. Errors and warnings go to a separate stderr pipe,
+    which is read up to the same marker echoed with -echo4, so they never mix with the JSON output. Calls are
+    serialized, so an instance can be shared between threads.
+    """
+
+    def __init__(self, executable='exiftool'):
+        self.executable = executable
+        self.lock = threading.Lock()
+        self.process = subprocess.Popen(
+            [executable, '-stay_open', 'True', '-@', '-'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.command_number = 0
+        self.exited = False
+
+    @property
+    def alive(self):
+        """
+        Whether the exiftool process is still running and answering commands.
+        """
+        return not self.exited and self.process.poll() is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def execute(self, *args):
+        """
+        Run one exiftool command with the given arguments and return its standard output.
+        Raises ExifToolError if exiftool reports an error.
+        """
+        with self.lock:
+            self.command_number += 1
+            marker = f"{{ready{self.command_number}}}"
+            command = '\n'.join(str(arg) for arg in args) + f"\n-echo4\n{marker}\n-execute{self.command_number}\n"
+            try:
+                self.process.stdin.write(command.encode('utf-8'))
+                self.process.stdin.flush()
+            except OSError as e:
+                self.exited = True
+                raise ExifToolError(f"exiftool exited unexpectedly: {e}") from e
+            output, error_output = self._read_until(marker.encode())
+        errors = [line for line in error_output.decode('utf-8', errors='replace').splitlines()
+                  if line.startswith('Error')]
+        if errors:
+            raise ExifToolError('; '.join(errors))
+        return output.decode('utf-8', errors='replace')
+
+    def _read_until(self, marker):
+        """
+        Read stdout and stderr until both end with marker and return what came before it on each. They are read
+        together, so a command that prints many warnings cannot block on a full stderr pipe.
+        """
+        outputs = {self.process.stdout.fileno(): b'', self.process.stderr.fileno(): b''}
+        with selectors.DefaultSelector() as selector:
+            for fd in outputs:
+                selector.register(fd, selectors.EVENT_READ)
+            while selector.get_map():
+                for key, _ in selector.select():
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        self.exited = True
+                        raise ExifToolError("exiftool exited unexpectedly")
+                    outputs[key.fd] += chunk
+                    if outputs[key.fd].rstrip().endswith(marker):
+                        selector.unregister(key.fd)
+        return [output.rstrip()[:-len(marker)] for output in outputs.values()]
+
+    def read_tags(self, file_paths, tags=()):
+        """
+        Read tags (all tags if empty) from a batch of files and return one dict per file, as printed by "exiftool -json".
+        """
+        output = self.execute('-json', *[f'-{tag}' for tag in tags], *file_paths)
+        return json.loads(output) if output.strip() else []
+
+    def write_tags(self, file_paths, tags):
+        """
+        Write the tag -> value pairs in tags to a batch of files in place.
+        """
+        self.execute(*[f'-{tag}={value}' for tag, value in tags.items()], '-overwrite_original', *file_paths)
+
+    def copy_tags(self, source_path, target_path):
+        """
+        Copy all metadata from source_path to target_path in place.
+        """
+        self.execute('-TagsFromFile', source_path, '-all:all', '-overwrite_original', target_path)
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write(b"-stay_open\nFalse\n")
+                self.process.stdin.flush()
+                self.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.wait()
+
+
+class ExifToolPool:
+    """
+    A pool of up to `size` ExifTool sessions shared between threads. Sessions are started on first use and each call
+    borrows one for the duration of a single command, so up to `size` commands run at the same time. A session whose
+    exiftool process has exited is dropped and replaced by a new one on next use.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, executable='exiftool'):
+        self.size = size
+        self.executable = executable
+        self.lock = threading.Lock()
+        self.sessions = []
+        # Idle sessions, most recently used first, above one None for each session that has not been started yet.
+        self.idle = queue.LifoQueue()
+        for _ in range(size):
+            self.idle.put(None)
+
+    @staticmethod
+    def available(executable='exiftool'):
+        """
+        Check whether the exiftool command-line tool is installed.
+        """
+        return shutil.which(executable) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @contextmanager
+    def session(self):
+        """
+        Borrow a session, starting a new one if none is idle and the pool is not full.
+        """
+        session = self.idle.get()
+        try:
+            if session is None:
+                session = ExifTool(self.executable)
+                with self.lock:
+                    self.sessions.append(session)
+            yield session
+        finally:
+            if session is not None and not session.alive:
+                with self.lock:
+                    if session in self.sessions:
+                        self.sessions.remove(session)
+                session.close()
+                session = None
+            self.idle.put(session)
+
+    def execute(self, *args):
+        with self.session() as session:
+            return session.execute(*args)
+
+    def read_tags(self, file_paths, tags=()):
+        with self.session() as session:
+            return session.read_tags(file_paths, tags)
+
+    def write_tags(self, file_paths, tags):
+        with self.session() as session:
+            session.write_tags(file_paths, tags)
+
+    def copy_tags(self, source_path, target_path):
+        with self.session() as session:
+            session.copy_tags(source_path, target_path)
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+            self.sessions = []
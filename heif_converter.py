@@ -0,0 +1,173 @@
+"""
+heif_converter.py
+
+This script converts JPEG images in a specified directory and its subdirectories to HEIC format. It replaces
+convert_to_heif.sh and does the same work for every image:
+
+1. Converts the JPEG to HEIC with ImageMagick, resizing it to 4000x3000.
+2. Copies the metadata from the original image with exiftool.
+3. Sets the modified and accessed dates of the HEIC file to those of the original image.
+4. Records the image and the original and converted sizes in the progress journal.
+
+Images are converted in parallel by a pool of workers sized to the number of CPUs. Metadata is copied through a small
+pool of long-running "exiftool -stay_open" processes instead of a new exiftool process per image. Progress goes to an
+append-only journal ("heic.log.csv" in the input directory, compatible with the one written by convert_to_heif.sh), so
+an interrupted run resumes with the images that have not been converted yet.
+
+Usage:
+    python heif_converter.py <input_dir> [--workers N] [--progress] [--report FILE]
+
+Arguments:
+    input_dir (str): Path to the directory containing the JPEG images.
+
+Options:
+    --workers: Number of images converted at the same time. Defaults to the number of CPUs.
+    --progress: Print a progress line with the throughput and ETA (see metrics.py).
+    --report: Write a JSON report of the run, with per-stage counts, throughput and latency histograms, to this file.
+
+Dependencies:
+    - os
+    - sys
+    - time
+    - argparse
+    - subprocess
+    - concurrent.futures
+    - exiftool
+    - journal
+    - metrics
+    - ImageMagick (convert command)
+    - exiftool (command-line tool)
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 2.3
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import concurrent.futures
+
+from exiftool import DEFAULT_POOL_SIZE, ExifToolPool
+from journal import Journal
+from metrics import Metrics
+
+JPEG_EXTENSIONS = ('.jpg', '.jpeg')
+RESIZE_GEOMETRY = '4000x3000'
+JOURNAL_NAME = 'heic.log.csv'
+
+
+def find_jpeg_images(input_dir):
+    for root, dirs, files in os.walk(input_dir):
+        for filename in files:
+            if os.path.splitext(filename)[1].lower() in JPEG_EXTENSIONS:
+                yield os.path.join(root, filename)
+
+
+def convert_image(jpg_path, exiftool):
+    """
+    Convert one JPEG image to HEIC and return (heic_path, original_size, converted_size).
+    """
+    heic_path = os.path.splitext(jpg_path)[0] + '.heic'
+    subprocess.run(['convert', jpg_path, '-resize', RESIZE_GEOMETRY, heic_path],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    exiftool.copy_tags(jpg_path, heic_path)
+
+    original_stat = os.stat(jpg_path)
+    os.utime(heic_path, (original_stat.st_atime, original_stat.st_mtime))
+    return heic_path, original_stat.st_size, os.path.getsize(heic_path)
+
+
+def convert_images(input_dir, workers=None, metrics=None):
+    """
+    Convert every JPEG image under input_dir that is not in the journal yet. Returns the list of failed images.
+    Conversion times and sizes are recorded in metrics as stage 'convert'.
+    """
+    workers = workers or os.cpu_count() or 1
+    metrics = metrics if metrics is not None else Metrics('heif_converter')
+    failures = []
+    original_total_size = 0
+    converted_total_size = 0
+
+    def loaded(key, values):
+        nonlocal original_total_size, converted_total_size
+        original_total_size += int(values[0])
+        converted_total_size += int(values[1])
+
+    # Keyed by path alone, like the journals written by convert_to_heif.sh.
+    with Journal(os.path.join(input_dir, JOURNAL_NAME), loaded=loaded) as journal, \
+            ExifToolPool(min(workers, DEFAULT_POOL_SIZE)) as exiftool:
+
+        pending = [jpg_path for jpg_path in find_jpeg_images(input_dir) if jpg_path not in journal]
+        print(f"Skipping {len(journal)} already processed images, {len(pending)} to convert")
+        metrics.set_total(len(pending))
+        metrics.start(('convert', 'failed'))
+
+        def convert(jpg_path):
+            start = time.perf_counter()
+            result = convert_image(jpg_path, exiftool)
+            metrics.record('convert', time.perf_counter() - start, size=result[1])
+            return result
+
+        def finish(future, jpg_path):
+            nonlocal original_total_size, converted_total_size
+            try:
+                heic_path, original_size, converted_size = future.result()
+            except Exception as e:
+                failures.append(jpg_path)
+                metrics.record('failed')
+                print(f"Error occurred during image conversion: {jpg_path}: {e}")
+                return
+            journal.record(jpg_path, original_size, converted_size)
+            original_total_size += original_size
+            converted_total_size += converted_size
+            print(f"Converted {jpg_path} ({human_readable_size(original_size)} -> {human_readable_size(converted_size)})")
+
+        # Keep a bounded number of images in flight instead of one future per image.
+        in_flight = {}
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            for count, jpg_path in enumerate(pending, 1):
+                if len(in_flight) >= 2 * workers:
+                    done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        finish(future, in_flight.pop(future))
+                print(f"Processing image {count} of {len(pending)}: {jpg_path}")
+                in_flight[executor.submit(convert, jpg_path)] = jpg_path
+            for future in concurrent.futures.as_completed(in_flight):
+                finish(future, in_flight[future])
+
+        metrics.stop()
+
+    metrics.extra.update(original_size=original_total_size, converted_size=converted_total_size)
+    print("Conversion completed!")
+    print(f"Total original size: {human_readable_size(original_total_size)}")
+    print(f"Total converted size: {human_readable_size(converted_total_size)}")
+    print(f"Space saved: {human_readable_size(original_total_size - converted_total_size)}")
+    if failures:
+        print(f"Failed to convert {len(failures)} images")
+    return failures
+
+
+def human_readable_size(size, decimal_places=2):
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if abs(size) < 1024.0:
+            break
+        size /= 1024.0
+    return f"{size:.{decimal_places}f} {unit}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert JPEG images to HEIC format.')
+    parser.add_argument('input_dir', help='Path to the directory containing the JPEG images')
+    parser.add_argument('--workers', type=int, help='Number of images converted at the same time')
+    parser.add_argument('--progress', action='store_true', help='Print a progress line with the throughput and ETA')
+    parser.add_argument('--report', help='Write a JSON report of the run to this file')
+    args = parser.parse_args()
+    metrics = Metrics('heif_converter', show_progress=args.progress)
+    failures = convert_images(args.input_dir, args.workers, metrics)
+    if args.report:
+        metrics.write_report(args.report)
+    if failures:
+        sys.exit(1)
@@ -1,7 +1,8 @@
 """
 
-This script organizes photos in a specified directory and its subdirectories. It checks for JPEG photos that have a
-corresponding HEIF photo file and performs the following actions:
+This script organizes photos in a specified directory and its subdirectories. It checks for JPEG (".jpg") photos that
+have a corresponding ".heif" photo file, matched case-insensitively from the directory listing, and performs the
+following actions:
 
 1. Checks if the HEIF file size is smaller than the JPEG file size. If it is, the HEIF file is removed.
 2. Checks if the HEIF file size is larger than the JPEG file size. If it is, the JPEG file is removed.
@@ -9,52 +10,68 @@ corresponding HEIF photo file and performs the following actions:
 4. Calculates and displays the total count and space saved.
 
 Usage:
-    python heif_organizer.py <dir_path>
+    python heif_organizer.py <dir_path> [--plan PLAN_FILE] [--io-concurrency N]
 
 Arguments:
     dir_path (str): Path to the directory containing the photos.
 
+Options:
+    --plan: Write the operations to this plan file instead of applying them (see planner.py).
+    --io-concurrency: Read directories and stat files with this many concurrent operations (see async_io.py). Use on
+                      network shares. Defaults to 0, a sequential walk.
+
 Dependencies:
-    - os
-    - sys
+    - argparse
+    - async_io
+    - pairing
+    - planner
 
 Author: OpenAI
 Date: May 15, 2023
-Version: 1.1
+Version: 1.5
 """
 
-import os
-import sys
+import argparse
+from collections import Counter
+
+from async_io import walk_tree
+from pairing import HEIF_EXTENSIONS, JPEG_EXTENSIONS, find_pairs
+from planner import Plan
+
 
+def organize_photos(dir_path, plan=None, io_concurrency=0):
+    totals = Counter()
+    for directory in walk_tree(dir_path, plan, io_concurrency):
+        totals.update(organize_photos_in_directory(directory))
+    print_summary(totals)
 
-def organize_photos(dir_path):
-    total_count = 0
-    total_space_saved = 0
 
-    for root, dirs, files in os.walk(dir_path):
-        for filename in files:
-            if filename.lower().endswith(".jpg"):
-                jpg_path = os.path.join(root, filename)
-                heif_path = os.path.join(root, f"{os.path.splitext(filename)[0]}.heif")
+def organize_photos_in_directory(directory):
+    """
+    Process the JPEG/HEIF pairs of one walker.Directory listing and return a Counter with 'count' and 'space_saved'.
+    """
+    totals = Counter()
+    for filename, heif_filename in find_pairs(directory.file_names(), JPEG_EXTENSIONS, HEIF_EXTENSIONS):
+        jpg_size = directory.size(filename)
+        heif_size = directory.size(heif_filename)
 
-                if os.path.isfile(heif_path):
-                    jpg_size = os.path.getsize(jpg_path)
-                    heif_size = os.path.getsize(heif_path)
+        if heif_size < jpg_size:
+            directory.remove(heif_filename)
+            space_saved = 0  # No space saved when JPG file is kept
+            print(f"Deleted {directory.join(heif_filename)} (Space Saved: {human_readable_size(space_saved)})")
+        elif heif_size > jpg_size:
+            directory.remove(filename)
+            space_saved = heif_size - jpg_size
+            totals['space_saved'] += space_saved
+            print(f"Deleted {directory.join(filename)} (Space Saved: {human_readable_size(space_saved)})")
 
-                    if heif_size < jpg_size:
-                        os.remove(heif_path)
-                        space_saved = 0  # No space saved when JPG file is kept
-                        print(f"Deleted {heif_path} (Space Saved: {human_readable_size(space_saved)})")
-                    elif heif_size > jpg_size:
-                        os.remove(jpg_path)
-                        space_saved = heif_size - jpg_size
-                        total_space_saved += space_saved
-                        print(f"Deleted {jpg_path} (Space Saved: {human_readable_size(space_saved)})")
+        totals['count'] += 1
+    return totals
 
-                    total_count += 1
 
-    print(f"Total Photos Processed: {total_count}")
-    print(f"Total Space Saved: {human_readable_size(total_space_saved)}")
+def print_summary(totals):
+    print(f"Total Photos Processed: {totals['count']}")
+    print(f"Total Space Saved: {human_readable_size(totals['space_saved'])}")
 
 
 def human_readable_size(size, decimal_places=2):
@@ -66,8 +83,13 @@ def human_readable_size(size, decimal_places=2):
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print(f"Usage: python {sys.argv[0]} <dir_path>")
-        sys.exit(1)
-    dir_path = sys.argv[1]
-    organize_photos(dir_path)
+    parser = argparse.ArgumentParser(description='Keep the larger file of each JPEG/HEIF pair and delete the smaller one.')
+    parser.add_argument('dir_path', help='Path to the directory containing the photos')
+    parser.add_argument('--plan', help='Write the operations to this plan file instead of applying them')
+    parser.add_argument('--io-concurrency', type=int, default=0,
+                        help='Read directories and stat files with this many concurrent operations')
+    args = parser.parse_args()
+    plan = Plan() if args.plan else None
+    organize_photos(args.dir_path, plan, args.io_concurrency)
+    if plan is not None:
+        plan.save(args.plan)
@@ -0,0 +1,204 @@
+"""
+io_controller.py
+
+This module tunes the number of concurrent copies at run time instead of relying on a fixed number of copy workers.
+The best number depends on the storage: a spinning disk or a USB 2.0 card reader copies fastest with one or two files
+at a time, since more make it seek between files, while an NVMe drive needs many copies in flight to reach its
+bandwidth. An IOController gives every device its own concurrency limit and adjusts it by hill climbing:
+
+- Every copy holds a slot on the device of its source and, if it is another one, on the device of its destination,
+  and reports its duration and size to both when it is done.
+- Every adjustment window (at least interval seconds and as many copies as the limit) the throughput of the device
+  and the latency of its copies per MB are compared with the previous window. Each file counts as FILE_COST bytes of
+  extra work for its open, create and metadata writes, so runs of small files are measured too.
+- If the throughput rose, the limit keeps moving in the same direction; if it fell, the direction is reversed; if it
+  stayed flat while the latency rose, the extra copies only queue at the device and the limit is lowered. The limit
+  therefore settles around the smallest number of copies that reaches the bandwidth of the device.
+- A window in which the limit was never reached says nothing about the device, since the copies were waiting for
+  work rather than for the device, so it leaves the limit unchanged.
+
+The limit of a device stays between 1 and max_workers, or the maximum given for that device in device_limits. When
+source and destination are on different disks, a copy must fit under the limits of both, so the slower disk sets the
+pace and neither is overloaded. Slots are always taken in device order, so two copies can never wait on each other.
+
+Usage:
+    controller = IOController(max_workers=32, metrics=metrics)
+    with controller.slot((source_device, destination_device), size):
+        ...
+
+Dependencies:
+    - os
+    - time
+    - threading
+    - contextlib
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+DEFAULT_INITIAL = 2
+DEFAULT_INTERVAL = 2.0
+# Relative change of throughput or latency between two windows that is not noise.
+TOLERANCE = 0.1
+# Each adjustment moves the limit by this fraction of it, and by at least 1.
+STEP = 0.25
+FILE_COST = 64 * 1024
+
+
+def device_of(path):
+    """
+    Return the device of path, or of its nearest existing ancestor if it does not exist yet.
+    """
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except FileNotFoundError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                raise
+            path = parent
+
+
+def device_name(device):
+    return f"{os.major(device)}:{os.minor(device)}"
+
+
+class DeviceLimit:
+    """
+    Adaptive concurrency limit of one device.
+    """
+
+    def __init__(self, device, initial, maximum, interval):
+        self.device = device
+        self.maximum = maximum
+        self.limit = max(1, min(initial, maximum))
+        self.interval = interval
+        self.condition = threading.Condition()
+        self.active = 0
+        self.direction = 1
+        self.previous = None
+        self.adjustments = 0
+        self.throughput = None
+        self._reset(time.monotonic())
+
+    def _reset(self, now):
+        self.window_start = now
+        self.window_seconds = 0.0
+        self.window_work = 0
+        self.window_count = 0
+        self.window_full = False
+
+    def acquire(self):
+        with self.condition:
+            if self.active >= self.limit:
+                self.window_full = True
+                self.condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+            if self.active >= self.limit:
+                self.window_full = True
+
+    def release(self, seconds=None, size=0):
+        """
+        Free a slot. seconds and size describe the copy that held it, None if it failed and must not be measured.
+        """
+        with self.condition:
+            self.active -= 1
+            if seconds is not None:
+                self.window_seconds += seconds
+                self.window_work += size + FILE_COST
+                self.window_count += 1
+                now = time.monotonic()
+                if now - self.window_start >= self.interval and self.window_count >= self.limit:
+                    self._adjust(now)
+            self.condition.notify_all()
+
+    def _adjust(self, now):
+        throughput = self.window_work / (now - self.window_start)
+        latency = self.window_seconds / self.window_work
+        full = self.window_full
+        self._reset(now)
+        if not full:
+            self.previous = None
+            return
+        self.throughput = throughput
+        if self.previous is not None:
+            previous_throughput, previous_latency = self.previous
+            if throughput < previous_throughput * (1 - TOLERANCE):
+                self.direction = -self.direction
+            elif throughput <= previous_throughput * (1 + TOLERANCE) and latency > previous_latency * (1 + TOLERANCE):
+                self.direction = -1
+        self.previous = (throughput, latency)
+        limit = max(1, min(self.limit + self.direction * max(1, int(self.limit * STEP)), self.maximum))
+        if limit == self.limit:
+            # At a bound: probe the other way next time, in case the device got faster or slower.
+            self.direction = -self.direction
+            return
+        self.limit = limit
+        self.adjustments += 1
+
+    def as_dict(self):
+        return {
+            'limit': self.limit,
+            'maximum': self.maximum,
+            'adjustments': self.adjustments,
+            'mb_per_second': round(self.throughput / (1024 * 1024), 3) if self.throughput is not None else None,
+        }
+
+
+class IOController:
+    """
+    Thread-safe set of adaptive per-device concurrency limits. device_limits maps devices to their maximum number
+    of concurrent copies, overriding max_workers. The limit of each device is watched as gauge "io_limit_<device>"
+    in metrics, if given.
+    """
+
+    def __init__(self, max_workers, initial=DEFAULT_INITIAL, device_limits=None, interval=DEFAULT_INTERVAL,
+                 metrics=None):
+        self.max_workers = max_workers
+        self.initial = initial
+        self.device_limits = device_limits or {}
+        self.interval = interval
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.limits = {}
+
+    def limit_for(self, device):
+        with self.lock:
+            limit = self.limits.get(device)
+            if limit is None:
+                limit = self.limits[device] = DeviceLimit(device, self.initial,
+                                                          self.device_limits.get(device, self.max_workers),
+                                                          self.interval)
+                if self.metrics is not None:
+                    self.metrics.watch(f"io_limit_{device_name(device)}", lambda: limit.limit)
+            return limit
+
+    @contextmanager
+    def slot(self, devices, size=0):
+        """
+        Hold a slot on each of devices for the body, and measure it as a copy of size bytes if it does not raise.
+        """
+        limits = [self.limit_for(device) for device in sorted(set(devices))]
+        acquired = []
+        seconds = None
+        try:
+            for limit in limits:
+                limit.acquire()
+                acquired.append(limit)
+            start = time.perf_counter()
+            yield
+            seconds = time.perf_counter() - start
+        finally:
+            for limit in reversed(acquired):
+                limit.release(seconds, size)
+
+    def report(self):
+        with self.lock:
+            return {device_name(device): limit.as_dict() for device, limit in self.limits.items()}
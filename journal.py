@@ -0,0 +1,139 @@
+"""
+journal.py
+
+This module keeps an append-only journal of completed work so long-running scripts can be resumed. Each line is a CSV
+record whose first fields are the key (usually the source path) and the remaining fields are free-form values such as
+file sizes. On start-up the keys are loaded into an in-memory index, so checking whether a file was already processed
+is a set lookup and no record is ever rewritten.
+
+Keys are either a path alone or, with key_fields=3, a path with the size and modification time of the file (see
+stat_key), so a file that was replaced after it was processed is processed again. The index holds a 64-bit hash of
+each key instead of the key itself, a few dozen bytes per record, so journals with millions of records load in
+seconds and stay small in memory. Two keys sharing a hash is possible but vanishingly unlikely at that scale.
+
+Every record is flushed to the operating system as it is written, so it survives the script being killed. Records are
+fsync'ed in batches, every sync_every records or sync_interval seconds, so a crash of the whole machine loses at most
+the last batch, whose work is simply done again. A record cut short by a crash is ignored.
+
+Usage:
+    with Journal(journal_path, key_fields=3) as journal:
+        key = stat_key(file_path, os.stat(file_path))
+        if key not in journal:
+            ...
+            journal.record(key, original_size, converted_size)
+
+Dependencies:
+    - os
+    - csv
+    - time
+    - threading
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 2.0
+"""
+
+import os
+import csv
+import time
+import threading
+
+DEFAULT_SYNC_EVERY = 1000
+DEFAULT_SYNC_INTERVAL = 5.0
+
+
+def stat_key(file_path, stat_result):
+    """
+    Return the key of file_path as described by stat_result, for a journal with key_fields=3.
+    """
+    return file_path, stat_result.st_size, stat_result.st_mtime_ns
+
+
+def key_hash(fields):
+    # The hashes only live in memory, so the per-process hash of the string fields is enough.
+    return hash(tuple(str(field) for field in fields))
+
+
+class Journal:
+    """
+    Append-only journal of completed work keyed by the first key_fields fields of each record. Safe to share between
+    threads. loaded(key, values), if given, is called for every record read at start-up, as lists of strings.
+    """
+
+    def __init__(self, journal_path, key_fields=1, loaded=None, sync_every=DEFAULT_SYNC_EVERY,
+                 sync_interval=DEFAULT_SYNC_INTERVAL):
+        self.journal_path = journal_path
+        self.key_fields = key_fields
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.keys = set()
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+        complete = True
+        if os.path.exists(journal_path) and os.path.getsize(journal_path):
+            with open(journal_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                complete = f.read(1) == b'\n'
+            with open(journal_path, newline='') as f:
+                rows = csv.reader(f)
+                row = next(rows, None)
+                for next_row in rows:
+                    self._load(row, loaded)
+                    row = next_row
+                if complete:
+                    self._load(row, loaded)
+        self.file = open(journal_path, 'a', newline='')
+        if not complete:
+            # Terminate a record cut short by a crash, so the next record starts on a line of its own.
+            self.file.write('\n')
+        self.writer = csv.writer(self.file)
+
+    def _load(self, row, loaded):
+        if row and len(row) >= self.key_fields:
+            self.keys.add(key_hash(row[:self.key_fields]))
+            if loaded is not None:
+                loaded(row[:self.key_fields], row[self.key_fields:])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _fields(self, key):
+        fields = (key,) if self.key_fields == 1 else tuple(key)
+        if len(fields) != self.key_fields:
+            raise ValueError(f"journal key must have {self.key_fields} fields")
+        return fields
+
+    def __contains__(self, key):
+        return key_hash(self._fields(key)) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def record(self, key, *values):
+        """
+        Append a record for key. The record is flushed to the operating system before returning.
+        """
+        fields = self._fields(key)
+        with self.lock:
+            self.writer.writerow(list(fields) + [str(value) for value in values])
+            self.file.flush()
+            self.keys.add(key_hash(fields))
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every or time.monotonic() - self.synced_at >= self.sync_interval:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+                self._sync()
+                self.file.close()
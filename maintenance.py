@@ -0,0 +1,135 @@
+"""
+maintenance.py
+
+This script runs the cleanup passes of the other scripts over a directory tree in a single traversal. Instead of every
+script walking the tree on its own, the tree is read once with os.scandir (see walker.py) and each pass works on the
+same in-memory listing of every directory, sharing the cached stat results. On a large network share this turns five
+cold metadata scans into one.
+
+The passes run in this order for each directory, so each pass sees the changes made by the previous ones:
+
+1. nef_jpg_deleter: deletes NEF files that have a JPEG file.
+2. heif_organizer: keeps the larger file of each JPEG/HEIF pair and deletes the smaller one.
+3. converted_video_organizer: replaces originals by their smaller "-converted.mp4" version.
+4. video_extension_changer: renames videos to ".mp4".
+5. created_date_updater: sets the created date of ".mp4" files to their modified date.
+
+Other passes can be added with register_pass().
+
+Usage:
+    python maintenance.py <dir_path> [--passes NAME [NAME ...]] [--plan PLAN_FILE] [--io-concurrency N]
+                                       [--progress] [--report FILE]
+
+Arguments:
+    dir_path (str): Path to the directory to clean up.
+
+Options:
+    --passes: Names of the passes to run, in the default order. Defaults to all passes.
+    --plan: Write the operations of all passes to this plan file instead of applying them (see planner.py).
+    --io-concurrency: Read directories and stat files with this many concurrent operations (see async_io.py). Use on
+                      network shares. Defaults to 0, a sequential walk.
+    --progress: Print a progress line with the throughput and ETA (see metrics.py).
+    --report: Write a JSON report of the run, with per-stage counts, throughput and latency histograms, to this file.
+
+Dependencies:
+    - time
+    - argparse
+    - collections
+    - async_io
+    - planner
+    - metrics
+    - nef_jpg_deleter
+    - heif_organizer
+    - converted_video_organizer
+    - video_extension_changer
+    - created_date_updater
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.3
+"""
+
+import time
+import argparse
+from collections import Counter
+
+import converted_video_organizer
+import created_date_updater
+import heif_organizer
+import nef_jpg_deleter
+import video_extension_changer
+from async_io import walk_tree
+from metrics import Metrics
+from planner import Plan
+
+# Pass name -> function taking a walker.Directory and returning a Counter of what it did.
+PASSES = {}
+
+
+def register_pass(name, process_directory):
+    """
+    Register a cleanup pass. Passes run in registration order.
+    """
+    PASSES[name] = process_directory
+
+
+register_pass('nef_jpg_deleter', nef_jpg_deleter.delete_nef_with_jpg_in_directory)
+register_pass('heif_organizer', heif_organizer.organize_photos_in_directory)
+register_pass('converted_video_organizer', converted_video_organizer.organize_converted_videos_in_directory)
+register_pass('video_extension_changer', video_extension_changer.change_video_extensions_in_directory)
+register_pass('created_date_updater', created_date_updater.update_created_date_in_directory)
+
+
+def run_passes(dir_path, pass_names=None, plan=None, io_concurrency=0, metrics=None):
+    """
+    Run the given passes (all registered passes by default) over dir_path in one traversal.
+    Returns a dict of pass name -> Counter with the totals of that pass. If plan is given, the passes record their
+    operations in it instead of applying them. If io_concurrency is non-zero, the tree is read with that many concurrent
+    operations (see async_io.py). The time spent reading directories and in each pass is recorded in metrics, as
+    stages 'walk' and 'pass.<name>', with the files each of them looked at.
+    """
+    pass_names = [name for name in PASSES if pass_names is None or name in pass_names]
+    totals = {name: Counter() for name in pass_names}
+    metrics = metrics if metrics is not None else Metrics('maintenance')
+    metrics.start(('walk',))
+    start = time.perf_counter()
+    for directory in walk_tree(dir_path, plan, io_concurrency):
+        metrics.record('walk', time.perf_counter() - start, count=len(directory.files))
+        for name in pass_names:
+            start = time.perf_counter()
+            file_count = len(directory.files)
+            try:
+                totals[name].update(PASSES[name](directory))
+            except OSError as e:
+                totals[name]['errors'] += 1
+                print(f"Failed to run {name} in {directory.path}: {e}")
+            metrics.record(f"pass.{name}", time.perf_counter() - start, count=file_count)
+        start = time.perf_counter()
+    metrics.stop()
+    metrics.extra['totals'] = {name: dict(counter) for name, counter in totals.items()}
+    return totals
+
+
+def print_summary(totals):
+    for name, counter in totals.items():
+        details = ', '.join(f"{key}={value}" for key, value in sorted(counter.items())) or 'nothing to do'
+        print(f"{name}: {details}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run all cleanup passes over a directory tree in one traversal.')
+    parser.add_argument('dir_path', help='Path to the directory to clean up')
+    parser.add_argument('--passes', nargs='+', choices=list(PASSES), help='Names of the passes to run')
+    parser.add_argument('--plan', help='Write the operations to this plan file instead of applying them')
+    parser.add_argument('--io-concurrency', type=int, default=0,
+                        help='Read directories and stat files with this many concurrent operations')
+    parser.add_argument('--progress', action='store_true', help='Print a progress line with the throughput and ETA')
+    parser.add_argument('--report', help='Write a JSON report of the run to this file')
+    args = parser.parse_args()
+    plan = Plan() if args.plan else None
+    metrics = Metrics('maintenance', show_progress=args.progress)
+    print_summary(run_passes(args.dir_path, args.passes, plan, args.io_concurrency, metrics))
+    if args.report:
+        metrics.write_report(args.report)
+    if plan is not None:
+        plan.save(args.plan)
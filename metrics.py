@@ -0,0 +1,280 @@
+"""
+metrics.py
+
+This module is the instrumentation shared by the scripts. A Metrics object collects, for each stage of a run (walk,
+stat, metadata, copy, convert, each cleanup pass, ...):
+
+- the number of files and bytes processed, and from them files/s and MB/s over the whole run,
+- the time spent in the stage, summed over all threads ("busy" seconds). Busy seconds divided by the run time is the
+  average number of workers occupied by the stage, so the stage with the highest value is the bottleneck,
+- a latency histogram with fixed millisecond buckets, from which p50/p95/p99 are estimated.
+
+Queue depths and other gauges are sampled every interval by a background thread, which can also print a live
+progress line with the rate of the files done and an ETA once the total number of files is known. At the end of the
+run the report is written as JSON, so runs can be compared on a dashboard.
+
+Usage:
+    metrics = Metrics('organizer', show_progress=True)
+    metrics.watch('copy_queue', copy_queue.qsize)
+    metrics.start(('copy', 'skipped'))
+    with metrics.time('copy', size):
+        ...
+    metrics.stop()
+    metrics.write_report('report.json')
+
+Dependencies:
+    - sys
+    - json
+    - time
+    - threading
+    - contextlib
+    - datetime
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Upper bounds of the latency histogram buckets, in milliseconds. A last bucket holds everything slower.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+DEFAULT_INTERVAL = 1.0
+
+
+class StageStats:
+    """
+    Counters and latency histogram of one stage.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.busy_seconds = 0.0
+        self.samples = 0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, seconds, count, size):
+        self.count += count
+        self.bytes += size
+        if seconds is None:
+            return
+        self.busy_seconds += seconds
+        self.samples += 1
+        self.max_seconds = max(self.max_seconds, seconds)
+        milliseconds = seconds * 1000
+        self.buckets[next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= bound),
+                          len(LATENCY_BUCKETS_MS))] += 1
+
+    def percentile(self, fraction):
+        """
+        Return the upper bound in milliseconds of the bucket holding the given fraction of the samples.
+        """
+        if not self.samples:
+            return None
+        threshold = fraction * self.samples
+        seen = 0
+        for bound, samples in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += samples
+            if seen >= threshold:
+                return bound
+        return round(self.max_seconds * 1000, 3)
+
+    def as_dict(self, elapsed):
+        histogram = {f"<={bound}": samples for bound, samples in zip(LATENCY_BUCKETS_MS, self.buckets)}
+        histogram[f">{LATENCY_BUCKETS_MS[-1]}"] = self.buckets[-1]
+        return {
+            'count': self.count,
+            'bytes': self.bytes,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'busy_workers': round(self.busy_seconds / elapsed, 3) if elapsed else None,
+            'files_per_second': round(self.count / elapsed, 3) if elapsed else None,
+            'mb_per_second': round(self.bytes / elapsed / (1024 * 1024), 3) if elapsed else None,
+            'latency_ms': {
+                'mean': round(self.busy_seconds / self.samples * 1000, 3) if self.samples else None,
+                'max': round(self.max_seconds * 1000, 3),
+                'p50': self.percentile(0.50),
+                'p95': self.percentile(0.95),
+                'p99': self.percentile(0.99),
+            },
+            'histogram_ms': histogram,
+        }
+
+
+class GaugeStats:
+    def __init__(self, read):
+        self.read = read
+        self.last = None
+        self.max = None
+        self.total = 0
+        self.samples = 0
+
+    def sample(self):
+        value = self.read()
+        self.last = value
+        self.max = value if self.max is None else max(self.max, value)
+        self.total += value
+        self.samples += 1
+
+    def as_dict(self):
+        return {'last': self.last, 'max': self.max,
+                'mean': round(self.total / self.samples, 3) if self.samples else None}
+
+
+class Metrics:
+    """
+    Thread-safe collection of stage counters and gauges for one run.
+    """
+
+    def __init__(self, name, show_progress=False, interval=DEFAULT_INTERVAL, stream=None):
+        self.name = name
+        self.show_progress = show_progress
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stderr
+        self.started_at = datetime.now()
+        self.started = time.monotonic()
+        self.stopped = None
+        self.stages = {}
+        self.gauges = {}
+        self.extra = {}
+        self.total = None
+        self.progress_stages = ()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def record(self, stage, seconds=None, count=1, size=0):
+        """
+        Record count files of size bytes for stage. seconds is the time they took, or None if it was not measured.
+        """
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats()
+            stats.add(seconds, count, size)
+
+    @contextmanager
+    def time(self, stage, size=0):
+        """
+        Time the body and record it as one file of size bytes for stage if it does not raise.
+        """
+        start = time.perf_counter()
+        yield
+        self.record(stage, time.perf_counter() - start, size=size)
+
+    def watch(self, name, read):
+        """
+        Sample read() as gauge name every interval, for example the qsize of a queue. Gauges can be added while the
+        metrics are running.
+        """
+        with self.lock:
+            self.gauges[name] = GaugeStats(read)
+
+    def set_total(self, total):
+        """
+        Set the number of files the progress stages will process together, which enables the ETA.
+        """
+        self.total = total
+
+    def elapsed(self):
+        return (self.stopped if self.stopped is not None else time.monotonic()) - self.started
+
+    def gauge_items(self):
+        with self.lock:
+            return list(self.gauges.items())
+
+    def sample_gauges(self):
+        for _, gauge in self.gauge_items():
+            try:
+                gauge.sample()
+            except Exception:
+                pass
+
+    def count(self, stage):
+        stats = self.stages.get(stage)
+        return stats.count if stats is not None else 0
+
+    def progress_line(self):
+        elapsed = self.elapsed()
+        with self.lock:
+            stages = [self.stages[stage] for stage in self.progress_stages if stage in self.stages]
+        done = sum(stats.count for stats in stages)
+        size = sum(stats.bytes for stats in stages)
+        rate = done / elapsed if elapsed else 0
+        if self.total is not None and rate:
+            eta = format_duration(max(self.total - done, 0) / rate)
+        else:
+            eta = '?'
+        gauges = ' '.join(f"{name}={gauge.last}" for name, gauge in self.gauge_items())
+        return (f"[{self.name}] {done}{'' if self.total is None else f'/{self.total}'} files, {rate:.1f} files/s, "
+                f"{size / elapsed / (1024 * 1024) if elapsed else 0:.1f} MB/s, "
+                f"elapsed {format_duration(elapsed)}, ETA {eta} {gauges}").rstrip()
+
+    def start(self, progress_stages=()):
+        """
+        Start sampling the gauges every interval. With show_progress, a progress line counting the files of
+        progress_stages is printed to the stream as well, rewritten in place when the stream is a terminal.
+        """
+        self.progress_stages = progress_stages
+        in_place = self.show_progress and self.stream.isatty()
+
+        def run():
+            while not self.stop_event.wait(self.interval):
+                self.sample_gauges()
+                if self.show_progress:
+                    self.stream.write(('\r' if in_place else '') + self.progress_line() + ('' if in_place else '\n'))
+                    self.stream.flush()
+            if in_place:
+                self.stream.write('\n')
+
+        self.thread = threading.Thread(target=run, name='metrics', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.stopped is None:
+            self.stopped = time.monotonic()
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.sample_gauges()
+
+    def report(self):
+        elapsed = self.elapsed()
+        with self.lock:
+            stages = {stage: stats.as_dict(elapsed) for stage, stats in self.stages.items()}
+        return {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'elapsed_seconds': round(elapsed, 3),
+            'stages': stages,
+            'gauges': {name: gauge.as_dict() for name, gauge in self.gauge_items()},
+            **self.extra,
+        }
+
+    def write_report(self, report_path):
+        with open(report_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Wrote run report to {report_path}")
+
+
+def timed_call(function, *args):
+    """
+    Call function(*args) and return (result, seconds). Module level so that it can run in a worker process.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
@@ -0,0 +1,264 @@
+"""
+near_duplicates.py
+
+This script finds images that look the same but are not byte-identical, which dedup.py cannot match: the 4K
+downscales written by resizer.py next to their originals, HEIC/JPEG pairs made by convert_to_heif.sh, re-encoded or
+re-tagged copies, and so on.
+
+Every image gets a 64-bit perceptual hash (a difference hash): it is decoded at a reduced size (JPEG images at a
+reduced DCT scale with `Image.draft()`, so a full-resolution decode is never needed), turned to grayscale, shrunk to
+9x8 pixels, and each bit records whether a pixel is brighter than its right neighbour. Images that look alike have
+hashes that differ in a few bits. Hashing runs in a pool of worker processes, a batch of paths per task.
+
+The hashes are kept in a NumPy uint64 array and near-duplicate pairs, with at most --distance differing bits, are
+found with multi-index hashing instead of comparing every pair: the 64 bits are split into m blocks, and two hashes
+within distance d must agree on at least one block up to d // m bits (pigeonhole principle), m being chosen from the
+number of images and d to minimize the work. For each block, the hashes are bucketed once by block value and every
+hash looks up its probes (its block value with up to d // m bits flipped) in one vectorised gather per probe. Only
+the candidates found this way are compared in full, so the work grows with the number of images rather than with its
+square. Images with identical hashes are merged before the search.
+
+Pairs are joined into clusters. In the report the largest file of each cluster comes first, since it is usually the
+original.
+
+HEIC/HEIF images are read when the optional pillow_heif package is installed.
+
+Usage:
+    python3 near_duplicates.py <dir_path> [--distance N] [--workers N]
+
+Arguments:
+    dir_path (str): Path to the directory to search for near-duplicates.
+
+Options:
+    --distance: Maximum number of differing hash bits between near-duplicates. Defaults to 4.
+    --workers: Number of worker processes. Defaults to the number of CPUs.
+
+Dependencies:
+    - PIL (Python Imaging Library)
+    - numpy
+    - pillow_heif (optional)
+    - os
+    - math
+    - argparse
+    - itertools
+    - concurrent.futures
+    - dedup
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import math
+import argparse
+import itertools
+import concurrent.futures
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from dedup import human_readable_size
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    pass
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.heic', '.heif', '.tif', '.tiff', '.bmp', '.gif', '.webp')
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+# JPEG images are decoded at the smallest DCT scale that is at least this large.
+DRAFT_SIZE = 64
+DEFAULT_DISTANCE = 4
+BATCH_SIZE = 64
+# Blocks up to this many bits are looked up in a table with one entry per block value.
+MAX_TABLE_BITS = 24
+
+
+def perceptual_hash(file_path):
+    """
+    Return the 64-bit difference hash of an image as an int.
+    """
+    with Image.open(file_path) as img:
+        img.draft('L', (DRAFT_SIZE, DRAFT_SIZE))
+        img = ImageOps.exif_transpose(img)
+        pixels = np.asarray(img.convert('L').resize((HASH_WIDTH, HASH_HEIGHT), Image.LANCZOS), dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hash_images(file_paths):
+    """
+    Return a list of (file_path, hash or None, error or None) for a batch of images. This is the unit of work
+    submitted to the process pool.
+    """
+    results = []
+    for file_path in file_paths:
+        try:
+            results.append((file_path, perceptual_hash(file_path), None))
+        except Exception as e:
+            results.append((file_path, None, str(e)))
+    return results
+
+
+def find_images(dir_path):
+    for root, dirs, files in os.walk(dir_path):
+        for file in files:
+            if os.path.splitext(file)[1].lower() in IMAGE_EXTENSIONS:
+                yield os.path.join(root, file)
+
+
+def compute_hashes(file_paths, workers=None):
+    """
+    Hash the images in a process pool and return (paths, hashes), hashes being a uint64 array aligned with paths.
+    Images that cannot be decoded are reported and left out.
+    """
+    workers = workers or os.cpu_count() or 1
+    batches = [file_paths[start:start + BATCH_SIZE] for start in range(0, len(file_paths), BATCH_SIZE)]
+    paths = []
+    hashes = []
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        for results in executor.map(hash_images, batches):
+            for file_path, image_hash, error in results:
+                if image_hash is None:
+                    print(f"Failed to hash {file_path}: {error}")
+                    continue
+                paths.append(file_path)
+                hashes.append(image_hash)
+    return paths, np.array(hashes, dtype=np.uint64)
+
+
+def popcount(values):
+    """
+    Return the number of set bits of each element of a uint64 array.
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def block_layout(count, distance):
+    """
+    Return the (shift, width) of each block for count distinct hashes. More blocks mean narrower block values, which
+    match more hashes by chance, but fewer probes per block; the number of blocks with the lowest estimated work,
+    probes times expected matches per probe, is used.
+    """
+    def widths(blocks):
+        return [64 // blocks + (1 if i < 64 % blocks else 0) for i in range(blocks)]
+
+    def cost(blocks):
+        width = min(widths(blocks))
+        probes = sum(math.comb(width, flipped) for flipped in range(distance // blocks + 1))
+        return blocks * probes * (1 + count / 2 ** width)
+
+    blocks = min(range(1, min(distance + 1, 16) + 1), key=cost)
+    block_widths = widths(blocks)
+    shifts = [sum(block_widths[i + 1:]) for i in range(blocks)]
+    return list(zip(shifts, block_widths))
+
+
+def near_pairs(hashes, distance):
+    """
+    Return the (i, j) index pairs, i < j, of the distinct hashes that differ in at most distance bits, as two arrays.
+    """
+    count = len(hashes)
+    layout = block_layout(count, distance)
+    radius = distance // len(layout)
+    found_i = []
+    found_j = []
+    indices = np.arange(count, dtype=np.int64)
+    for shift, width in layout:
+        keys = (hashes >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+        order = np.argsort(keys, kind='stable')
+        if width <= MAX_TABLE_BITS:
+            # Bucket table indexed by block value: a lookup is a gather instead of a binary search.
+            table_counts = np.bincount(keys.astype(np.intp), minlength=1 << width)
+            table_starts = np.cumsum(table_counts) - table_counts
+        else:
+            block_values, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        for flipped in range(radius + 1):
+            for bits in itertools.combinations(range(width), flipped):
+                probes = keys ^ np.uint64(sum(1 << bit for bit in bits))
+                if width <= MAX_TABLE_BITS:
+                    probes = probes.astype(np.intp)
+                    low = table_starts[probes]
+                    matches = table_counts[probes]
+                else:
+                    positions = np.minimum(np.searchsorted(block_values, probes), len(block_values) - 1)
+                    low = starts[positions]
+                    matches = np.where(block_values[positions] == probes, counts[positions], 0)
+                total = int(matches.sum())
+                if not total:
+                    continue
+                # Expand every hash into one row per candidate sharing the probed block value.
+                queries = np.repeat(indices, matches)
+                offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(matches) - matches, matches)
+                candidates = order[np.repeat(low, matches) + offsets]
+                keep = queries < candidates
+                queries = queries[keep]
+                candidates = candidates[keep]
+                keep = popcount(hashes[queries] ^ hashes[candidates]) <= distance
+                found_i.append(queries[keep])
+                found_j.append(candidates[keep])
+    if not found_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # The same pair can be found through several blocks.
+    pairs = np.unique(np.stack([np.concatenate(found_i), np.concatenate(found_j)], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def find_near_duplicates(paths, hashes, distance=DEFAULT_DISTANCE):
+    """
+    Cluster the images whose hashes differ in at most distance bits. Returns a list of clusters, each a list of at
+    least two paths with the largest file first.
+    """
+    if not len(paths):
+        return []
+    distinct, inverse = np.unique(hashes, return_inverse=True)
+    parent = list(range(len(distinct)))
+
+    def root(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for i, j in zip(*near_pairs(distinct, distance)):
+        root_i, root_j = root(int(i)), root(int(j))
+        if root_i != root_j:
+            parent[root_j] = root_i
+
+    clusters = {}
+    for path, hash_index in zip(paths, inverse.ravel()):
+        clusters.setdefault(root(int(hash_index)), []).append(path)
+    groups = [sorted(group, key=lambda path: (-os.path.getsize(path), path))
+              for group in clusters.values() if len(group) > 1]
+    return sorted(groups)
+
+
+def print_near_duplicate_report(groups):
+    total_size = 0
+    for keep_path, *similar_paths in groups:
+        print(f"{keep_path} ({human_readable_size(os.path.getsize(keep_path))})")
+        for similar_path in similar_paths:
+            size = os.path.getsize(similar_path)
+            total_size += size
+            print(f"    ~ {similar_path} ({human_readable_size(size)})")
+    print(f"Near-Duplicate Groups: {len(groups)}")
+    print(f"Near-Duplicate Files: {sum(len(group) - 1 for group in groups)}")
+    print(f"Near-Duplicate Size: {human_readable_size(total_size)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find images that look the same but are not byte-identical.')
+    parser.add_argument('dir_path', help='Path to the directory to search for near-duplicates')
+    parser.add_argument('--distance', type=int, default=DEFAULT_DISTANCE,
+                        help='Maximum number of differing hash bits between near-duplicates')
+    parser.add_argument('--workers', type=int, help='Number of worker processes')
+    args = parser.parse_args()
+
+    image_paths, image_hashes = compute_hashes(list(find_images(args.dir_path)), args.workers)
+    print(f"Hashed {len(image_paths)} images")
+    print_near_duplicate_report(find_near_duplicates(image_paths, image_hashes, args.distance))
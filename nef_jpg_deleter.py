@@ -3,41 +3,62 @@ nef_jpg_deleter.py
 
 This script deletes Nikon Electronic Format (NEF) raw image files if a corresponding JPEG file with the same name exists
 in a specified source folder and its subfolders. The script searches for NEF files and checks if a corresponding JPEG file
-exists by replacing the extension with '.jpg'.
+('.jpg', in any letter case) exists in the directory listing, without probing the filesystem per file.
 
 Usage:
-    python3 nef_jpg_deleter.py <source_folder>
+    python3 nef_jpg_deleter.py <source_folder> [--plan PLAN_FILE] [--io-concurrency N]
 
 Arguments:
     source_folder (str): Path to the source folder.
 
+Options:
+    --plan: Write the operations to this plan file instead of applying them (see planner.py).
+    --io-concurrency: Read directories and stat files with this many concurrent operations (see async_io.py). Use on
+                      network shares. Defaults to 0, a sequential walk.
+
 Dependencies:
-    - os
-    - sys
+    - argparse
+    - async_io
+    - pairing
+    - planner
 
 Author: K H M BURHAN UDDIN
 Date: May 12, 2023 
-Version: 1.0
+Version: 1.4
 """
 
-import os
-import sys
+import argparse
+from collections import Counter
+
+from async_io import walk_tree
+from pairing import JPEG_EXTENSIONS, NEF_EXTENSIONS, find_pairs
+from planner import Plan
+
+def delete_nef_with_jpg(source_folder, plan=None, io_concurrency=0):
+    for directory in walk_tree(source_folder, plan, io_concurrency):
+        delete_nef_with_jpg_in_directory(directory)
+
 
-def delete_nef_with_jpg(source_folder):
-    for root, dirs, files in os.walk(source_folder):
-        for file in files:
-            if file.lower().endswith('.nef'):
-                jpg_file = os.path.splitext(file)[0] + '.jpg'
-                jpg_path = os.path.join(root, jpg_file)
-                nef_path = os.path.join(root, file)
-                if os.path.exists(jpg_path):
-                    os.remove(nef_path)
-                    print(f"Deleted {nef_path}")
+def delete_nef_with_jpg_in_directory(directory):
+    """
+    Delete the NEF files of one walker.Directory listing that have a JPEG file. Returns a Counter with 'deleted'.
+    """
+    totals = Counter()
+    for file, jpg_file in find_pairs(directory.file_names(), NEF_EXTENSIONS, JPEG_EXTENSIONS):
+        directory.remove(file)
+        totals['deleted'] += 1
+        print(f"Deleted {directory.join(file)}")
+    return totals
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python3 resizer.py <source_folder>")
-        sys.exit(1)
-    source_folder = sys.argv[1]
-    delete_nef_with_jpg(source_folder)
+    parser = argparse.ArgumentParser(description='Delete NEF files that have a JPEG file with the same name.')
+    parser.add_argument('source_folder', help='Path to the source folder')
+    parser.add_argument('--plan', help='Write the operations to this plan file instead of applying them')
+    parser.add_argument('--io-concurrency', type=int, default=0,
+                        help='Read directories and stat files with this many concurrent operations')
+    args = parser.parse_args()
+    plan = Plan() if args.plan else None
+    delete_nef_with_jpg(args.source_folder, plan, args.io_concurrency)
+    if plan is not None:
+        plan.save(args.plan)
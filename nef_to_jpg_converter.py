@@ -4,37 +4,256 @@ nef_to_jpg_converter.py
 This script converts Nikon Electronic Format (NEF) raw image files to JPEG format in a specified source folder
 and its subfolders. It utilizes the 'convert' command-line tool from the ImageMagick software to perform the conversion.
 
+Files are converted in parallel by a pool of workers. In the default "fast" mode the full-size JPEG preview that the
+camera embeds in every NEF is extracted from the TIFF IFDs instead, which takes milliseconds instead of seconds of
+demosaicing; ImageMagick is only used when the preview is smaller than the raw image. In "full" mode every file is
+demosaiced with ImageMagick.
+
+The JPEG is written to a temporary file and verified before it replaces the destination, and the NEF file is deleted
+only after that, so a failed conversion never loses data. When exiftool is installed the metadata of the NEF file is
+copied to the JPEG, and the JPEG gets the modified date of the NEF file.
+
+Each conversion is recorded in an append-only journal ("nef.log.csv" in the source folder, see journal.py), keyed by
+the path, size and modification time of the NEF file, before the NEF file is deleted. A NEF file that is still there
+after an interrupted run but is in the journal already has its JPEG, so the next run only deletes it.
+
 Usage:
-    python nef_to_jpg_converter.py <source_folder>
+    python nef_to_jpg_converter.py <source_folder> [--mode {fast,full}] [--workers N] [--min-preview-ratio R]
+                                   [--progress] [--report FILE]
 
 Arguments:
     source_folder (str): Path to the source folder containing the NEF files.
 
+Options:
+    --mode: "fast" (default) uses the embedded preview when it is large enough, "full" always demosaics.
+    --workers: Number of files converted at the same time. Defaults to the number of CPUs.
+    --min-preview-ratio: Minimum width of the embedded preview relative to the raw image. Defaults to 0.9.
+    --progress: Print a progress line with the throughput and ETA (see metrics.py).
+    --report: Write a JSON report of the run, with per-stage counts, throughput and latency histograms, to this file.
+
 Dependencies:
     - argparse
     - os
+    - sys
+    - time
     - subprocess
+    - concurrent.futures
+    - tiff_ifd
+    - exiftool
+    - journal
+    - metrics
 
 Author: K H M BURHAN UDDIN
-Date: May 12, 2023 
-Version: 1.0
+Date: May 12, 2023
+Version: 1.2
 """
 
 import argparse
 import os
+import sys
+import time
 import subprocess
+import concurrent.futures
+
+from exiftool import DEFAULT_POOL_SIZE, ExifToolPool
+from journal import Journal, stat_key
+from metrics import Metrics
+from tiff_ifd import (TAG_IMAGE_WIDTH, TAG_JPEG_INTERCHANGE_FORMAT, TAG_JPEG_INTERCHANGE_FORMAT_LENGTH,
+                      TAG_NEW_SUBFILE_TYPE, TiffReader)
+
+CONVERSION_MODES = ('fast', 'full')
+DEFAULT_MIN_PREVIEW_RATIO = 0.9
+JOURNAL_NAME = 'nef.log.csv'
+
+# JPEG start-of-frame markers, which hold the image dimensions. 0xC4, 0xC8 and 0xCC are not frames.
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_HEADER_BYTES = 256 * 1024
+
+
+def jpeg_dimensions(data):
+    """
+    Return (width, height) from the start-of-frame segment of JPEG data, or None if it cannot be found.
+    """
+    if data[:2] != b'\xff\xd8':
+        return None
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        length = int.from_bytes(data[offset + 2:offset + 4], 'big')
+        if marker in JPEG_SOF_MARKERS and offset + 9 <= len(data):
+            height = int.from_bytes(data[offset + 5:offset + 7], 'big')
+            width = int.from_bytes(data[offset + 7:offset + 9], 'big')
+            return width, height
+        if marker == 0xDA:
+            return None
+        offset += 2 + length
+    return None
+
+
+def verify_jpeg(jpg_path):
+    """
+    Check that jpg_path is a complete JPEG image with non-zero dimensions.
+    """
+    with open(jpg_path, 'rb') as f:
+        header = f.read(JPEG_HEADER_BYTES)
+        f.seek(max(0, os.fstat(f.fileno()).st_size - 4096))
+        tail = f.read()
+    dimensions = jpeg_dimensions(header)
+    return (dimensions is not None and dimensions[0] > 0 and dimensions[1] > 0
+            and tail.rstrip(b'\x00').endswith(b'\xff\xd9'))
+
 
-def convert_nef_to_jpg(source_folder):
+def find_embedded_preview(nef_path):
+    """
+    Return (jpeg_data, preview_width, raw_width) for the largest JPEG preview embedded in nef_path, or None.
+    raw_width is 0 if the raw image dimensions are not recorded.
+    """
+    with open(nef_path, 'rb') as f:
+        tiff = TiffReader.from_file(f)
+        preview = None
+        raw_width = 0
+        for offset, entries in tiff.iter_ifds():
+            if TAG_JPEG_INTERCHANGE_FORMAT in entries and TAG_JPEG_INTERCHANGE_FORMAT_LENGTH in entries:
+                start, = tiff.values(entries[TAG_JPEG_INTERCHANGE_FORMAT])
+                length, = tiff.values(entries[TAG_JPEG_INTERCHANGE_FORMAT_LENGTH])
+                if preview is None or length > preview[1]:
+                    preview = (start, length)
+            elif TAG_IMAGE_WIDTH in entries and TAG_NEW_SUBFILE_TYPE in entries:
+                if tiff.values(entries[TAG_NEW_SUBFILE_TYPE])[0] == 0:
+                    raw_width = max(raw_width, tiff.values(entries[TAG_IMAGE_WIDTH])[0])
+        if preview is None:
+            return None
+        data = tiff.read(*preview)
+
+    dimensions = jpeg_dimensions(data)
+    if dimensions is None or not data.rstrip(b'\x00').endswith(b'\xff\xd9'):
+        return None
+    return data, dimensions[0], raw_width
+
+
+def convert_nef(nef_path, mode='fast', exiftool=None, min_preview_ratio=DEFAULT_MIN_PREVIEW_RATIO, journal=None):
+    """
+    Convert one NEF file to JPEG, then delete the NEF file. Returns (jpg_path, method) where method is 'preview' or
+    'convert'. The NEF file is kept if anything fails. If journal is given, the conversion is recorded in it before
+    the NEF file is deleted.
+    """
+    jpg_path = os.path.splitext(nef_path)[0] + '.jpg'
+    directory, filename = os.path.split(jpg_path)
+    temp_path = os.path.join(directory, f".{filename}.converting.jpg")
+    method = 'convert'
+    try:
+        if mode == 'fast':
+            try:
+                preview = find_embedded_preview(nef_path)
+            except (OSError, ValueError):
+                preview = None
+            if preview is not None and preview[2] and preview[1] >= min_preview_ratio * preview[2]:
+                with open(temp_path, 'wb') as f:
+                    f.write(preview[0])
+                method = 'preview'
+
+        if method == 'convert':
+            subprocess.run(['convert', nef_path, temp_path], check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if exiftool is not None:
+            exiftool.copy_tags(nef_path, temp_path)
+        if not verify_jpeg(temp_path):
+            raise ValueError(f"{method} produced an invalid JPEG")
+
+        nef_stat = os.stat(nef_path)
+        os.utime(temp_path, (nef_stat.st_atime, nef_stat.st_mtime))
+        os.replace(temp_path, jpg_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if journal is not None:
+        journal.record(stat_key(nef_path, nef_stat), os.path.getsize(jpg_path), method)
+    os.remove(nef_path)
+    return jpg_path, method
+
+
+def find_nef_files(source_folder):
     for root, _, files in os.walk(source_folder):
         for filename in files:
             if filename.lower().endswith('.nef'):
-                nef_path = os.path.join(root, filename)
-                jpg_path = os.path.splitext(nef_path)[0] + '.jpg'
-                subprocess.run(['convert', nef_path, jpg_path])
-                os.remove(nef_path)
+                yield os.path.join(root, filename)
+
+
+def convert_nef_to_jpg(source_folder, mode='fast', workers=None, min_preview_ratio=DEFAULT_MIN_PREVIEW_RATIO,
+                       metrics=None):
+    """
+    Convert every NEF file under source_folder. Returns the list of files that failed to convert.
+    Conversion times and NEF sizes are recorded in metrics, as stage 'preview' or 'convert' depending on the method.
+    NEF files converted by an earlier run, according to the journal, are only deleted and recorded as 'resumed'.
+    """
+    workers = workers or os.cpu_count() or 1
+    failures = []
+    exiftool = ExifToolPool(min(workers, DEFAULT_POOL_SIZE)) if ExifToolPool.available() else None
+    metrics = metrics if metrics is not None else Metrics('nef_to_jpg_converter')
+    nef_paths = list(find_nef_files(source_folder))
+    metrics.set_total(len(nef_paths))
+    metrics.start(('preview', 'convert', 'resumed', 'failed'))
+    journal = Journal(os.path.join(source_folder, JOURNAL_NAME), key_fields=3)
+
+    def convert(nef_path):
+        start = time.perf_counter()
+        nef_stat = os.stat(nef_path)
+        jpg_path = os.path.splitext(nef_path)[0] + '.jpg'
+        if stat_key(nef_path, nef_stat) in journal and os.path.exists(jpg_path):
+            # Converted by a run that stopped before deleting the NEF file.
+            os.remove(nef_path)
+            metrics.record('resumed')
+            return jpg_path, 'resumed'
+        jpg_path, method = convert_nef(nef_path, mode, exiftool, min_preview_ratio, journal)
+        metrics.record(method, time.perf_counter() - start, size=nef_stat.st_size)
+        return jpg_path, method
+
+    def finish(future, nef_path):
+        try:
+            jpg_path, method = future.result()
+        except Exception as e:
+            failures.append(nef_path)
+            metrics.record('failed')
+            print(f"Failed to convert {nef_path}: {e}")
+            return
+        print(f"Converted {nef_path} to {jpg_path} ({method})")
+
+    # Keep a bounded number of files in flight instead of one future per file.
+    in_flight = {}
+    try:
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            for nef_path in nef_paths:
+                if len(in_flight) >= 2 * workers:
+                    done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        finish(future, in_flight.pop(future))
+                in_flight[executor.submit(convert, nef_path)] = nef_path
+            for future in concurrent.futures.as_completed(in_flight):
+                finish(future, in_flight[future])
+    finally:
+        if exiftool is not None:
+            exiftool.close()
+        journal.close()
+        metrics.stop()
+    return failures
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('source_folder', help='Path to the source folder')
+    parser.add_argument('--mode', choices=CONVERSION_MODES, default='fast',
+                        help='Use the embedded preview when it is large enough (fast) or always demosaic (full)')
+    parser.add_argument('--workers', type=int, help='Number of files converted at the same time')
+    parser.add_argument('--min-preview-ratio', type=float, default=DEFAULT_MIN_PREVIEW_RATIO,
+                        help='Minimum width of the embedded preview relative to the raw image')
+    parser.add_argument('--progress', action='store_true', help='Print a progress line with the throughput and ETA')
+    parser.add_argument('--report', help='Write a JSON report of the run to this file')
     args = parser.parse_args()
-    convert_nef_to_jpg(args.source_folder)
+    metrics = Metrics('nef_to_jpg_converter', show_progress=args.progress)
+    failures = convert_nef_to_jpg(args.source_folder, args.mode, args.workers, args.min_preview_ratio, metrics)
+    if args.report:
+        metrics.write_report(args.report)
+    if failures:
+        sys.exit(1)
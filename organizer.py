@@ -5,72 +5,601 @@ This script organizes files in a source folder based on their creation date. It
 where files are sorted into year and date subdirectories according to their creation date. Files with allowed extensions
 are copied to the destination folders, while files with unsupported extensions are copied to an "unorganized" folder.
 It tries to set file modified and created date from exif data, if not available it use file meta data.
+Capture dates are read from the file headers with date_extractor.py (EXIF for photos and raw files, the
+QuickTime mvhd atom for videos), which reads only a few kilobytes per file.
 
-Uses multicore processing to speed up the processing.
+Uses multicore processing to speed up the processing. Files stream through a pipeline of three stages joined by
+bounded queues: a directory walker, a pool of metadata workers that read capture dates, and a pool of copy workers.
+Each pool has its own size, and the bounded queues apply backpressure, so memory stays flat whatever the size of the
+source tree. Failures are collected and reported at the end of the run instead of being lost.
+
+Capture date parsing is pure Python and bound by the GIL, so on fast storage adding metadata threads does not help.
+With --processes N the metadata stage sends batches of paths (--batch-size) to a pool of N worker processes instead,
+and only the (path, date) results come back, so throughput scales with the number of cores.
+
+--mode selects how files reach the destination (see transfer.py): "copy" (default) copies the bytes, using
+copy_file_range where the filesystem supports it; "move" and "hardlink" rename or link the file when source and
+destination are on the same device; "reflink" clones the file copy-on-write on btrfs/XFS. Every mode falls back to a
+regular copy when the faster operation is not available.
+
+--verify copies files with verified_copy.py instead: each file is streamed into a temporary file while its BLAKE2b
+checksum is computed, fsync'ed in batches and only then renamed to its final name, so an interrupted run never leaves
+a truncated file that looks organized. A name that is already taken by a different file gets a numbered name
+("<name>_1<ext>") instead of being overwritten. The checksums are written to a manifest beside the "_organized"
+folder, which "python3 verified_copy.py MANIFEST" verifies later without the source.
+
+--dedup finds files with identical content before anything is copied (see dedup.py): files are grouped by size, then
+by a hash of their first and last 64 KB, and only files that still collide are hashed in full. The first file of each
+group is organized as usual; the others are skipped ("skip"), hard linked to its destination ("hardlink"), or copied
+and listed in a report ("report"). This needs one extra stat-only pass over the source tree.
+
+Every organized file is recorded in a persistent scan index stored beside the "_organized" folder (see scan_index.py).
+Later runs skip files whose size, modification time and inode have not changed and whose destination still exists
+with the same size, so an incremental run costs two stats per file, and deleting the organized copies makes the next
+run copy them again. Use --no-index to process every file again.
+
+Capture dates are looked up in the date cache shared with the other scripts (see date_cache.py) before a file is
+opened. The cache is keyed on device, inode, size and modification time, so files that were already dated by any
+script, or by an earlier run into another destination, cost no file open. Use --date-cache to put the cache
+elsewhere and --no-date-cache to read every file.
+
+--adaptive lets an I/O controller tune the number of concurrent copies at run time (see io_controller.py) instead of
+always running --copy-workers of them: it measures the MB/s and the latency of the copies on each device and raises
+or lowers the limit of the device until more copies stop paying off, so a spinning disk or a card reader is not
+made to seek between files and an NVMe drive gets enough copies in flight. --copy-workers is then the maximum, and
+--device-limit PATH=N caps the device holding PATH at N copies. When source and destination are on different disks,
+each disk has its own limit.
+
+--io-concurrency N runs the walker and the copy stage on an asyncio I/O engine (see async_io.py) for sources on
+SMB/NFS shares, where every stat and read waits on a network round trip. Directories are read and files stat'ed with
+up to N operations in flight, and --copy-workers files are copied at once in chunks, with at most --inflight-mb
+megabytes of chunks in flight, so the link stays busy without the buffers growing.
+
+--thumbnails renders a small thumbnail of every organized photo into a content-addressed cache beside the
+"_organized" folder (see thumbnail_cache.py), right after the file is copied, while its bytes are still in the page
+cache. Thumbnails are rendered in a separate pool of worker processes from reduced-scale JPEG decodes and the previews
+embedded in NEF files, so a gallery can show the organized tree without decoding the originals. --thumbnail-size and
+--thumbnail-format select their size and format.
+
+Every stage is instrumented (see metrics.py): --progress prints a live progress line with the queue depths and an ETA
+once the walk has finished, and --report FILE writes the per-stage counts, files/s, MB/s, busy time and latency
+histograms as JSON at exit, which shows whether the walk, the stat calls, capture date parsing, hashing or the
+transfers are the bottleneck.
+
+--plan FILE writes the copy, move and hard link operations to a plan file instead of transferring anything (see
+planner.py), so the run can be reviewed and applied later with "python3 planner.py FILE". The scan index is read but
+not updated in this mode.
 
 
 Usage:
-    python3 organizer.py <source_folder>
+    python3 organizer.py <source_folder> [--no-index] [--metadata-workers N] [--copy-workers N] [--queue-size N]
+                                           [--processes N] [--batch-size N] [--no-date-cache] [--date-cache PATH]
+                                           [--mode {copy,move,hardlink,reflink}] [--verify]
+                                           [--dedup {skip,hardlink,report}] [--plan PLAN_FILE]
+                                           [--adaptive] [--device-limit PATH=N] [--io-concurrency N]
+                                           [--inflight-mb N] [--thumbnails] [--thumbnail-size N]
+                                           [--thumbnail-format {webp,jpeg}] [--progress] [--report FILE]
 
 Dependencies:
     - os
-    - shutil
-    - exifread
+    - time
+    - asyncio
+    - date_extractor
     - datetime
     - sys
+    - threading
+    - queue
     - concurrent.futures
+    - multiprocessing
+    - argparse
+    - transfer
+    - dedup
+    - scan_index
+    - date_cache
+    - planner
+    - verified_copy
+    - async_io
+    - io_controller
+    - thumbnail_cache
+    - metrics
 
 Author: K H M BURHAN UDDIN
 Date: May 12, 2023    
-Version: 1.0
+Version: 2.3
 """
 
 import os
-import shutil
-import exifread
 from datetime import datetime
-import sys
+import argparse
+import asyncio
 import concurrent.futures
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+
+from async_io import DEFAULT_INFLIGHT_BYTES, AsyncIOEngine
+from date_cache import DEFAULT_CACHE_PATH, DateCache
+from date_extractor import get_capture_dates
+from dedup import find_duplicates, print_duplicate_report, scan_sizes
+from io_controller import IOController, device_of
+from metrics import Metrics
+from planner import Plan
+from scan_index import ScanIndex
+from thumbnail_cache import DEFAULT_FORMAT, DEFAULT_MAX_SIZE, THUMBNAIL_EXTENSIONS, THUMBNAIL_FORMATS, ThumbnailCache
+from transfer import METHOD_VERBS, TRANSFER_MODES, transfer_file
+from verified_copy import VerifiedCopier
 
-def organize(source_folder):
+DEFAULT_METADATA_WORKERS = min(8, os.cpu_count() or 1)
+DEFAULT_COPY_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 64
+DEDUP_ACTIONS = ('skip', 'hardlink', 'report')
+
+# Sentinel put on a queue once per consumer to tell it that no more work will arrive.
+_DONE = object()
+
+
+def organize(source_folder, use_index=True, metadata_workers=DEFAULT_METADATA_WORKERS,
+             copy_workers=DEFAULT_COPY_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, processes=0,
+             batch_size=DEFAULT_BATCH_SIZE, mode='copy', dedup=None, plan=None, io_concurrency=0,
+             inflight_bytes=DEFAULT_INFLIGHT_BYTES, metrics=None, date_cache_path=DEFAULT_CACHE_PATH, verify=False,
+             adaptive=False, device_limits=None, thumbnails=False, thumbnail_size=DEFAULT_MAX_SIZE,
+             thumbnail_format=DEFAULT_FORMAT):
+    """
+    Organize source_folder and return a list of (file_path, stage, error) tuples for the files that failed.
+
+    When processes is non-zero, capture dates are extracted in a pool of that many processes, batch_size paths per
+    task. Each metadata worker thread keeps one batch in flight, so at least two threads per process are used.
+
+    mode is one of transfer.TRANSFER_MODES and selects how files are transferred to the destination.
+
+    dedup is None or one of DEDUP_ACTIONS and selects what happens to files whose content duplicates another file.
+
+    If plan is a planner.Plan, the transfers are recorded in it instead of being applied. Hard links to duplicates
+    are recorded in a second phase, after the files they link to.
+
+    When io_concurrency is non-zero, the walker and the copy stage run on an async_io.AsyncIOEngine with that many
+    concurrent operations. copy_workers files are then copied at once, with at most inflight_bytes of chunks in flight.
+
+    Timings and counters of every stage are recorded in metrics, a metrics.Metrics that is started and stopped here.
+
+    Capture dates are cached in the date_cache.DateCache at date_cache_path, unless it is None.
+
+    With verify, files are copied with a verified_copy.VerifiedCopier that records their checksums in a manifest
+    beside the destination folder. This applies to mode 'copy' only.
+
+    With adaptive, the number of concurrent copies on each device is tuned by an io_controller.IOController, up to
+    copy_workers or, for the device holding a path of device_limits, a dict of path -> maximum, up to its maximum.
+    This applies to the threaded copy stage only, not with io_concurrency.
+
+    With thumbnails, a thumbnail of thumbnail_size pixels in thumbnail_format is rendered into the
+    thumbnail_cache.ThumbnailCache of the destination folder for every photo organized. Not applied with a plan.
+    """
     parent_dir = os.path.abspath(os.path.join(source_folder, os.pardir))
     destination_folder = os.path.join(parent_dir, f"{os.path.basename(source_folder)}_organized")
     unorganized_folder = os.path.join(parent_dir, f"{os.path.basename(source_folder)}_unorganized")
     allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.mp4', '.mov', '.3gp', '.nef', '.avi', '.mpg']
+    index = ScanIndex(ScanIndex.path_for(destination_folder)) if use_index else None
+    date_cache = DateCache(date_cache_path) if date_cache_path is not None else None
+    if processes:
+        metadata_workers = max(metadata_workers, 2 * processes)
+    else:
+        batch_size = 1
+    # Workers are started on the first batch, when the walker and copy threads already run: forking this process
+    # then could copy locks held by those threads into a child, so workers come from a fork server instead.
+    process_pool = concurrent.futures.ProcessPoolExecutor(
+        processes, mp_context=multiprocessing.get_context('forkserver')) if processes else None
+    engine = AsyncIOEngine(io_concurrency, inflight_bytes=inflight_bytes) if io_concurrency else None
+    metrics = metrics if metrics is not None else Metrics('organizer')
+    controller = None
+    if adaptive and engine is None:
+        controller = IOController(copy_workers, metrics=metrics,
+                                  device_limits={device_of(path): limit
+                                                 for path, limit in (device_limits or {}).items()})
+        # Both folders may not exist yet; their devices are those of the folders that will hold them.
+        destination_devices = {False: device_of(destination_folder), True: device_of(unorganized_folder)}
+    # Every file walked ends up in exactly one of these stages, so together they measure the progress of the run.
+    metrics.start(('transfer', 'unchanged', 'duplicate', 'failed'))
+
+    # Duplicate source path -> source path of the copy that is kept.
+    duplicate_of = {}
+    if dedup is not None:
+        print("Searching for duplicates...")
+        with metrics.time('dedup'):
+            duplicate_groups = find_duplicates(scan_sizes(source_folder))
+        if dedup == 'report':
+            print_duplicate_report(duplicate_groups)
+        else:
+            for keep_path, *duplicate_paths in duplicate_groups:
+                for duplicate_path in duplicate_paths:
+                    duplicate_of[duplicate_path] = keep_path
+    kept_paths = set(duplicate_of.values())
+    kept_destinations = {}
+    deferred_duplicates = []
 
-    def copy_file(file_path):
-        file_extension = os.path.splitext(file_path)[1].lower()
+    path_queue = queue.Queue(maxsize=queue_size)
+    copy_queue = queue.Queue(maxsize=queue_size)
+    metrics.watch('path_queue', path_queue.qsize)
+    metrics.watch('copy_queue', copy_queue.qsize)
+    failures = []
+    failures_lock = threading.Lock()
 
-        if file_extension in allowed_extensions:
-            try:
-                with open(file_path, 'rb') as f:
-                    tags = exifread.process_file(f, details=False, stop_tag='DateTimeOriginal')
-                    creation_date = datetime.strptime(str(tags['EXIF DateTimeOriginal']), '%Y:%m:%d %H:%M:%S')
-            except (KeyError, TypeError):
-                creation_date = datetime.fromtimestamp(os.path.getctime(file_path))
+    def record_failure(file_path, stage, error):
+        with failures_lock:
+            failures.append((file_path, stage, error))
+        if stage != 'walk':
+            metrics.record('failed')
+        print(f"Failed ({stage}) {file_path}: {error}")
+
+    thumbnail_cache = None
+    if thumbnails and plan is None:
+        def thumbnail_failed(file_path, error):
+            metrics.record('thumbnail_failed')
+            print(f"Failed to render thumbnail of {file_path}: {error}")
+
+        thumbnail_cache = ThumbnailCache(ThumbnailCache.path_for(destination_folder), thumbnail_size, thumbnail_format,
+                                         failed=thumbnail_failed,
+                                         rendered=lambda file_path, seconds: metrics.record('thumbnail', seconds))
+
+    copier = None
+    if verify and mode == 'copy' and plan is None:
+        copier = VerifiedCopier(f"{os.path.abspath(destination_folder)}.manifest",
+                                failed=lambda file_path, error: record_failure(file_path, 'commit', error))
+
+    def walk():
+        def on_error(error):
+            record_failure(error.filename, 'walk', error)
+
+        async def walk_async():
+            async for directory in engine.walk(source_folder, onerror=on_error):
+                metrics.record('walk', count=len(directory.files))
+                for entry in directory.files.values():
+                    await engine.run(path_queue.put, (entry.path, entry.stat()))
 
+        try:
+            if engine is not None:
+                asyncio.run(walk_async())
+            else:
+                start = time.perf_counter()
+                for root, dirs, files in os.walk(source_folder, onerror=on_error):
+                    metrics.record('walk', time.perf_counter() - start, count=len(files))
+                    for file in files:
+                        path_queue.put((os.path.join(root, file), None))
+                    start = time.perf_counter()
+        finally:
+            metrics.set_total(metrics.count('walk'))
+            for _ in range(metadata_workers):
+                path_queue.put(_DONE)
+
+    def destination_for(file_path, creation_date):
+        if creation_date is None:
+            destination_folder_path = os.path.join(unorganized_folder, os.path.relpath(os.path.dirname(file_path), source_folder))
+        else:
             destination_folder_path = os.path.join(destination_folder,  creation_date.strftime("%Y"), creation_date.strftime('%Y-%m-%d'))
-            os.makedirs(destination_folder_path, exist_ok=True)
-            destination_file_path = os.path.join(destination_folder_path, os.path.basename(file_path))
-            shutil.copy2(file_path, destination_file_path)
-            print(f"Copied {file_path} to {destination_file_path}")
+        return os.path.join(destination_folder_path, os.path.basename(file_path))
+
+    def resolve_batch(batch):
+        """
+        Read the capture dates of a batch of (file_path, stat_result) and queue the files for copying.
+        """
+        # File path -> (capture_date, source) for the files with an allowed extension.
+        capture_dates = {}
+        dated_paths = []
+        for file_path, stat_result in batch:
+            if os.path.splitext(file_path)[1].lower() not in allowed_extensions:
+                continue
+            cached = date_cache.lookup(stat_result) if date_cache is not None else None
+            if cached is not None:
+                capture_dates[file_path] = cached
+            else:
+                dated_paths.append(file_path)
+        if capture_dates:
+            metrics.record('date_cache', count=len(capture_dates))
+        try:
+            start = time.perf_counter()
+            if process_pool is not None and dated_paths:
+                results = process_pool.submit(get_capture_dates, dated_paths).result()
+            else:
+                results = get_capture_dates(dated_paths)
+            if dated_paths:
+                metrics.record('metadata', time.perf_counter() - start, count=len(dated_paths))
+        except Exception as e:
+            for file_path, _ in batch:
+                record_failure(file_path, 'metadata', e)
+            return
+        stat_results = dict(batch)
+        for file_path, capture_date, source in results:
+            capture_dates[file_path] = (capture_date, source)
+            if date_cache is not None:
+                date_cache.record(stat_results[file_path], capture_date, source)
+
+        for file_path, stat_result in batch:
+            creation_date = None
+            if file_path in capture_dates:
+                creation_date = capture_dates[file_path][0] or datetime.fromtimestamp(stat_result.st_ctime)
+            copy_queue.put((file_path, stat_result, creation_date, destination_for(file_path, creation_date)))
+
+    def copy_file(file_path, stat_result, creation_date, destination_file_path):
+        if plan is not None:
+            if mode == 'move':
+                plan.move(file_path, destination_file_path)
+            else:
+                plan.copy(file_path, destination_file_path, mode)
+            if file_path in kept_paths:
+                kept_destinations[file_path] = destination_file_path
+            return
+        os.makedirs(os.path.dirname(destination_file_path), exist_ok=True)
+        if copier is not None:
+            # The file reaches its final, possibly renumbered, name when its batch is committed.
+            copier.copy(file_path, destination_file_path,
+                        lambda final_path, method: copied(file_path, stat_result, creation_date, final_path, method))
+            return
+        method = transfer_file(file_path, destination_file_path, mode)
+        copied(file_path, stat_result, creation_date, destination_file_path, method)
+
+    async def copy_file_async(file_path, stat_result, creation_date, destination_file_path):
+        if plan is not None or mode != 'copy' or copier is not None:
+            # Links, renames and clones move no data, so they go through the blocking path, as do verified copies.
+            await engine.run(copy_file, file_path, stat_result, creation_date, destination_file_path)
+            return
+        await engine.makedirs(os.path.dirname(destination_file_path))
+        await engine.copy_file(file_path, destination_file_path)
+        copied(file_path, stat_result, creation_date, destination_file_path, 'copy')
+
+    def copied(file_path, stat_result, creation_date, destination_file_path, method):
+        print(f"{METHOD_VERBS[method]} {file_path} to {destination_file_path}")
+        if file_path in kept_paths:
+            kept_destinations[file_path] = destination_file_path
+        if index is not None:
+            index.record(file_path, stat_result, creation_date, destination_file_path)
+        submit_thumbnail(creation_date, destination_file_path)
+
+    def submit_thumbnail(creation_date, destination_file_path):
+        # Files without a capture date went to the unorganized folder, which has no thumbnails.
+        if thumbnail_cache is not None and creation_date is not None and \
+                os.path.splitext(destination_file_path)[1].lower() in THUMBNAIL_EXTENSIONS:
+            thumbnail_cache.submit(destination_file_path)
+
+    def link_duplicate(file_path, stat_result, creation_date, destination_file_path):
+        """
+        Hard link a duplicate to the destination of the copy that was kept, or organize it normally if there is none.
+        """
+        keep_path = duplicate_of[file_path]
+        keep_destination = kept_destinations.get(keep_path)
+        if keep_destination is None and index is not None:
+            entry = index.lookup(keep_path)
+            keep_destination = entry[4] if entry is not None and os.path.exists(entry[4]) else None
+        if keep_destination is None or (plan is None and not os.path.exists(keep_destination)):
+            copy_file(file_path, stat_result, creation_date, destination_file_path)
+            return
+        if plan is not None:
+            if os.path.abspath(keep_destination) != os.path.abspath(destination_file_path):
+                plan.copy(keep_destination, destination_file_path, 'hardlink', phase=1)
+            return
+        if os.path.abspath(keep_destination) != os.path.abspath(destination_file_path):
+            os.makedirs(os.path.dirname(destination_file_path), exist_ok=True)
+            if os.path.lexists(destination_file_path):
+                os.remove(destination_file_path)
+            os.link(keep_destination, destination_file_path)
+            print(f"Linked duplicate {file_path} to {keep_destination} as {destination_file_path}")
+        if index is not None:
+            index.record(file_path, stat_result, creation_date, destination_file_path)
+        # Shares the thumbnail of the file it links to.
+        submit_thumbnail(creation_date, destination_file_path)
+
+    def metadata_worker():
+        batch = []
+        while True:
+            item = path_queue.get()
+            if item is not _DONE:
+                # The asyncio walker has already stat'ed the file.
+                file_path, stat_result = item
+                try:
+                    if stat_result is None:
+                        with metrics.time('stat'):
+                            stat_result = os.stat(file_path)
+                    if index is None or not index.is_unchanged(file_path, stat_result):
+                        batch.append((file_path, stat_result))
+                    else:
+                        metrics.record('unchanged')
+                except Exception as e:
+                    record_failure(file_path, 'metadata', e)
+            if batch and (item is _DONE or len(batch) >= batch_size):
+                try:
+                    resolve_batch(batch)
+                except Exception as e:
+                    # The thread must survive: the walker blocks on the full path queue if its consumers stop.
+                    for file_path, _ in batch:
+                        record_failure(file_path, 'metadata', e)
+                batch = []
+            if item is _DONE:
+                break
+
+    def set_aside_duplicate(job):
+        """
+        Skip or defer the job if its file duplicates another file. Returns True if the job was set aside.
+        """
+        file_path = job[0]
+        if file_path not in duplicate_of:
+            return False
+        metrics.record('duplicate')
+        if dedup == 'skip':
+            print(f"Skipped {file_path} (duplicate of {duplicate_of[file_path]})")
         else:
-            unorganized_folder_path = os.path.join(unorganized_folder, os.path.relpath(os.path.dirname(file_path), source_folder))
-            os.makedirs(unorganized_folder_path, exist_ok=True)
-            unorganized_file_path = os.path.join(unorganized_folder_path, os.path.basename(file_path))
-            shutil.copy2(file_path, unorganized_file_path)
-            print(f"Copied {file_path} to {unorganized_file_path}")
+            # Linked once every kept copy has reached its destination.
+            deferred_duplicates.append(job)
+        return True
+
+    def copy_worker():
+        while True:
+            job = copy_queue.get()
+            if job is _DONE:
+                break
+            if set_aside_duplicate(job):
+                continue
+            try:
+                with metrics.time('transfer', job[1].st_size):
+                    if controller is not None:
+                        # Files without a capture date go to the unorganized folder.
+                        with controller.slot((job[1].st_dev, destination_devices[job[2] is None]), job[1].st_size):
+                            copy_file(*job)
+                    else:
+                        copy_file(*job)
+            except Exception as e:
+                record_failure(job[0], mode, e)
+
+    def copy_worker_async():
+        """
+        Copy stage of the asyncio engine: one thread running up to copy_workers copies at once.
+        """
+        async def copy_job(job, slots):
+            try:
+                with metrics.time('transfer', job[1].st_size):
+                    await copy_file_async(*job)
+            except Exception as e:
+                record_failure(job[0], mode, e)
+            finally:
+                slots.release()
+
+        async def consume():
+            slots = asyncio.Semaphore(copy_workers)
+            tasks = set()
+            while True:
+                job = await engine.run(copy_queue.get)
+                if job is _DONE:
+                    break
+                if set_aside_duplicate(job):
+                    continue
+                await slots.acquire()
+                task = asyncio.ensure_future(copy_job(job, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(consume())
+
+    walker = threading.Thread(target=walk, name='walker', daemon=True)
+    metadata_threads = [threading.Thread(target=metadata_worker, name=f'metadata-{i}', daemon=True) for i in range(metadata_workers)]
+    if engine is not None:
+        copy_threads = [threading.Thread(target=copy_worker_async, name='copy', daemon=True)]
+    else:
+        copy_threads = [threading.Thread(target=copy_worker, name=f'copy-{i}', daemon=True) for i in range(copy_workers)]
+    try:
+        for thread in [walker] + metadata_threads + copy_threads:
+            thread.start()
+        walker.join()
+        for thread in metadata_threads:
+            thread.join()
+        for _ in copy_threads:
+            copy_queue.put(_DONE)
+        for thread in copy_threads:
+            thread.join()
+        if copier is not None:
+            copier.flush()
+        for job in deferred_duplicates:
+            try:
+                with metrics.time('link'):
+                    link_duplicate(*job)
+            except Exception as e:
+                record_failure(job[0], 'dedup', e)
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+        if engine is not None:
+            engine.close()
+        if copier is not None:
+            copier.close()
+        if thumbnail_cache is not None:
+            thumbnail_cache.close()
+        if index is not None:
+            index.close()
+        if date_cache is not None:
+            date_cache.close()
+        metrics.stop()
+        metrics.extra['failures'] = len(failures)
+        if controller is not None:
+            metrics.extra['io_limits'] = controller.report()
+
+    print_failure_report(failures)
+    return failures
+
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        for root, dirs, files in os.walk(source_folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                executor.submit(copy_file, file_path)
+def print_failure_report(failures):
+    if not failures:
+        return
+    print(f"{len(failures)} file(s) failed:")
+    for file_path, stage, error in failures:
+        print(f"  {stage}: {file_path}: {error}")
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python3 organizer.py <source_folder>")
+    parser = argparse.ArgumentParser(description='Organize photos and videos into year and date folders.')
+    parser.add_argument('source_folder', help='Path to the source folder')
+    parser.add_argument('--no-index', action='store_true',
+                        help='Ignore the scan index and process every file again')
+    parser.add_argument('--no-date-cache', action='store_true',
+                        help='Read the capture date of every file instead of using the date cache')
+    parser.add_argument('--date-cache', default=DEFAULT_CACHE_PATH, help='Path of the capture date cache')
+    parser.add_argument('--metadata-workers', type=int, default=DEFAULT_METADATA_WORKERS,
+                        help='Number of threads reading capture dates')
+    parser.add_argument('--copy-workers', type=int, default=DEFAULT_COPY_WORKERS,
+                        help='Number of threads copying files')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='Maximum number of files waiting between two stages')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='Extract capture dates in this many worker processes instead of threads')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Number of paths sent to a worker process per task')
+    parser.add_argument('--mode', choices=TRANSFER_MODES, default='copy',
+                        help='How files are transferred to the destination')
+    parser.add_argument('--verify', action='store_true',
+                        help='Copy through checksummed temporary files and record the checksums in a manifest')
+    parser.add_argument('--dedup', choices=DEDUP_ACTIONS,
+                        help='Skip, hard link or report files whose content duplicates another file')
+    parser.add_argument('--plan', help='Write the operations to this plan file instead of applying them')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Tune the number of concurrent copies per device at run time, up to --copy-workers')
+    parser.add_argument('--device-limit', action='append', default=[], metavar='PATH=N',
+                        help='With --adaptive, copy at most N files at once on the device holding PATH')
+    parser.add_argument('--io-concurrency', type=int, default=0,
+                        help='Walk and copy with this many concurrent I/O operations on an asyncio engine')
+    parser.add_argument('--inflight-mb', type=int, default=DEFAULT_INFLIGHT_BYTES // (1024 * 1024),
+                        help='Maximum megabytes of copy chunks in flight with --io-concurrency')
+    parser.add_argument('--thumbnails', action='store_true',
+                        help='Render a thumbnail of every organized photo into the thumbnail cache')
+    parser.add_argument('--thumbnail-size', type=int, default=DEFAULT_MAX_SIZE,
+                        help='Maximum width and height of the thumbnails in pixels')
+    parser.add_argument('--thumbnail-format', choices=list(THUMBNAIL_FORMATS), default=DEFAULT_FORMAT,
+                        help='Format of the thumbnails')
+    parser.add_argument('--progress', action='store_true',
+                        help='Print a progress line with the throughput, queue depths and ETA')
+    parser.add_argument('--report', help='Write a JSON report of the run to this file')
+    args = parser.parse_args()
+    if args.verify and (args.mode != 'copy' or args.plan):
+        parser.error('--verify needs --mode copy and cannot be combined with --plan')
+    if args.adaptive and (args.io_concurrency or args.plan):
+        parser.error('--adaptive cannot be combined with --io-concurrency or --plan')
+    device_limits = {}
+    for device_limit in args.device_limit:
+        path, separator, limit = device_limit.rpartition('=')
+        if not separator or not path or not limit.isdigit() or not int(limit):
+            parser.error(f'invalid --device-limit {device_limit}, expected PATH=N')
+        device_limits[path] = int(limit)
+    plan = Plan() if args.plan else None
+    metrics = Metrics('organizer', show_progress=args.progress)
+    failures = organize(args.source_folder, use_index=not args.no_index, metadata_workers=args.metadata_workers,
+                        copy_workers=args.copy_workers, queue_size=args.queue_size, processes=args.processes,
+                        batch_size=args.batch_size, mode=args.mode,
+                        dedup=args.dedup, plan=plan, io_concurrency=args.io_concurrency,
+                        inflight_bytes=args.inflight_mb * 1024 * 1024, metrics=metrics,
+                        date_cache_path=None if args.no_date_cache else args.date_cache, verify=args.verify,
+                        adaptive=args.adaptive, device_limits=device_limits, thumbnails=args.thumbnails,
+                        thumbnail_size=args.thumbnail_size, thumbnail_format=args.thumbnail_format)
+    if args.report:
+        metrics.write_report(args.report)
+    if plan is not None:
+        plan.save(args.plan)
+    if failures:
         sys.exit(1)
-    source_folder = sys.argv[1]
-    organize(source_folder)
\ No newline at end of file
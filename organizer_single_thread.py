@@ -5,48 +5,61 @@ This script organizes files in a source folder based on their creation date. It
 where files are sorted into year and date subdirectories according to their creation date. Files with allowed extensions
 are copied to the destination folders, while files with unsupported extensions are copied to an "unorganized" folder.
 It tries to set file modified and created date from exif data, if not available it use file meta data.
+Capture dates are read from the file headers with date_extractor.py (EXIF for photos and raw files, the
+QuickTime mvhd atom for videos), which reads only a few kilobytes per file.
+Dates already in the shared date cache (see date_cache.py) are used without opening the file.
 
 It does not use multiprocessing or multi threading
 
 Usage:
-    python3 organizer_single_thread.py <source_folder>
+    python3 organizer_single_thread.py <source_folder> [--no-date-cache] [--date-cache PATH]
 
 Dependencies:
     - os
     - shutil
-    - exifread
+    - date_extractor
+    - date_cache
     - datetime
-    - sys
-    - concurrent.futures
+    - argparse
 
 Author: K H M BURHAN UDDIN
 Date: May 12, 2023    
-Version: 1.0
+Version: 1.2
 """
 
 import os
 import shutil
-import exifread
 from datetime import datetime
-import sys
+import argparse
 
-def copy_photos_videos(source_folder):
+from date_cache import DEFAULT_CACHE_PATH, DateCache
+from date_extractor import get_capture_date
+
+def copy_photos_videos(source_folder, date_cache_path=DEFAULT_CACHE_PATH):
     parent_dir = os.path.abspath(os.path.join(source_folder, os.pardir))
     destination_folder = os.path.join(parent_dir, f"{os.path.basename(source_folder)}_organized")
     unorganized_folder = os.path.join(parent_dir, f"{os.path.basename(source_folder)}_unorganized")
     allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.mp4', '.mov', '.3gp', '.nef']
-    
+    date_cache = DateCache(date_cache_path) if date_cache_path is not None else None
+    try:
+        copy_files(source_folder, destination_folder, unorganized_folder, allowed_extensions, date_cache)
+    finally:
+        if date_cache is not None:
+            date_cache.close()
+
+
+def copy_files(source_folder, destination_folder, unorganized_folder, allowed_extensions, date_cache):
     for root, dirs, files in os.walk(source_folder):
         for file in files:
             file_path = os.path.join(root, file)
             file_extension = os.path.splitext(file)[1].lower()
 
             if file_extension in allowed_extensions:
-                try:
-                    with open(file_path, 'rb') as f:
-                        tags = exifread.process_file(f, details=False, stop_tag='DateTimeOriginal')
-                        creation_date = datetime.strptime(str(tags['EXIF DateTimeOriginal']), '%Y:%m:%d %H:%M:%S')
-                except (KeyError, TypeError):
+                if date_cache is not None:
+                    creation_date = date_cache.resolve(file_path)[0]
+                else:
+                    creation_date = get_capture_date(file_path)
+                if creation_date is None:
                     creation_date = datetime.fromtimestamp(os.path.getctime(file_path))
 
                 destination_folder_path = os.path.join(destination_folder,  creation_date.strftime("%Y"), creation_date.strftime('%Y-%m-%d'))
@@ -63,8 +76,10 @@ def copy_photos_videos(source_folder):
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python3 organizer.py <source_folder>")
-        sys.exit(1)
-    source_folder = sys.argv[1]
-    copy_photos_videos(source_folder)
+    parser = argparse.ArgumentParser(description='Organize photos and videos into year and date folders.')
+    parser.add_argument('source_folder', help='Path to the source folder')
+    parser.add_argument('--no-date-cache', action='store_true',
+                        help='Read the capture date of every file instead of using the date cache')
+    parser.add_argument('--date-cache', default=DEFAULT_CACHE_PATH, help='Path of the capture date cache')
+    args = parser.parse_args()
+    copy_photos_videos(args.source_folder, None if args.no_date_cache else args.date_cache)
@@ -0,0 +1,71 @@
+"""
+pairing.py
+
+This module pairs files of one directory by name, entirely in memory. It builds a case-insensitive map of file stem
+to extensions from a directory listing, so NEF/JPG, JPG/HEIF and original/"-converted.mp4" pairs are resolved without
+probing the filesystem for every candidate sibling, and "IMG_1.JPG"/"IMG_1.nef" style pairs are no longer missed.
+
+Usage:
+    for nef_name, jpg_name in find_pairs(filenames, NEF_EXTENSIONS, JPEG_EXTENSIONS):
+        ...
+    for original_name, converted_name in find_converted_pairs(filenames):
+        ...
+
+Dependencies:
+    - os
+    - collections
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+from collections import defaultdict
+
+NEF_EXTENSIONS = ('.nef',)
+# The pairs that the cleanup scripts delete from. Widening these widens what gets deleted: ".heic" files are written
+# next to their JPEG by heif_converter.py and must survive heif_organizer.py.
+JPEG_EXTENSIONS = ('.jpg',)
+HEIF_EXTENSIONS = ('.heif',)
+CONVERTED_SUFFIX = '-converted.mp4'
+
+
+def build_stem_index(filenames):
+    """
+    Return a dict of lower-case stem -> {lower-case extension: filename} for the given file names.
+    """
+    index = defaultdict(dict)
+    for filename in filenames:
+        stem, extension = os.path.splitext(filename)
+        index[stem.lower()][extension.lower()] = filename
+    return index
+
+
+def find_pairs(filenames, first_extensions, second_extensions, stem_index=None):
+    """
+    Yield (first_filename, second_filename) for every stem that has a file with one of first_extensions and a file
+    with one of second_extensions. Extensions are lower-case and listed in order of preference.
+    """
+    stem_index = stem_index if stem_index is not None else build_stem_index(filenames)
+    for stem in sorted(stem_index):
+        extensions = stem_index[stem]
+        first = next((extensions[ext] for ext in first_extensions if ext in extensions), None)
+        second = next((extensions[ext] for ext in second_extensions if ext in extensions), None)
+        if first is not None and second is not None:
+            yield first, second
+
+
+def find_converted_pairs(filenames, stem_index=None):
+    """
+    Yield (original_filename, converted_filename) for every "<stem>-converted.mp4" file that has an original file
+    "<stem>.<any extension>". If several originals share the stem, the first one in name order is used.
+    """
+    stem_index = stem_index if stem_index is not None else build_stem_index(filenames)
+    for filename in sorted(filenames):
+        if not filename.lower().endswith(CONVERTED_SUFFIX):
+            continue
+        originals = stem_index.get(filename[:-len(CONVERTED_SUFFIX)].lower(), {})
+        candidates = sorted(name for name in originals.values() if name != filename)
+        if candidates:
+            yield candidates[0], filename
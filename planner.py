@@ -0,0 +1,207 @@
+"""
+planner.py
+
+This script executes operation plans produced by the other scripts. With --plan, organizer.py and the cleanup scripts
+do not touch the filesystem: they write the copy, move, delete and utime operations they would perform to a plan file
+(one JSON object per line) that can be reviewed, edited or reordered before it is applied.
+
+The executor groups the operations by target directory, creates each target directory once instead of once per file,
+and runs the groups in parallel with a bounded number of workers. Operations of one group run in plan order, so
+dependent operations on the same directory (for example utime, delete, then rename) stay correct. Operations of a
+later phase start only after every operation of the earlier phases has been applied; if any of them failed, the run
+stops there.
+
+Every applied operation is appended to a progress file next to the plan ("<plan>.progress"). Running the same plan
+again skips the operations that were already applied, so a failed or interrupted run resumes where it stopped. The
+progress file starts with a digest of the plan and is ignored if the plan no longer matches it, and saving a plan
+removes the progress file of the previous plan at that path, so a regenerated plan is always applied in full.
+
+Usage:
+    python planner.py <plan_file> [--workers N]
+
+Arguments:
+    plan_file (str): Path to a plan written with --plan by another script.
+
+Options:
+    --workers: Number of target directories processed at the same time.
+
+Dependencies:
+    - os
+    - sys
+    - json
+    - hashlib
+    - argparse
+    - threading
+    - concurrent.futures
+    - transfer
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import concurrent.futures
+from collections import defaultdict
+
+from transfer import transfer_file
+
+DEFAULT_WORKERS = 8
+
+
+class Plan:
+    """
+    An ordered list of filesystem operations. Each operation is a dict with an 'id', an 'op' ('copy', 'move',
+    'delete' or 'utime'), a 'phase' and the paths it works on.
+    """
+
+    def __init__(self, operations=None):
+        self.operations = operations if operations is not None else []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.operations)
+
+    def add(self, op, phase=0, **arguments):
+        with self.lock:
+            self.operations.append(dict(id=len(self.operations), op=op, phase=phase, **arguments))
+
+    def copy(self, source, destination, mode='copy', phase=0):
+        """
+        Copy source to destination using a transfer.py mode ('copy', 'hardlink' or 'reflink').
+        """
+        self.add('copy', phase, source=os.path.abspath(source), destination=os.path.abspath(destination), mode=mode)
+
+    def move(self, source, destination, phase=0):
+        self.add('move', phase, source=os.path.abspath(source), destination=os.path.abspath(destination))
+
+    def delete(self, path, phase=0):
+        self.add('delete', phase, path=os.path.abspath(path))
+
+    def utime(self, path, times, phase=0):
+        self.add('utime', phase, path=os.path.abspath(path), atime=times[0], mtime=times[1])
+
+    def digest(self):
+        """
+        Return a hash of the operations, as they are written to the plan file.
+        """
+        digest = hashlib.blake2b()
+        for operation in self.operations:
+            digest.update((json.dumps(operation) + '\n').encode())
+        return digest.hexdigest()
+
+    def save(self, plan_path):
+        with open(plan_path, 'w') as f:
+            for operation in self.operations:
+                f.write(json.dumps(operation) + '\n')
+        # The progress of the plan that was there before does not apply to this one.
+        if os.path.exists(progress_path_for(plan_path)):
+            os.remove(progress_path_for(plan_path))
+        print(f"Wrote {len(self.operations)} operations to {plan_path}")
+
+    @classmethod
+    def load(cls, plan_path):
+        with open(plan_path) as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+
+def progress_path_for(plan_path):
+    return f"{plan_path}.progress"
+
+
+def target_directory(operation):
+    return os.path.dirname(operation.get('destination') or operation['path'])
+
+
+def apply_operation(operation):
+    op = operation['op']
+    if op == 'copy':
+        transfer_file(operation['source'], operation['destination'], operation.get('mode', 'copy'))
+    elif op == 'move':
+        transfer_file(operation['source'], operation['destination'], 'move')
+    elif op == 'delete':
+        os.remove(operation['path'])
+    elif op == 'utime':
+        os.utime(operation['path'], (operation['atime'], operation['mtime']))
+    else:
+        raise ValueError(f"Unknown operation: {op}")
+
+
+def execute_plan(plan, workers=DEFAULT_WORKERS, progress_path=None):
+    """
+    Apply the operations of plan and return a list of (operation, error) for the operations that failed.
+    If progress_path is given, applied operation ids are appended to it and operations already listed are skipped,
+    provided the progress file was written for this plan.
+    """
+    applied = set()
+    progress = None
+    if progress_path is not None:
+        header = f"plan {plan.digest()}\n"
+        resumed = False
+        if os.path.exists(progress_path):
+            with open(progress_path) as f:
+                if f.readline() == header:
+                    applied = {int(line) for line in f if line.strip()}
+                    resumed = True
+                else:
+                    print(f"Ignoring {progress_path}, which was written for another plan")
+        progress = open(progress_path, 'a' if resumed else 'w')
+        if not resumed:
+            progress.write(header)
+            progress.flush()
+    progress_lock = threading.Lock()
+    failures = []
+    applied_now = []
+
+    def run_group(directory, operations):
+        if any(operation['op'] in ('copy', 'move') for operation in operations):
+            os.makedirs(directory, exist_ok=True)
+        for operation in operations:
+            try:
+                apply_operation(operation)
+            except Exception as e:
+                failures.append((operation, e))
+                print(f"Failed to {operation['op']} {operation.get('source') or operation['path']}: {e}")
+                continue
+            applied_now.append(operation['id'])
+            if progress is not None:
+                with progress_lock:
+                    progress.write(f"{operation['id']}\n")
+                    progress.flush()
+
+    pending = [operation for operation in plan.operations if operation['id'] not in applied]
+    if applied:
+        print(f"Skipping {len(plan) - len(pending)} operations that were already applied")
+    try:
+        for phase in sorted({operation['phase'] for operation in pending}):
+            groups = defaultdict(list)
+            for operation in pending:
+                if operation['phase'] == phase:
+                    groups[target_directory(operation)].append(operation)
+            with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+                for future in [executor.submit(run_group, directory, operations)
+                               for directory, operations in groups.items()]:
+                    future.result()
+            if failures:
+                print(f"Stopping after phase {phase} because {len(failures)} operations failed")
+                break
+    finally:
+        if progress is not None:
+            progress.close()
+    print(f"Applied {len(applied_now)} operations, {len(failures)} failed")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply an operation plan written with --plan.')
+    parser.add_argument('plan_file', help='Path to the plan file')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Number of target directories processed at the same time')
+    args = parser.parse_args()
+    if execute_plan(Plan.load(args.plan_file), args.workers, progress_path_for(args.plan_file)):
+        sys.exit(1)
@@ -4,41 +4,147 @@ resizer.py
 This script resizes images in a specified folder and its subfolders to 4K resolution (3840x2160) if they exceed this size.
 It supports JPEG and PNG image formats. The script utilizes the `PIL` (Python Imaging Library) module to open and resize images.
 
+Images are resized in parallel by a pool of worker processes. The size of each image is checked from its header, so
+images already within 4K are never decoded. JPEG images are decoded at a reduced DCT scale with `Image.draft()` before
+the final LANCZOS pass, which is much faster and uses much less memory than decoding them at full resolution. The
+resized image is written to a temporary file and then renamed over the original, so an interrupted run never leaves
+a truncated image behind.
+
 Usage:
-    python3 resizer.py <source_folder>
+    python3 resizer.py <source_folder> [--workers N] [--progress] [--report FILE]
 
 Arguments:
     source_folder (str): Source folder containing the images.
 
+Options:
+    --workers: Number of worker processes. Defaults to the number of CPUs; 1 resizes in the current process.
+    --progress: Print a progress line with the throughput and ETA (see metrics.py).
+    --report: Write a JSON report of the run, with per-stage counts, throughput and latency histograms, to this file.
+
 Dependencies:
     - PIL (Python Imaging Library)
     - os
+    - sys
+    - argparse
+    - shutil
+    - concurrent.futures
+    - metrics
 
 Author: K H M BURHAN UDDIN
-Date: May 12, 2023    
-Version: 1.0
+Date: May 12, 2023
+Version: 1.2
 """
 
 from PIL import Image
 import os
+import sys
+import argparse
+import shutil
+import concurrent.futures
+
+from metrics import Metrics, timed_call
+
+MAX_WIDTH = 3840
+MAX_HEIGHT = 2160
+RESIZE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def resize_image(file_path):
+    """
+    Resize one image in place if it exceeds 4K resolution. Returns True if the image was resized.
+    """
+    with Image.open(file_path) as img:
+        # Image.open only reads the header, so this check does not decode the image.
+        if img.width <= MAX_WIDTH and img.height <= MAX_HEIGHT:
+            return False
+
+        if img.format == 'JPEG':
+            scale = min(MAX_WIDTH / img.width, MAX_HEIGHT / img.height)
+            img.draft(img.mode, (int(img.width * scale) + 1, int(img.height * scale) + 1))
+
+        save_options = {'optimize': True}
+        if img.format == 'JPEG':
+            save_options['quality'] = 'keep'
+        if 'exif' in img.info:
+            save_options['exif'] = img.info['exif']
 
-def resize_images(source_folder):
+        img.thumbnail((MAX_WIDTH, MAX_HEIGHT), resample=Image.LANCZOS)
+        directory, filename = os.path.split(file_path)
+        temp_path = os.path.join(directory, f".{filename}.resizing")
+        try:
+            img.save(temp_path, format=img.format, **save_options)
+            shutil.copymode(file_path, temp_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    os.replace(temp_path, file_path)
+    return True
+
+
+def find_images(source_folder):
     for root, dirs, files in os.walk(source_folder):
         for file in files:
-            file_path = os.path.join(root, file)
-            file_extension = os.path.splitext(file)[1].lower()
+            if os.path.splitext(file)[1].lower() in RESIZE_EXTENSIONS:
+                yield os.path.join(root, file)
+
+
+def resize_images(source_folder, workers=None, metrics=None):
+    """
+    Resize every image under source_folder that exceeds 4K resolution. Returns the list of images that failed.
+    The time spent on each image is recorded in metrics, as stage 'resize' or 'checked' if it was not resized.
+    """
+    workers = workers or os.cpu_count() or 1
+    failures = []
+    metrics = metrics if metrics is not None else Metrics('resizer')
+    file_paths = list(find_images(source_folder))
+    metrics.set_total(len(file_paths))
+    metrics.start(('resize', 'checked', 'failed'))
+
+    def finish(file_path, resize):
+        try:
+            resized, seconds = resize()
+        except Exception as e:
+            failures.append(file_path)
+            metrics.record('failed')
+            print(f"Failed to resize {file_path}: {e}")
+            return
+        metrics.record('resize' if resized else 'checked', seconds)
+        if resized:
+            print(f"Resized {file_path} to 4K resolution")
+
+    if workers == 1:
+        for file_path in file_paths:
+            finish(file_path, lambda: timed_call(resize_image, file_path))
+        metrics.stop()
+        return failures
 
-            if file_extension in ['.jpg', '.jpeg', '.png']:
-                with Image.open(file_path) as img:
-                    if img.width > 3840 or img.height > 2160:
-                        img.thumbnail((3840, 2160), resample=Image.LANCZOS)
-                        img.save(file_path, optimize=True, quality='keep', exif=img.info['exif'])
-                        print(f"Resized {file_path} to 4K resolution")
+    # Keep a bounded number of images in flight instead of one future per image.
+    in_flight = {}
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        for file_path in file_paths:
+            if len(in_flight) >= 2 * workers:
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    finish(in_flight.pop(future), future.result)
+            in_flight[executor.submit(timed_call, resize_image, file_path)] = file_path
+        for future in concurrent.futures.as_completed(in_flight):
+            finish(in_flight[future], future.result)
+    metrics.stop()
+    return failures
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python3 resizer.py <source_folder>")
+    parser = argparse.ArgumentParser(description='Resize images larger than 4K resolution.')
+    parser.add_argument('source_folder', help='Source folder containing the images')
+    parser.add_argument('--workers', type=int, help='Number of worker processes')
+    parser.add_argument('--progress', action='store_true', help='Print a progress line with the throughput and ETA')
+    parser.add_argument('--report', help='Write a JSON report of the run to this file')
+    args = parser.parse_args()
+    metrics = Metrics('resizer', show_progress=args.progress)
+    failures = resize_images(args.source_folder, args.workers, metrics)
+    if args.report:
+        metrics.write_report(args.report)
+    if failures:
         sys.exit(1)
-    source_folder = sys.argv[1]
-    resize_images(source_folder)
@@ -0,0 +1,119 @@
+"""
+scan_index.py
+
+This module keeps a persistent on-disk index of the files processed by organizer.py. The index is a SQLite database
+stored beside the "_organized" folder and records the path, size, modification time, inode, extracted capture date and
+destination of every file. Later runs use it to skip files that have not changed since they were last organized and
+whose destination is still there with the same size, so an incremental run costs a stat of the file and of its
+destination instead of opening and parsing every file again. A file whose destination was deleted or moved away is
+organized again.
+
+Usage:
+    index = ScanIndex(ScanIndex.path_for(destination_folder))
+    if not index.is_unchanged(file_path, os.stat(file_path)):
+        ...
+        index.record(file_path, stat_result, creation_date, destination_file_path)
+    index.close()
+
+Dependencies:
+    - os
+    - sqlite3
+    - threading
+    - datetime
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    capture_date TEXT,
+    destination TEXT NOT NULL
+)
+"""
+
+
+class ScanIndex:
+    """
+    Thread-safe index of organized files keyed by absolute source path.
+
+    Writes are committed in batches of `commit_every` records, so a crash loses at most one batch and the affected
+    files are simply processed again on the next run.
+    """
+
+    def __init__(self, index_path, commit_every=1000):
+        self.index_path = index_path
+        self.commit_every = commit_every
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.conn = sqlite3.connect(index_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    @staticmethod
+    def path_for(destination_folder):
+        """
+        Return the index path that belongs to the given "_organized" folder.
+        """
+        return f"{os.path.abspath(destination_folder)}.index.sqlite"
+
+    def lookup(self, file_path):
+        """
+        Return the indexed (size, mtime_ns, inode, capture_date, destination) for file_path, or None.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, inode, capture_date, destination FROM files WHERE path = ?",
+                (os.path.abspath(file_path),)).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, inode, capture_date, destination = row
+        if capture_date is not None:
+            capture_date = datetime.fromisoformat(capture_date)
+        return size, mtime_ns, inode, capture_date, destination
+
+    def is_unchanged(self, file_path, stat_result):
+        """
+        Check whether file_path was already organized, has the same size, mtime and inode as in stat_result, and its
+        destination still exists with the same size.
+        """
+        entry = self.lookup(file_path)
+        if entry is None:
+            return False
+        size, mtime_ns, inode, _, destination = entry
+        if size != stat_result.st_size or mtime_ns != stat_result.st_mtime_ns or inode != stat_result.st_ino:
+            return False
+        try:
+            return os.stat(destination).st_size == size
+        except OSError:
+            return False
+
+    def record(self, file_path, stat_result, capture_date, destination):
+        """
+        Record that file_path, as described by stat_result, was organized to destination.
+        """
+        row = (os.path.abspath(file_path), stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino,
+               capture_date.isoformat() if capture_date is not None else None, destination)
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", row)
+            self.pending += 1
+            if self.pending >= self.commit_every:
+                self.conn.commit()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
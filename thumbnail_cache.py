@@ -0,0 +1,301 @@
+"""
+thumbnail_cache.py
+
+This module keeps a cache of small thumbnails of the organized photos, so that a gallery can show a grid of the
+"_organized" tree without decoding the multi-megabyte originals. organizer.py (--thumbnails) fills it as each file is
+copied, while its bytes are still in the page cache; this script builds it for files organized earlier.
+
+Thumbnails are rendered in a pool of worker processes, apart from the threads that copy files. Each one is decoded at
+reduced size: JPEG images at the smallest DCT scale that is at least as large as the thumbnail (`Image.draft()`), NEF
+files from the JPEG preview the camera embeds (see nef_to_jpg_converter.py) instead of the raw data. It is rotated
+upright, shrunk to fit max_size x max_size pixels and saved as WebP, or JPEG with --format jpeg.
+
+Each thumbnail size and format has a folder of its own in the cache, "<cache>/<max_size>-<format>", so thumbnails of
+another size are never mistaken for the requested ones. Within it the cache is content-addressed: a thumbnail is
+named after the size of the file and a BLAKE2b hash of its first and last 64 KB (the sample dedup.py uses), and
+stored in folders named after the first two pairs of hex digits of the hash, "ab/cd/abcd...-<size>.webp", so no
+folder grows too large. Identical files, such as duplicates linked by --dedup, share one thumbnail. An index (a
+SQLite database in the same folder) maps the path of every file to its size, modification time and thumbnail, so
+looking up a thumbnail costs a stat of the file and never opens it. A file whose size or modification time changed
+has no thumbnail until it is rendered again. Thumbnails are never deleted, since several files can share one; delete
+the cache folder to rebuild it.
+
+The cache of an "_organized" folder is the "<folder>.thumbnails" folder beside it.
+
+HEIC/HEIF images are read when the optional pillow_heif package is installed.
+
+Usage:
+    python3 thumbnail_cache.py <dir_path> [--cache DIR] [--max-size N] [--format {webp,jpeg}] [--workers N]
+
+    cache = ThumbnailCache(ThumbnailCache.path_for(destination_folder))
+    cache.submit(file_path)
+    thumbnail_path = cache.lookup(file_path)
+    cache.close()
+
+Arguments:
+    dir_path (str): Path to the organized folder.
+
+Options:
+    --cache: Path to the cache folder. Defaults to "<dir_path>.thumbnails".
+    --max-size: Maximum width and height of the thumbnails in pixels. Defaults to 320.
+    --format: Format of the thumbnails. Defaults to webp.
+    --workers: Number of worker processes. Defaults to the number of CPUs.
+
+Dependencies:
+    - PIL (Python Imaging Library)
+    - pillow_heif (optional)
+    - io
+    - os
+    - sys
+    - sqlite3
+    - argparse
+    - threading
+    - multiprocessing
+    - concurrent.futures
+    - dedup
+    - metrics
+    - nef_to_jpg_converter
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import io
+import os
+import sys
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+import concurrent.futures
+
+from PIL import Image, ImageOps
+
+from dedup import partial_hash
+from metrics import timed_call
+from nef_to_jpg_converter import find_embedded_preview
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    pass
+
+THUMBNAIL_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.nef', '.heic', '.heif', '.tif', '.tiff', '.webp')
+# Format -> (Pillow format, file extension, save options).
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', '.jpg', {'quality': 85, 'optimize': True}),
+}
+DEFAULT_MAX_SIZE = 320
+DEFAULT_FORMAT = 'webp'
+INDEX_NAME = 'index.sqlite'
+# Hex digits of the hash kept in thumbnail names, 128 bits.
+DIGEST_LENGTH = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbnails (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    thumbnail TEXT NOT NULL
+)
+"""
+
+
+def render_thumbnail(file_path, thumbnail_path, max_size, thumbnail_format):
+    """
+    Render the thumbnail of file_path to thumbnail_path. Module level so that it runs in a worker process.
+    """
+    if os.path.splitext(file_path)[1].lower() == '.nef':
+        preview = find_embedded_preview(file_path)
+        if preview is None:
+            raise ValueError("no embedded preview")
+        source = io.BytesIO(preview[0])
+    else:
+        source = file_path
+    pillow_format, extension, save_options = THUMBNAIL_FORMATS[thumbnail_format]
+    with Image.open(source) as img:
+        img.draft('RGB', (max_size, max_size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_size, max_size), resample=Image.LANCZOS)
+        img = img.convert('RGB')
+        directory, filename = os.path.split(thumbnail_path)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f".{filename}.partial.{os.getpid()}")
+        try:
+            img.save(temp_path, format=pillow_format, **save_options)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    # Two processes rendering the same content write the same thumbnail, so the last rename wins harmlessly.
+    os.replace(temp_path, thumbnail_path)
+
+
+class ThumbnailCache:
+    """
+    Thread-safe thumbnail cache rendering in a process pool of workers.
+
+    At most four thumbnails per worker wait for the pool; submit() blocks beyond that, so a fast copy stage cannot
+    queue an unbounded backlog. failed(file_path, error) is called for each thumbnail that could not be rendered, and
+    rendered(file_path, seconds) for each one that was.
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE, thumbnail_format=DEFAULT_FORMAT, workers=None,
+                 failed=None, rendered=None, commit_every=1000):
+        self.cache_dir = os.path.abspath(cache_dir)
+        # Thumbnails and index of this size and format.
+        self.variant_dir = os.path.join(self.cache_dir, f"{max_size}-{thumbnail_format}")
+        self.max_size = max_size
+        self.thumbnail_format = thumbnail_format
+        self.failed = failed
+        self.rendered = rendered
+        self.commit_every = commit_every
+        workers = workers or os.cpu_count() or 1
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.slots = threading.BoundedSemaphore(4 * workers)
+        os.makedirs(self.variant_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(self.variant_dir, INDEX_NAME), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+        # The cache is used from the threads of the organizer, so workers come from a fork server rather than a fork
+        # of this multi-threaded process, which could copy locks held by those threads into a child.
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('forkserver'))
+
+    @staticmethod
+    def path_for(destination_folder):
+        """
+        Return the cache folder that belongs to the given "_organized" folder.
+        """
+        return f"{os.path.abspath(destination_folder)}.thumbnails"
+
+    def thumbnail_path(self, digest, size):
+        extension = THUMBNAIL_FORMATS[self.thumbnail_format][1]
+        digest = digest[:DIGEST_LENGTH]
+        return os.path.join(self.variant_dir, digest[:2], digest[2:4], f"{digest}-{size}{extension}")
+
+    def lookup(self, file_path, stat_result=None):
+        """
+        Return the path of the thumbnail of file_path, or None if there is none for its current size and
+        modification time. The file itself is only stat'ed.
+        """
+        file_path = os.path.abspath(file_path)
+        stat_result = stat_result if stat_result is not None else os.stat(file_path)
+        with self.lock:
+            row = self.conn.execute("SELECT size, mtime_ns, thumbnail FROM thumbnails WHERE path = ?",
+                                    (file_path,)).fetchone()
+        if row is None or row[0] != stat_result.st_size or row[1] != stat_result.st_mtime_ns:
+            return None
+        thumbnail_path = os.path.join(self.variant_dir, row[2])
+        return thumbnail_path if os.path.exists(thumbnail_path) else None
+
+    def submit(self, file_path, stat_result=None):
+        """
+        Render the thumbnail of file_path in the background unless it is up to date or another file with the same
+        content already has one. Errors are reported to failed(), never raised.
+        """
+        file_path = os.path.abspath(file_path)
+        try:
+            stat_result = stat_result if stat_result is not None else os.stat(file_path)
+            if self.lookup(file_path, stat_result) is not None:
+                return
+            thumbnail_path = self.thumbnail_path(partial_hash(file_path, stat_result.st_size), stat_result.st_size)
+            if os.path.exists(thumbnail_path):
+                self._record(file_path, stat_result, thumbnail_path)
+                return
+        except OSError as e:
+            self._failed(file_path, e)
+            return
+
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(timed_call, render_thumbnail, file_path, thumbnail_path, self.max_size,
+                                          self.thumbnail_format)
+        except BaseException:
+            self.slots.release()
+            raise
+
+        def finished(future):
+            self.slots.release()
+            try:
+                _, seconds = future.result()
+            except Exception as e:
+                self._failed(file_path, e)
+                return
+            self._record(file_path, stat_result, thumbnail_path)
+            if self.rendered is not None:
+                self.rendered(file_path, seconds)
+
+        future.add_done_callback(finished)
+
+    def _record(self, file_path, stat_result, thumbnail_path):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?)",
+                              (file_path, stat_result.st_size, stat_result.st_mtime_ns,
+                               os.path.relpath(thumbnail_path, self.variant_dir)))
+            self.pending += 1
+            if self.pending >= self.commit_every:
+                self.conn.commit()
+                self.pending = 0
+
+    def _failed(self, file_path, error):
+        if self.failed is not None:
+            self.failed(file_path, error)
+        else:
+            print(f"Failed to render thumbnail of {file_path}: {error}")
+
+    def close(self):
+        """
+        Wait for the pending thumbnails and commit the index.
+        """
+        self.executor.shutdown()
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+def find_images(dir_path):
+    for root, dirs, files in os.walk(dir_path):
+        for file in files:
+            if os.path.splitext(file)[1].lower() in THUMBNAIL_EXTENSIONS:
+                yield os.path.join(root, file)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the thumbnail cache of an organized folder.')
+    parser.add_argument('dir_path', help='Path to the organized folder')
+    parser.add_argument('--cache', help='Path to the cache folder')
+    parser.add_argument('--max-size', type=int, default=DEFAULT_MAX_SIZE,
+                        help='Maximum width and height of the thumbnails in pixels')
+    parser.add_argument('--format', choices=list(THUMBNAIL_FORMATS), default=DEFAULT_FORMAT,
+                        help='Format of the thumbnails')
+    parser.add_argument('--workers', type=int, help='Number of worker processes')
+    args = parser.parse_args()
+
+    failures = []
+    counts = {'rendered': 0}
+
+    def on_failed(file_path, error):
+        failures.append(file_path)
+        print(f"Failed to render thumbnail of {file_path}: {error}")
+
+    def on_rendered(file_path, seconds):
+        counts['rendered'] += 1
+
+    cache = ThumbnailCache(args.cache or ThumbnailCache.path_for(args.dir_path), args.max_size, args.format,
+                           args.workers, failed=on_failed, rendered=on_rendered)
+    try:
+        for image_path in find_images(args.dir_path):
+            cache.submit(image_path)
+    finally:
+        cache.close()
+    print(f"Rendered {counts['rendered']} thumbnails into {cache.variant_dir}")
+    if failures:
+        print(f"Failed to render {len(failures)} thumbnails")
+        sys.exit(1)
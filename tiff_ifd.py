@@ -0,0 +1,148 @@
+"""
+tiff_ifd.py
+
+This module reads TIFF image file directories (IFDs) with small, bounded reads. It is the shared parser behind the EXIF
+block of JPEG files and TIFF based raw files such as NEF, used by date_extractor.py to find capture dates and by
+nef_to_jpg_converter.py to find the embedded JPEG previews.
+
+Only the IFD entries and the values that are asked for are read; image data is never touched.
+
+Usage:
+    with open(nef_path, 'rb') as f:
+        tiff = TiffReader.from_file(f)
+        entries, next_offset = tiff.read_ifd(tiff.ifd0_offset)
+        width, = tiff.values(entries[TAG_IMAGE_WIDTH])
+
+Dependencies:
+    - struct
+    - collections
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.1
+"""
+
+import struct
+from collections import namedtuple
+
+TAG_NEW_SUBFILE_TYPE = 0x00FE
+TAG_IMAGE_WIDTH = 0x0100
+TAG_IMAGE_LENGTH = 0x0101
+TAG_SUB_IFDS = 0x014A
+TAG_JPEG_INTERCHANGE_FORMAT = 0x0201
+TAG_JPEG_INTERCHANGE_FORMAT_LENGTH = 0x0202
+TAG_EXIF_IFD = 0x8769
+TAG_DATE_TIME_ORIGINAL = 0x9003
+
+TYPE_ASCII = 2
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8, 13: 4}
+TYPE_FORMATS = {1: 'B', 3: 'H', 4: 'I', 6: 'b', 8: 'h', 9: 'i', 13: 'I'}
+
+MAX_IFD_ENTRIES = 1024
+MAX_VALUE_COUNT = 4096
+
+# tag, field type, value count, the raw 4-byte value field and the offset of the entry itself.
+IfdEntry = namedtuple('IfdEntry', 'tag type count value entry_offset')
+
+
+class TiffReader:
+    """
+    Reader for a TIFF structure accessed through read(offset, length), where offsets are relative to the TIFF header.
+    """
+
+    def __init__(self, read):
+        self.read = read
+        header = read(0, 8)
+        if header[:2] == b'II':
+            self.byte_order = '<'
+        elif header[:2] == b'MM':
+            self.byte_order = '>'
+        else:
+            raise ValueError("not a TIFF structure")
+        magic, self.ifd0_offset = struct.unpack(self.byte_order + 'HI', header[2:])
+        if magic != 42:
+            raise ValueError("not a TIFF structure")
+
+    @classmethod
+    def from_file(cls, f, base=0):
+        """
+        Create a reader for a TIFF structure that starts at byte `base` of the open file f.
+        """
+        def read(offset, length):
+            f.seek(base + offset)
+            data = f.read(length)
+            if len(data) != length:
+                raise ValueError("truncated TIFF structure")
+            return data
+        return cls(read)
+
+    @classmethod
+    def from_bytes(cls, data):
+        def read(offset, length):
+            if offset < 0 or offset + length > len(data):
+                raise ValueError("truncated TIFF structure")
+            return data[offset:offset + length]
+        return cls(read)
+
+    def read_ifd(self, offset):
+        """
+        Return (entries, next_ifd_offset) for the IFD at offset, where entries is a dict of tag -> IfdEntry.
+        """
+        count, = struct.unpack(self.byte_order + 'H', self.read(offset, 2))
+        if count > MAX_IFD_ENTRIES:
+            raise ValueError("implausible IFD entry count")
+        data = self.read(offset + 2, count * 12 + 4)
+        entries = {}
+        for i in range(count):
+            tag, field_type, field_count = struct.unpack(self.byte_order + 'HHI', data[i * 12:i * 12 + 8])
+            entries[tag] = IfdEntry(tag, field_type, field_count, data[i * 12 + 8:i * 12 + 12], offset + 2 + i * 12)
+        next_offset, = struct.unpack(self.byte_order + 'I', data[-4:])
+        return entries, next_offset
+
+    def value_offset(self, entry):
+        """
+        Return the offset of the value of entry, whether it is stored inline in the entry or elsewhere.
+        """
+        if entry.count * TYPE_SIZES.get(entry.type, 1) <= 4:
+            return entry.entry_offset + 8
+        offset, = struct.unpack(self.byte_order + 'I', entry.value)
+        return offset
+
+    def raw_value(self, entry):
+        """
+        Return the bytes of the value of entry.
+        """
+        size = entry.count * TYPE_SIZES.get(entry.type, 1)
+        if size > MAX_VALUE_COUNT * 8:
+            raise ValueError("implausible TIFF value size")
+        if size <= 4:
+            return entry.value[:size]
+        return self.read(self.value_offset(entry), size)
+
+    def values(self, entry):
+        """
+        Return the value of an integer entry as a tuple of ints.
+        """
+        if entry.type not in TYPE_FORMATS or entry.count > MAX_VALUE_COUNT:
+            raise ValueError(f"unsupported TIFF value of tag {entry.tag:#06x}")
+        return struct.unpack(f"{self.byte_order}{entry.count}{TYPE_FORMATS[entry.type]}", self.raw_value(entry))
+
+    def ascii_value(self, entry):
+        return self.raw_value(entry).split(b'\x00')[0].decode('ascii')
+
+    def iter_ifds(self, follow_sub_ifds=True, max_ifds=32):
+        """
+        Yield (offset, entries) for IFD0, the IFDs chained after it and, if follow_sub_ifds, their SubIFDs.
+        """
+        pending = [self.ifd0_offset]
+        seen = set()
+        while pending and len(seen) < max_ifds:
+            offset = pending.pop(0)
+            if offset == 0 or offset in seen:
+                continue
+            seen.add(offset)
+            entries, next_offset = self.read_ifd(offset)
+            yield offset, entries
+            pending.append(next_offset)
+            if follow_sub_ifds and TAG_SUB_IFDS in entries:
+                pending.extend(self.values(entries[TAG_SUB_IFDS]))
@@ -0,0 +1,145 @@
+"""
+transfer.py
+
+This module transfers a file to its destination using the cheapest operation the filesystem supports. It is used by
+organizer.py to avoid writing a full second copy of the library when the source and destination share a filesystem.
+
+Modes:
+    - copy: copy the bytes with os.copy_file_range, which lets the kernel copy inside the filesystem (and reflink on
+      btrfs/XFS), falling back to shutil.copy2.
+    - move: rename the file when source and destination are on the same device, otherwise copy and delete it.
+    - hardlink: hard link the file when source and destination are on the same device, otherwise copy it.
+    - reflink: clone the file with the FICLONE ioctl (copy-on-write, no data written), falling back to copy.
+
+File metadata (timestamps and permission bits) is preserved in every mode, as with shutil.copy2. Copies are written to
+a temporary ".<name>.partial" file beside the destination and renamed over it, so an existing destination that is a
+hard link of the source is replaced by a copy rather than truncated together with the source.
+
+Usage:
+    method = transfer_file(source_path, destination_path, mode='reflink')
+
+Dependencies:
+    - os
+    - shutil
+    - threading
+    - fcntl (optional, Linux only)
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+TRANSFER_MODES = ('copy', 'move', 'hardlink', 'reflink')
+
+# _IOW(0x94, 9, int) from linux/fs.h
+FICLONE = 0x40049409
+
+# Past tense of each method returned by transfer_file and verified_copy.VerifiedCopier, for progress messages.
+METHOD_VERBS = {
+    'rename': 'Moved',
+    'move': 'Moved',
+    'hardlink': 'Linked',
+    'reflink': 'Cloned',
+    'copy_file_range': 'Copied',
+    'copy': 'Copied',
+    'checksum': 'Copied',
+    'identical': 'Matched',
+}
+
+
+def same_device(source_path, destination_path):
+    """
+    Check whether source_path and the (existing) parent folder of destination_path are on the same device.
+    """
+    destination_dir = os.path.dirname(os.path.abspath(destination_path))
+    return os.stat(source_path).st_dev == os.stat(destination_dir).st_dev
+
+
+def transfer_file(source_path, destination_path, mode='copy'):
+    """
+    Transfer source_path to destination_path using mode and return the method that was actually used: one of
+    'rename', 'move', 'hardlink', 'reflink', 'copy_file_range' or 'copy'. An existing destination is replaced.
+    """
+    if mode not in TRANSFER_MODES:
+        raise ValueError(f"Unknown transfer mode: {mode}")
+
+    if mode == 'move':
+        if same_device(source_path, destination_path):
+            if os.path.exists(destination_path) and os.path.samefile(source_path, destination_path):
+                # Renaming a file over a hard link of itself does nothing, so the source would stay.
+                os.remove(source_path)
+            else:
+                os.replace(source_path, destination_path)
+            return 'rename'
+        shutil.move(source_path, destination_path)
+        return 'move'
+
+    if mode == 'hardlink' and same_device(source_path, destination_path):
+        if os.path.lexists(destination_path):
+            os.remove(destination_path)
+        os.link(source_path, destination_path)
+        return 'hardlink'
+
+    if mode == 'reflink':
+        try:
+            _clone_file(source_path, destination_path, _reflink)
+            return 'reflink'
+        except OSError:
+            pass
+
+    try:
+        _clone_file(source_path, destination_path, _copy_file_range)
+        return 'copy_file_range'
+    except OSError:
+        _clone_file(source_path, destination_path, None)
+        return 'copy'
+
+
+def _clone_file(source_path, destination_path, clone):
+    """
+    Create a temporary file beside destination_path with clone(source_fd, destination_fd, size), or with
+    shutil.copyfile if clone is None, copy the metadata over and rename it to destination_path. The temporary file is
+    removed if clone fails.
+    """
+    directory, filename = os.path.split(os.path.abspath(destination_path))
+    temp_path = os.path.join(directory, f".{filename}.partial.{os.getpid()}.{threading.get_ident()}")
+    try:
+        if clone is None:
+            shutil.copyfile(source_path, temp_path)
+        else:
+            with open(source_path, 'rb') as source, open(temp_path, 'wb') as destination:
+                clone(source.fileno(), destination.fileno(), os.fstat(source.fileno()).st_size)
+        shutil.copystat(source_path, temp_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, destination_path)
+
+
+def _reflink(source_fd, destination_fd, size):
+    if fcntl is None:
+        raise OSError("reflink is not supported on this platform")
+    fcntl.ioctl(destination_fd, FICLONE, source_fd)
+
+
+def _copy_file_range(source_fd, destination_fd, size):
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError("copy_file_range is not supported on this platform")
+    offset = 0
+    while offset < size:
+        copied = os.copy_file_range(source_fd, destination_fd, size - offset, offset, offset)
+        if copied == 0:
+            break
+        offset += copied
+    if offset != size:
+        raise OSError(f"copy_file_range copied {offset} of {size} bytes")
@@ -0,0 +1,285 @@
+"""
+verified_copy.py
+
+This module copies files so that an interrupted run never leaves a truncated file under a final name, and records a
+checksum of every copy in a manifest so the destination can be verified later without the source.
+
+Each file is streamed through a reusable per-thread buffer into a temporary ".<name>.partial" file beside its
+destination while a BLAKE2b hash of the bytes is computed. Copies are then committed in batches: every temporary
+file of the batch is fsync'ed, renamed to its final name, each destination directory is fsync'ed once, and the
+checksums are appended to the manifest and fsync'ed. A crash therefore leaves at most some ".partial" files, which
+are never mistaken for copies, and every file listed in the manifest is on disk in full.
+
+The rename never replaces an existing file. If the destination name is taken by a file with the same content, the
+copy is dropped; otherwise the copy gets the first free name "<name>_1<ext>", "<name>_2<ext>", ...
+
+The manifest is a text file with one "<blake2b hex digest>  <path>" line per copy, paths relative to the folder of
+the manifest, so it can also be checked with "b2sum -c". Run this module on a manifest to verify the copies in
+parallel; the last line of a path wins.
+
+Usage:
+    copier = VerifiedCopier(manifest_path)
+    copier.copy(source_path, destination_path, done)  # done(final_path, method) once the copy is committed
+    copier.close()
+
+    python3 verified_copy.py <manifest> [--workers N]
+
+Dependencies:
+    - os
+    - sys
+    - shutil
+    - hashlib
+    - argparse
+    - threading
+    - concurrent.futures
+    - dedup
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.0
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import argparse
+import threading
+import concurrent.futures
+
+from dedup import full_hash
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_BATCH_FILES = 64
+DEFAULT_BATCH_BYTES = 256 * 1024 * 1024
+DEFAULT_WORKERS = 8
+PARTIAL_SUFFIX = '.partial'
+
+
+class VerifiedCopier:
+    """
+    Thread-safe checksum-verified copier that commits copies in batches.
+
+    A batch is committed when it holds batch_files files or batch_bytes bytes, by the thread whose copy filled it,
+    and on flush() and close(). failed(source_path, error) is called for each copy that could not be committed.
+    """
+
+    def __init__(self, manifest_path, failed=None, batch_files=DEFAULT_BATCH_FILES, batch_bytes=DEFAULT_BATCH_BYTES,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        self.manifest_path = os.path.abspath(manifest_path)
+        self.manifest_dir = os.path.dirname(self.manifest_path)
+        self.failed = failed
+        self.batch_files = batch_files
+        self.batch_bytes = batch_bytes
+        self.buffer_size = buffer_size
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        # Serializes commits, so that two batches never race for the same free name.
+        self.commit_lock = threading.Lock()
+        self.pending = []
+        self.pending_bytes = 0
+        self.temp_paths = set()
+        self.manifest = open(self.manifest_path, 'a')
+
+    def copy(self, source_path, destination_path, done=None):
+        """
+        Copy source_path to a temporary file beside destination_path and queue it for the next commit, after which
+        done(final_path, method) is called with method 'checksum', or 'identical' if the destination already held
+        the same content. Raises OSError if the copy fails, in which case the temporary file is removed.
+        """
+        directory, filename = os.path.split(os.path.abspath(destination_path))
+        temp_path = os.path.join(directory, f".{filename}{PARTIAL_SUFFIX}")
+        with self.lock:
+            # Copies of two sources with the same name in the same folder must not share a temporary file.
+            number = 0
+            while temp_path in self.temp_paths:
+                number += 1
+                temp_path = os.path.join(directory, f".{filename}.{number}{PARTIAL_SUFFIX}")
+            self.temp_paths.add(temp_path)
+        try:
+            f = open(temp_path, 'wb')
+        except BaseException:
+            self._release(temp_path)
+            raise
+        try:
+            digest, size = self._stream(source_path, f)
+            f.flush()
+            shutil.copystat(source_path, temp_path)
+        except BaseException:
+            f.close()
+            os.remove(temp_path)
+            self._release(temp_path)
+            raise
+        with self.lock:
+            self.pending.append((source_path, temp_path, os.path.join(directory, filename), f, digest, done))
+            self.pending_bytes += size
+            full = len(self.pending) >= self.batch_files or self.pending_bytes >= self.batch_bytes
+        if full:
+            self.flush()
+
+    def _stream(self, source_path, f):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            buffer = self.local.buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+        digest = hashlib.blake2b()
+        size = 0
+        with open(source_path, 'rb') as source:
+            while True:
+                length = source.readinto(buffer)
+                if not length:
+                    break
+                digest.update(view[:length])
+                f.write(view[:length])
+                size += length
+        return digest.hexdigest(), size
+
+    def flush(self):
+        """
+        Commit every pending copy.
+        """
+        with self.commit_lock:
+            with self.lock:
+                batch = self.pending
+                self.pending = []
+                self.pending_bytes = 0
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch):
+        synced = []
+        for source_path, temp_path, destination_path, f, digest, done in batch:
+            try:
+                os.fsync(f.fileno())
+                f.close()
+                synced.append((source_path, temp_path, destination_path, digest, done))
+            except OSError as e:
+                f.close()
+                self._discard(source_path, temp_path, e)
+
+        finished = []
+        directories = set()
+        for source_path, temp_path, destination_path, digest, done in synced:
+            try:
+                final_path, method = self._finalize(temp_path, destination_path, digest)
+            except OSError as e:
+                self._discard(source_path, temp_path, e)
+                continue
+            self._release(temp_path)
+            directories.add(os.path.dirname(final_path))
+            finished.append((final_path, method, digest, done))
+
+        for directory in directories:
+            _fsync_directory(directory)
+        for final_path, method, digest, done in finished:
+            self.manifest.write(f"{digest}  {os.path.relpath(final_path, self.manifest_dir)}\n")
+        self.manifest.flush()
+        os.fsync(self.manifest.fileno())
+        for final_path, method, digest, done in finished:
+            if done is not None:
+                done(final_path, method)
+
+    def _finalize(self, temp_path, destination_path, digest):
+        """
+        Rename temp_path to destination_path or, if that name is taken, to the first free numbered name.
+        Returns (final_path, method).
+        """
+        stem, extension = os.path.splitext(destination_path)
+        candidate = destination_path
+        number = 0
+        while True:
+            try:
+                # A hard link fails instead of replacing an existing file, which a rename would not.
+                os.link(temp_path, candidate)
+            except FileExistsError:
+                if os.path.isfile(candidate) and os.path.getsize(candidate) == os.path.getsize(temp_path) \
+                        and full_hash(candidate) == digest:
+                    os.remove(temp_path)
+                    return candidate, 'identical'
+                number += 1
+                candidate = f"{stem}_{number}{extension}"
+                continue
+            except OSError:
+                # No hard links on this filesystem: fall back to a rename of a name checked to be free.
+                if os.path.lexists(candidate):
+                    raise
+                os.rename(temp_path, candidate)
+                return candidate, 'checksum'
+            os.remove(temp_path)
+            return candidate, 'checksum'
+
+    def _release(self, temp_path):
+        with self.lock:
+            self.temp_paths.discard(temp_path)
+
+    def _discard(self, source_path, temp_path, error):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        self._release(temp_path)
+        if self.failed is not None:
+            self.failed(source_path, error)
+        else:
+            print(f"Failed to copy {source_path}: {error}")
+
+    def close(self):
+        self.flush()
+        self.manifest.close()
+
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_manifest(manifest_path):
+    """
+    Return a dict of absolute path -> digest, the last line of each path winning.
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    digests = {}
+    with open(manifest_path) as f:
+        for line in f:
+            digest, separator, path = line.rstrip('\n').partition('  ')
+            if separator:
+                digests[os.path.join(manifest_dir, path)] = digest
+    return digests
+
+
+def verify_manifest(manifest_path, workers=DEFAULT_WORKERS):
+    """
+    Hash every file listed in the manifest in a thread pool and return a list of (path, problem) for the files that
+    are missing or whose content no longer matches.
+    """
+    digests = read_manifest(manifest_path)
+    problems = []
+
+    def check(path):
+        try:
+            return path, None if full_hash(path) == digests[path] else 'checksum mismatch'
+        except OSError as e:
+            return path, str(e)
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        for path, problem in executor.map(check, digests):
+            if problem is not None:
+                problems.append((path, problem))
+                print(f"FAILED {path}: {problem}")
+    print(f"Verified {len(digests) - len(problems)} of {len(digests)} files")
+    return problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Verify the files listed in a manifest against their checksums.')
+    parser.add_argument('manifest', help='Path to the manifest file')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of files hashed at the same time')
+    args = parser.parse_args()
+    if verify_manifest(args.manifest, args.workers):
+        sys.exit(1)
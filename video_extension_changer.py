@@ -5,40 +5,65 @@ This script changes the extensions of video files in a specified directory and i
 It supports various video file extensions, including AVI, WMV, FLV, MOV, MPG, MPEG, M4V, 3GP, and ASX.
 
 Usage:
-    python video_extension_changer.py <dir_path>
+    python video_extension_changer.py <dir_path> [--plan PLAN_FILE] [--io-concurrency N]
 
 Arguments:
     dir_path (str): Directory path containing the video files.
 
+Options:
+    --plan: Write the operations to this plan file instead of applying them (see planner.py).
+    --io-concurrency: Read directories and stat files with this many concurrent operations (see async_io.py). Use on
+                      network shares. Defaults to 0, a sequential walk.
+
 Dependencies:
     - os
-    - sys
+    - argparse
+    - async_io
+    - planner
 
 Author: K H M BURHAN UDDIN
 Date: May 12, 2023
-Version: 1.0
+Version: 1.3
 """
 
 import os
-import sys
+import argparse
+from collections import Counter
+
+from async_io import walk_tree
+from planner import Plan
 
 VIDEO_EXTENSIONS = ['.avi', '.wmv', '.flv', '.mov', '.mpg', '.mpeg', '.m4v', '.3gp', '.asx']
 
 
-def change_video_extensions(dir_path):
-    for root, dirs, files in os.walk(dir_path):
-        for filename in files:
-            file_path = os.path.join(root, filename)
-            file_ext = os.path.splitext(file_path)[1]
-            if file_ext.lower() in VIDEO_EXTENSIONS:
-                new_file_path = os.path.splitext(file_path)[0] + '.mp4'
-                os.rename(file_path, new_file_path)
-                print(f"Renamed {file_path} to {new_file_path}")
+def change_video_extensions(dir_path, plan=None, io_concurrency=0):
+    for directory in walk_tree(dir_path, plan, io_concurrency):
+        change_video_extensions_in_directory(directory)
+
+
+def change_video_extensions_in_directory(directory):
+    """
+    Rename the videos of one walker.Directory listing to '.mp4'. Returns a Counter with 'renamed'.
+    """
+    totals = Counter()
+    for filename in directory.file_names():
+        file_ext = os.path.splitext(filename)[1]
+        if file_ext.lower() in VIDEO_EXTENSIONS:
+            new_filename = os.path.splitext(filename)[0] + '.mp4'
+            directory.rename(filename, new_filename)
+            totals['renamed'] += 1
+            print(f"Renamed {directory.join(filename)} to {directory.join(new_filename)}")
+    return totals
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print(f"Usage: python {sys.argv[0]} <dir_path>")
-        sys.exit(1)
-    dir_path = sys.argv[1]
-    change_video_extensions(dir_path)
+    parser = argparse.ArgumentParser(description="Change the extension of video files to '.mp4'.")
+    parser.add_argument('dir_path', help='Directory path containing the video files')
+    parser.add_argument('--plan', help='Write the operations to this plan file instead of applying them')
+    parser.add_argument('--io-concurrency', type=int, default=0,
+                        help='Read directories and stat files with this many concurrent operations')
+    args = parser.parse_args()
+    plan = Plan() if args.plan else None
+    change_video_extensions(args.dir_path, plan, args.io_concurrency)
+    if plan is not None:
+        plan.save(args.plan)
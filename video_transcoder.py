@@ -0,0 +1,277 @@
+"""
+video_transcoder.py
+
+This script re-encodes the legacy videos in a specified directory and its subdirectories to HEVC in an MP4 container
+with ffmpeg, and keeps each result only if it is smaller than the original. It does the work that used to be done by
+hand before converted_video_organizer.py, and unlike video_extension_changer.py it produces real MP4 files:
+
+1. Every video is probed with ffprobe for the codec of its first video stream. Videos already in HEVC, AV1 or VP9
+   are left alone.
+2. The expected savings of each video are estimated from its size and a typical compression ratio for its codec
+   (motion JPEG and DV shrink far more than H.264), and the videos are transcoded in order of expected savings, so
+   the largest savings come first if the run is stopped.
+3. A pool of ffmpeg workers encodes the videos, each into a hidden ".partial" file that is renamed to
+   "<name>-converted.mp4" only when ffmpeg succeeds.
+4. Each converted video goes through the same check as in converted_video_organizer.py: it is discarded if it is
+   larger than the original, otherwise it gets the dates of the original and replaces it as "<name>.mp4".
+5. The result is recorded in an append-only journal ("transcode.log.csv" in the input directory) under its path,
+   size and modification time, so an interrupted run resumes with the videos that have not been transcoded yet, and
+   a video that is replaced later is transcoded again.
+
+ffmpeg uses several threads per encode, so by default the pool runs one worker per 4 CPUs and each ffmpeg process
+gets an equal share of the CPUs.
+
+Videos that share a name with another video in the same folder ("clip.avi" and "clip.mov") and videos that already
+have a "-converted.mp4" file are skipped, since their results would collide.
+
+Usage:
+    python video_transcoder.py <input_dir> [--workers N] [--codec {libx265,libx264}] [--crf N] [--preset PRESET]
+                                           [--progress] [--report FILE]
+
+Arguments:
+    input_dir (str): Path to the directory containing the videos.
+
+Options:
+    --workers: Number of videos transcoded at the same time. Defaults to one per 4 CPUs.
+    --codec: Video encoder. Defaults to libx265.
+    --crf: Constant rate factor of the encoder. Defaults to 28 for libx265 and 23 for libx264.
+    --preset: Encoder preset. Defaults to medium.
+    --progress: Print a progress line with the throughput and ETA (see metrics.py).
+    --report: Write a JSON report of the run, with per-stage counts, throughput and latency histograms, to this file.
+
+Dependencies:
+    - os
+    - sys
+    - time
+    - argparse
+    - subprocess
+    - concurrent.futures
+    - converted_video_organizer
+    - video_extension_changer
+    - journal
+    - metrics
+    - walker
+    - ffmpeg and ffprobe (command-line tools)
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.1
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import concurrent.futures
+from collections import defaultdict
+
+from converted_video_organizer import finalize_converted_video, get_converted_filename, human_readable_size
+from journal import Journal, stat_key
+from metrics import Metrics
+from video_extension_changer import VIDEO_EXTENSIONS
+from walker import Directory, FileEntry
+
+TRANSCODE_EXTENSIONS = tuple(VIDEO_EXTENSIONS) + ('.mp4',)
+JOURNAL_NAME = 'transcode.log.csv'
+THREADS_PER_WORKER = 4
+ENCODERS = {'libx265': 28, 'libx264': 23}
+DEFAULT_PRESET = 'medium'
+
+# Typical size of an HEVC encode relative to the original, by codec of the original. None: not worth transcoding.
+CODEC_RATIOS = {
+    'hevc': None,
+    'av1': None,
+    'vp9': None,
+    'h264': 0.6,
+    'mpeg4': 0.35,
+    'msmpeg4v2': 0.35,
+    'msmpeg4v3': 0.35,
+    'wmv1': 0.4,
+    'wmv2': 0.4,
+    'wmv3': 0.45,
+    'h263': 0.4,
+    'flv1': 0.4,
+    'mpeg1video': 0.3,
+    'mpeg2video': 0.3,
+    'mjpeg': 0.1,
+    'dvvideo': 0.1,
+    'rawvideo': 0.02,
+}
+DEFAULT_CODEC_RATIO = 0.5
+
+
+def find_videos(input_dir):
+    """
+    Yield the paths of the videos to transcode, skipping "-converted.mp4" files, videos that already have one, and
+    videos that share their name with another video of the same folder.
+    """
+    for root, dirs, files in os.walk(input_dir):
+        lower_names = {filename.lower() for filename in files}
+        by_stem = defaultdict(list)
+        for filename in files:
+            base, ext = os.path.splitext(filename)
+            if ext.lower() in TRANSCODE_EXTENSIONS and not base.lower().endswith('-converted'):
+                by_stem[base.lower()].append(filename)
+        for stem, filenames in by_stem.items():
+            if len(filenames) > 1:
+                print(f"Skipping {', '.join(os.path.join(root, filename) for filename in filenames)}: same name")
+                continue
+            if get_converted_filename(filenames[0]).lower() in lower_names:
+                print(f"Skipping {os.path.join(root, filenames[0])}: already converted")
+                continue
+            yield os.path.join(root, filenames[0])
+
+
+def probe_codec(video_path):
+    """
+    Return the codec name of the first video stream of video_path, or None if it has none.
+    Raises subprocess.CalledProcessError if ffprobe cannot read the file.
+    """
+    result = subprocess.run(['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=codec_name',
+                             '-of', 'default=noprint_wrappers=1:nokey=1', video_path],
+                            check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    codec = result.stdout.strip().splitlines()
+    return codec[0] if codec else None
+
+
+def expected_savings(size, codec):
+    """
+    Return the expected number of bytes saved by transcoding a video of size bytes, or None if it is not worth it.
+    """
+    ratio = CODEC_RATIOS.get(codec, DEFAULT_CODEC_RATIO)
+    if ratio is None:
+        return None
+    return int(size * (1 - ratio))
+
+
+def transcode_video(video_path, encoder, crf, preset, threads):
+    """
+    Encode video_path with ffmpeg and finalize the result like converted_video_organizer.py.
+    Returns (result_path, original_size, converted_size, kept).
+    """
+    folder, filename = os.path.split(video_path)
+    converted_filename = get_converted_filename(filename)
+    temp_path = os.path.join(folder, f".{converted_filename}.partial")
+    command = ['ffmpeg', '-nostdin', '-v', 'error', '-y', '-i', video_path,
+               '-map', '0:v:0', '-map', '0:a?', '-map_metadata', '0',
+               '-c:v', encoder, '-crf', str(crf), '-preset', preset, '-threads', str(threads),
+               '-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart', '-f', 'mp4']
+    if encoder == 'libx265':
+        # Lets Apple players recognize the HEVC stream.
+        command += ['-tag:v', 'hvc1']
+    try:
+        subprocess.run(command + [temp_path], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        os.replace(temp_path, os.path.join(folder, converted_filename))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # A listing of just the pair is all finalize_converted_video needs.
+    directory = Directory(folder, {name: FileEntry(name, os.path.join(folder, name))
+                                   for name in (filename, converted_filename)}, [])
+    original_size = directory.size(filename)
+    converted_size = directory.size(converted_filename)
+    if finalize_converted_video(directory, filename, converted_filename) is None:
+        return video_path, original_size, converted_size, False
+    return os.path.join(folder, os.path.splitext(filename)[0] + '.mp4'), original_size, converted_size, True
+
+
+def transcode_videos(input_dir, workers=None, encoder='libx265', crf=None, preset=DEFAULT_PRESET, metrics=None):
+    """
+    Transcode every video under input_dir that is not in the journal yet, largest expected savings first.
+    Returns the list of videos that failed. Probing and encoding are recorded in metrics as stages 'probe' and
+    'transcode', and the outcome of each video as 'kept', 'discarded' or 'failed'.
+    """
+    cpu_count = os.cpu_count() or 1
+    workers = workers or max(1, cpu_count // THREADS_PER_WORKER)
+    threads = max(1, cpu_count // workers)
+    crf = crf if crf is not None else ENCODERS[encoder]
+    metrics = metrics if metrics is not None else Metrics('video_transcoder')
+    failures = []
+    totals = defaultdict(int)
+
+    with Journal(os.path.join(input_dir, JOURNAL_NAME), key_fields=3) as journal:
+        pending = [video_path for video_path in find_videos(input_dir)
+                   if stat_key(video_path, os.stat(video_path)) not in journal]
+        print(f"Skipping {len(journal)} already processed videos, probing {len(pending)}")
+
+        def probe(video_path):
+            start = time.perf_counter()
+            try:
+                codec = probe_codec(video_path)
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"Failed to probe {video_path}: {e}")
+                return video_path, None
+            metrics.record('probe', time.perf_counter() - start)
+            if codec is None:
+                return video_path, None
+            return video_path, expected_savings(os.path.getsize(video_path), codec)
+
+        with concurrent.futures.ThreadPoolExecutor(cpu_count) as executor:
+            jobs = [(savings, video_path) for video_path, savings in executor.map(probe, pending)
+                    if savings is not None]
+        jobs.sort(reverse=True)
+        print(f"Transcoding {len(jobs)} videos, expected savings {human_readable_size(sum(s for s, _ in jobs))}")
+        metrics.set_total(len(jobs))
+        metrics.start(('kept', 'discarded', 'failed'))
+
+        def transcode(video_path):
+            start = time.perf_counter()
+            result = transcode_video(video_path, encoder, crf, preset, threads)
+            metrics.record('transcode', time.perf_counter() - start, size=result[1])
+            return result
+
+        # The pool takes the jobs in submission order, so the largest expected savings are encoded first.
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            futures = {executor.submit(transcode, video_path): video_path for _, video_path in jobs}
+            for future in concurrent.futures.as_completed(futures):
+                video_path = futures[future]
+                try:
+                    result_path, original_size, converted_size, kept = future.result()
+                except (OSError, subprocess.CalledProcessError) as e:
+                    failures.append(video_path)
+                    metrics.record('failed')
+                    stderr = getattr(e, 'stderr', None)
+                    print(f"Error occurred during video transcoding: {video_path}: {e}"
+                          f"{': ' + stderr.decode(errors='replace').strip() if stderr else ''}")
+                    continue
+                journal.record(stat_key(result_path, os.stat(result_path)), original_size, converted_size)
+                if kept:
+                    metrics.record('kept', size=original_size)
+                    totals['original_size'] += original_size
+                    totals['converted_size'] += converted_size
+                    print(f"Transcoded {video_path} ({human_readable_size(original_size)} -> "
+                          f"{human_readable_size(converted_size)})")
+                else:
+                    metrics.record('discarded', size=original_size)
+
+        metrics.stop()
+
+    metrics.extra.update(original_size=totals['original_size'], converted_size=totals['converted_size'])
+    print("Transcoding completed!")
+    print(f"Total original size: {human_readable_size(totals['original_size'])}")
+    print(f"Total converted size: {human_readable_size(totals['converted_size'])}")
+    print(f"Space saved: {human_readable_size(totals['original_size'] - totals['converted_size'])}")
+    if failures:
+        print(f"Failed to transcode {len(failures)} videos")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Transcode videos to HEVC and keep the smaller version.')
+    parser.add_argument('input_dir', help='Path to the directory containing the videos')
+    parser.add_argument('--workers', type=int, help='Number of videos transcoded at the same time')
+    parser.add_argument('--codec', choices=list(ENCODERS), default='libx265', help='Video encoder')
+    parser.add_argument('--crf', type=int, help='Constant rate factor of the encoder')
+    parser.add_argument('--preset', default=DEFAULT_PRESET, help='Encoder preset')
+    parser.add_argument('--progress', action='store_true', help='Print a progress line with the throughput and ETA')
+    parser.add_argument('--report', help='Write a JSON report of the run to this file')
+    args = parser.parse_args()
+    metrics = Metrics('video_transcoder', show_progress=args.progress)
+    failures = transcode_videos(args.input_dir, args.workers, args.codec, args.crf, args.preset, metrics)
+    if args.report:
+        metrics.write_report(args.report)
+    if failures:
+        sys.exit(1)
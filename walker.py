@@ -0,0 +1,131 @@
+"""
+walker.py
+
+This module walks a directory tree with os.scandir and keeps an in-memory listing of each directory. The listing
+holds the DirEntry of every file, so the stat result of a file is fetched at most once and then shared by every
+cleanup pass that looks at it (see maintenance.py). Passes change files through the listing (remove, rename, utime),
+which keeps it in sync with the filesystem without reading the directory again.
+
+When a planner.Plan is given, the listing changes only in memory and the remove, rename and utime operations are
+recorded in the plan instead of being applied, so later passes see the result of the earlier ones without any file
+being touched.
+
+Usage:
+    for directory in walk(dir_path):
+        for filename in directory.file_names():
+            if directory.size(filename) == 0:
+                directory.remove(filename)
+
+Dependencies:
+    - os
+
+Author: K H M BURHAN UDDIN
+Date: Oct 18, 2026
+Version: 1.1
+"""
+
+import os
+
+
+class FileEntry:
+    """
+    A file in a Directory listing. The stat result comes from the DirEntry returned by os.scandir and is cached.
+    """
+
+    def __init__(self, name, path, dir_entry=None, stat_result=None):
+        self.name = name
+        self.path = path
+        self.dir_entry = dir_entry
+        self.stat_result = stat_result
+
+    def stat(self):
+        if self.stat_result is None:
+            self.stat_result = self.dir_entry.stat() if self.dir_entry is not None else os.stat(self.path)
+        return self.stat_result
+
+
+class Directory:
+    """
+    In-memory listing of the files of one directory, read with a single os.scandir call.
+    """
+
+    def __init__(self, path, files, subdirectories, plan=None):
+        self.path = path
+        self.files = files
+        self.subdirectories = subdirectories
+        self.plan = plan
+
+    @classmethod
+    def scan(cls, path, plan=None):
+        files = {}
+        subdirectories = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.name)
+                elif entry.is_file():
+                    files[entry.name] = FileEntry(entry.name, entry.path, dir_entry=entry)
+        return cls(path, files, subdirectories, plan)
+
+    def file_names(self):
+        """
+        Return the names of the files in the directory, as a list that stays valid while files are changed.
+        """
+        return list(self.files)
+
+    def join(self, filename):
+        return os.path.join(self.path, filename)
+
+    def stat(self, filename):
+        return self.files[filename].stat()
+
+    def size(self, filename):
+        return self.stat(filename).st_size
+
+    def remove(self, filename):
+        if self.plan is not None:
+            self.plan.delete(self.join(filename))
+        else:
+            os.remove(self.join(filename))
+        del self.files[filename]
+
+    def rename(self, filename, new_filename):
+        if self.plan is not None:
+            # Nothing is renamed yet, so the planned entry keeps the stat result of the old one.
+            self.plan.move(self.join(filename), self.join(new_filename))
+            self.files[new_filename] = FileEntry(new_filename, self.join(new_filename),
+                                                 stat_result=self.files[filename].stat())
+            del self.files[filename]
+            return
+        os.rename(self.join(filename), self.join(new_filename))
+        # A rename changes the ctime, so the new entry is stat'ed again when it is needed.
+        del self.files[filename]
+        self.files[new_filename] = FileEntry(new_filename, self.join(new_filename))
+
+    def utime(self, filename, times):
+        entry = self.files[filename]
+        if self.plan is not None:
+            self.plan.utime(self.join(filename), times)
+            st = entry.stat()
+            entry.stat_result = os.stat_result(st[:7] + (int(times[0]), int(times[1]), st[9]) +
+                                               (times[0], times[1], st.st_ctime))
+            return
+        os.utime(self.join(filename), times)
+        entry.stat_result = None
+        entry.dir_entry = None
+
+
+def walk(dir_path, plan=None):
+    """
+    Yield a Directory listing for dir_path and each of its subdirectories, top-down. Each directory is read once.
+    If plan is given, changes made through the listings are recorded in it instead of being applied.
+    """
+    pending = [dir_path]
+    while pending:
+        try:
+            directory = Directory.scan(pending.pop(), plan)
+        except OSError as e:
+            print(f"Failed to read directory {e.filename}: {e}")
+            continue
+        yield directory
+        pending.extend(directory.join(name) for name in sorted(directory.subdirectories, reverse=True))